@@ -1,5 +1,5 @@
 from nicegui import ui, app
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from app.models import SystemData
 from app.services import monitor_service, storage_service
@@ -14,6 +14,8 @@ class SystemMonitor:
         self.disk_data = []
         self.network_sent_data = []
         self.network_recv_data = []
+        # 被监控进程树的资源数据：标签 -> [(时间, CPU, 内存)]
+        self.process_data: Dict[str, List[Tuple[str, float, float]]] = {}
         self.max_data_points = 100  # 最大数据点数量
         self.current_interval = monitor_service.get_interval()
         # 存储上一次的数据值，用于阈值比较
@@ -31,7 +33,7 @@ class SystemMonitor:
             # 监控频率调整 - 现代化样式
             with ui.card().classes('mb-6 bg-blue-50 border border-blue-100 rounded-lg'):
                 with ui.row().classes('items-center justify-between p-4'):
-                    self.interval_label = ui.label(f'监控频率: {self.current_interval}秒').classes('text-lg font-medium text-blue-700')
+                    self.interval_label = ui.label(f'监控频率: {self.current_interval:g}秒').classes('text-lg font-medium text-blue-700')
                     with ui.column().classes('flex-grow items-center ml-6'):
                         with ui.row().classes('w-full items-center justify-between mb-1 min-w-64'):
                             ui.label('慢').classes('text-sm text-gray-500')
@@ -40,6 +42,7 @@ class SystemMonitor:
                             ui.slider(
                                 min=settings.MIN_MONITOR_INTERVAL,
                                 max=settings.MAX_MONITOR_INTERVAL,
+                                step=0.1,
                                 value=self.current_interval,
                                 on_change=self._update_interval,
                             ).props('color=blue').classes('w-full')
@@ -71,12 +74,19 @@ class SystemMonitor:
                         self.network_sent_value = ui.label('发送: 0 KB/s').classes('text-base text-purple-500')
                         self.network_recv_value = ui.label('接收: 0 KB/s').classes('text-base text-indigo-500')
             
+            # 被监控进程树的当前资源使用
+            with ui.card().classes('w-full mb-6 bg-white border border-gray-200 rounded-lg shadow-sm'):
+                ui.label('被监控进程').classes('text-lg font-semibold mb-3 text-gray-700')
+                self.process_list = ui.column().classes('w-full gap-1')
+            
             # 实时图表
             with ui.tabs().classes('w-full mb-2') as tabs:
                 cpu_tab = ui.tab('CPU 使用率')
                 memory_tab = ui.tab('内存使用率')
                 disk_tab = ui.tab('磁盘使用率')
                 network_tab = ui.tab('网络流量')
+                process_cpu_tab = ui.tab('进程 CPU')
+                process_memory_tab = ui.tab('进程内存')
             
             with ui.tab_panels(tabs, value=cpu_tab).classes('w-full'):
                 # CPU 使用率图表
@@ -193,25 +203,39 @@ class SystemMonitor:
                             'formatter': '{b0}<br/>{a0}: {c0} KB/s<br/>{a1}: {c1} KB/s'
                         }
                     }).classes('w-full h-64')
+                
+                # 被监控进程树图表（每个进程树一条曲线）
+                with ui.tab_panel(process_cpu_tab):
+                    self.process_cpu_chart = ui.echart(self._process_chart_options()).classes('w-full h-64')
+                
+                with ui.tab_panel(process_memory_tab):
+                    self.process_memory_chart = ui.echart(self._process_chart_options()).classes('w-full h-64')
         
         # 初始化数据
         self._initialize_data()
-        # 注册数据更新回调
-        monitor_service.register_system_data_callback(self._update_data)
+        # 注册数据更新回调（图表只需要最新样本，积压时直接跳到最新值）
+        monitor_service.register_system_data_callback(self._update_data, policy="latest")
     
     def _initialize_data(self):
         """初始化历史数据"""
-        # 获取最近10分钟的数据
+        # 获取最近 max_data_points 个监控周期的数据
         end_time = datetime.now()
-        start_time = end_time - timedelta(minutes=10)
+        # 图表数据按落库间隔更新，高频采样时也以落库间隔计算时间范围
+        start_time = end_time - timedelta(seconds=self.max_data_points * max(self.current_interval, settings.MONITOR_PERSIST_INTERVAL))
         
-        # 从数据库获取历史数据
-        historical_data = storage_service.get_system_data(start_time, end_time)
+        # 从数据库获取历史数据（时间跨度较大时自动改用汇总表）
+        historical_data = storage_service.get_system_data_series(start_time, end_time, max_points=self.max_data_points)
         
         # 初始化图表数据
         for data in historical_data:
             self._add_data_point(data)
         
+        # 被监控进程树的历史数据
+        for sample in storage_service.get_process_samples(start_time, end_time):
+            self._add_process_point(sample.label, sample.timestamp, sample.cpu_percent, sample.memory_percent)
+        self._update_process_charts()
+        self._update_process_list()
+        
         # 更新当前值
         if historical_data:
             latest_data = historical_data[-1]
@@ -225,6 +249,11 @@ class SystemMonitor:
     
     def _update_data(self, system_data: SystemData):
         """更新系统数据，添加异常处理和阈值检测"""
+        try:
+            self._update_processes(system_data.timestamp)
+        except Exception as e:
+            logging.error(f"更新被监控进程数据时出错: {str(e)}")
+        
         try:
             # 转换网络数据为KB/s
             sent_kb = system_data.network_sent / 1024
@@ -318,6 +347,88 @@ class SystemMonitor:
                 # 记录错误但不中断更新过程
                 logging.error(f"更新网络图表时出错: {str(e)}")
     
+    @staticmethod
+    def _process_chart_options() -> Dict[str, Any]:
+        """进程树图表的初始配置（时间轴，曲线在有数据后按标签生成）"""
+        return {
+            'xAxis': {'type': 'time'},
+            'yAxis': {
+                'type': 'value',
+                'axisLabel': {
+                    'formatter': '{value} %'
+                }
+            },
+            'legend': {'type': 'scroll'},
+            'series': [],
+            'tooltip': {'trigger': 'axis'}
+        }
+    
+    def _add_process_point(self, label: str, timestamp: datetime, cpu_percent: float, memory_percent: float):
+        """添加进程树数据点，每个进程树最多保留 max_data_points 个"""
+        points = self.process_data.setdefault(label, [])
+        points.append((timestamp.strftime('%Y-%m-%d %H:%M:%S'), round(cpu_percent, 1), round(memory_percent, 1)))
+        if len(points) > self.max_data_points:
+            points.pop(0)
+    
+    def _update_processes(self, timestamp: datetime):
+        """取被监控进程树的最新采样结果追加到图表，并刷新进程列表"""
+        watched = monitor_service.get_watched_processes()
+        for process in watched:
+            if process["cpu_percent"] is not None:
+                self._add_process_point(process["label"], timestamp, process["cpu_percent"], process["memory_percent"])
+        
+        # 已结束的进程树在其数据移出图表时间范围后不再显示
+        oldest = timestamp - timedelta(seconds=self.max_data_points * max(self.current_interval, settings.MONITOR_PERSIST_INTERVAL))
+        oldest_text = oldest.strftime('%Y-%m-%d %H:%M:%S')
+        for label in list(self.process_data):
+            points = [point for point in self.process_data[label] if point[0] >= oldest_text]
+            if points:
+                self.process_data[label] = points
+            else:
+                del self.process_data[label]
+        
+        self._update_process_charts()
+        self._update_process_list(watched)
+    
+    def _update_process_charts(self):
+        """按标签重建进程树图表的曲线"""
+        if not hasattr(self, 'process_cpu_chart'):
+            return
+        for chart, index in ((self.process_cpu_chart, 1), (self.process_memory_chart, 2)):
+            try:
+                chart.options['series'] = [
+                    {
+                        'name': label,
+                        'type': 'line',
+                        'showSymbol': False,
+                        'data': [[point[0], point[index]] for point in points]
+                    }
+                    for label, points in self.process_data.items()
+                ]
+            except Exception as e:
+                logging.error(f"更新进程图表时出错: {str(e)}")
+    
+    def _update_process_list(self, watched: List[Dict[str, Any]] = None):
+        """刷新被监控进程列表"""
+        if not hasattr(self, 'process_list'):
+            return
+        if watched is None:
+            watched = monitor_service.get_watched_processes()
+        self.process_list.clear()
+        with self.process_list:
+            if not watched:
+                ui.label('当前没有被监控的进程').classes('text-gray-500')
+            for process in watched:
+                name = process["process_name"] or '-'
+                if process["cpu_percent"] is None:
+                    ui.label(f'{process["label"]}  {name} (PID {process["pid"]})  等待采样').classes('text-sm text-gray-500')
+                    continue
+                ui.label(
+                    f'{process["label"]}  {name} (PID {process["pid"]})  '
+                    f'CPU {process["cpu_percent"]:.1f}%  内存 {process["memory_percent"]:.1f}%  '
+                    f'进程数 {process["process_count"]}'
+                ).classes('text-sm text-gray-700')
+    
     def _update_current_values(self, system_data: SystemData, update_cpu: bool = True, update_memory: bool = True, update_disk: bool = True, update_network: bool = True):
         """更新当前值显示，只更新变化超过阈值的DOM元素"""
         # 更新文本值 - 添加错误处理，只在数据变化超过阈值时更新
@@ -351,8 +462,8 @@ class SystemMonitor:
     
     def _update_interval(self, event):
         """更新监控频率"""
-        new_interval = int(event.value)
+        new_interval = round(float(event.value), 1)
         monitor_service.set_interval(new_interval)
         self.current_interval = new_interval
         # 更新显示的频率值 - 使用我们存储的标签引用
-        self.interval_label.text = f'监控频率: {new_interval}秒'
+        self.interval_label.text = f'监控频率: {new_interval:g}秒'
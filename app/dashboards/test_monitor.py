@@ -2,7 +2,7 @@ import asyncio
 import os
 import uuid
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from nicegui import ui, app
 from typing import List, Dict, Any, Optional
@@ -23,6 +23,8 @@ class TestMonitor:
         self.current_run_id = None
         self.test_logs = []
         self.max_log_lines = 500
+        self.log_search_page_size = 20
+        self._log_search_offset = 0
         self._pending_status_update = None
         self._rendered_report_ids = set()
         self._machines = []
@@ -96,6 +98,37 @@ class TestMonitor:
                 ui.button('清空日志', on_click=lambda: self.log_output.clear())
                 ui.button('下载日志', on_click=self._download_logs).classes('ml-2')
         
+        # 日志全文搜索卡片
+        with ui.card().classes('w-full mt-4'):
+            ui.label('日志搜索').classes('text-lg font-semibold mb-2')
+            
+            with ui.row().classes('w-full mb-2 items-center'):
+                self.log_search_input = ui.input(
+                    label='搜索关键字',
+                    placeholder='例如: AssertionError 或 Traceback'
+                ).classes('flex-grow mr-2')
+                self.log_search_input.on('keydown.enter', lambda: self._search_logs(0))
+                self.log_search_run_input = ui.input(label='运行ID（可选）').classes('w-64 mr-2')
+                self.log_search_level = ui.select(
+                    options={'': '全部级别', 'ERROR': 'ERROR', 'WARNING': 'WARNING', 'INFO': 'INFO'},
+                    value='',
+                    label='级别'
+                ).classes('w-32 mr-2')
+                self.log_search_range = ui.select(
+                    options={'': '全部时间', '24h': '最近24小时', '7d': '最近7天', '30d': '最近30天'},
+                    value='',
+                    label='时间范围'
+                ).classes('w-36 mr-2')
+                ui.button('搜索', icon='search', on_click=lambda: self._search_logs(0))
+            
+            self.log_search_results = ui.column().classes('w-full gap-1')
+            
+            with ui.row().classes('w-full items-center mt-2') as self.log_search_pager:
+                self.log_search_prev_button = ui.button('上一页', on_click=lambda: self._search_logs(self._log_search_offset - self.log_search_page_size)).props('flat')
+                self.log_search_page_label = ui.label('')
+                self.log_search_next_button = ui.button('下一页', on_click=lambda: self._search_logs(self._log_search_offset + self.log_search_page_size)).props('flat')
+            self.log_search_pager.set_visibility(False)
+        
         # 测试执行统计卡片
         with ui.card().classes('w-full mt-4'):
             ui.label('测试执行统计').classes('text-lg font-semibold mb-4')
@@ -170,6 +203,9 @@ class TestMonitor:
             
             self.report_container = ui.column().classes('w-full')
             self.report_cards = {}
+            # 报告列表按键集分页加载，_report_pages 为当前已展开的页数
+            self._report_pages = 1
+            self.load_more_reports_button = ui.button('加载更多', on_click=self._load_more_reports, icon='expand_more').props('flat').classes('w-full')
             self._load_reports()
     
     def _create_machine_management_panel(self):
@@ -756,29 +792,9 @@ class TestMonitor:
         """刷新测试执行统计数据"""
         time_range = self.time_range_select.value
         
-        # 获取时间范围对应的秒数
-        if time_range == '1h':
-            seconds = 3600
-        elif time_range == '24h':
-            seconds = 86400
-        elif time_range == '7d':
-            seconds = 604800
-        elif time_range == '30d':
-            seconds = 2592000
-        else:
-            seconds = 86400  # 默认24小时
-        
         import datetime
         
-        # 计算时间范围
         current_time = datetime.datetime.now()
-        start_time = current_time - datetime.timedelta(seconds=seconds)
-        
-        # 从数据库获取测试运行记录
-        test_runs = storage_service.get_test_runs_by_time_range(start_time, current_time)
-        logger.debug(f"[DEBUG] 获取到的测试运行记录数量: {len(test_runs)}")
-        for run in test_runs:
-            logger.debug(f"[DEBUG] 测试运行记录: run_id={run.run_id}, status={run.status}, start_time={run.start_time}, total_tests={run.total_tests}, passed_tests={run.passed_tests}")
         
         # 根据时间范围确定时间间隔
         if time_range == '1h':
@@ -797,37 +813,16 @@ class TestMonitor:
             interval = datetime.timedelta(hours=1)
             points = 24
         
-        # 初始化时间点和通过率数据
-        time_points = []
-        pass_rates = []
-        
-        # 如果有测试数据，直接使用每个测试的实际时间和通过率
-        if test_runs:
-            # 按测试开始时间排序
-            sorted_test_runs = sorted(test_runs, key=lambda x: x.start_time)
-            
-            # 遍历测试运行记录，获取每个测试的实际时间和通过率
-            for run in sorted_test_runs:
-                # 跳过未完成的测试（只处理已完成、失败或停止的测试）
-                if run.status not in ['completed', 'failed', 'stopped'] or run.total_tests == 0:
-                    logger.debug(f"[DEBUG] 跳过测试 {run.run_id}: status={run.status}, total_tests={run.total_tests}")
-                    continue
-                
-                # 计算当前测试的通过率
-                test_pass_rate = (run.passed_tests / run.total_tests) * 100
-                test_pass_rate = round(test_pass_rate, 2)
-                logger.debug(f"[DEBUG] 测试 {run.run_id} 通过率: {test_pass_rate:.2f}%，执行时间: {run.start_time}")
-                
-                # 添加到时间点和通过率列表
-                time_points.append(run.start_time)
-                pass_rates.append(test_pass_rate)
-        else:
-            logger.debug(f"[DEBUG] 无测试数据")
+        # 在数据库中按时间桶聚合通过率，每次刷新只需一次小查询
+        start_time = current_time - interval * points
+        trend = storage_service.get_test_run_trend(start_time, current_time, int(interval.total_seconds()))
+        logger.debug(f"[DEBUG] 时间桶数量: {len(trend)}, 测试运行次数: {sum(b['run_count'] for b in trend)}")
         
-        logger.debug(f"[DEBUG] 最终通过率数据: {pass_rates}")
+        # 格式化时间点，没有测试运行的时间桶通过率为空，图表中显示为断点
+        formatted_time_points = [b['bucket_start'].strftime('%Y-%m-%d %H:%M') for b in trend]
+        pass_rates = [b['pass_rate'] for b in trend]
         
-        # 格式化时间点
-        formatted_time_points = [tp.strftime('%Y-%m-%d %H:%M:%S') for tp in time_points]
+        logger.debug(f"[DEBUG] 最终通过率数据: {pass_rates}")
         
         # 更新图表数据
         try:
@@ -1070,6 +1065,56 @@ class TestMonitor:
         self._refresh_test_statistics()
         logger.info(f"[STATUS] 测试执行统计图表刷新完成")
     
+    def _search_logs(self, offset: int = 0):
+        """全文搜索测试日志并分页显示高亮结果"""
+        query = (self.log_search_input.value or '').strip()
+        if not query:
+            ui.notify('请输入搜索关键字', type='warning')
+            return
+        
+        offset = max(0, offset)
+        start_time = None
+        time_range = self.log_search_range.value
+        if time_range:
+            seconds = {'24h': 86400, '7d': 604800, '30d': 2592000}[time_range]
+            start_time = datetime.now() - timedelta(seconds=seconds)
+        
+        try:
+            results, has_more = storage_service.search_test_logs(
+                query,
+                run_id=(self.log_search_run_input.value or '').strip() or None,
+                levels=[self.log_search_level.value] if self.log_search_level.value else None,
+                start_time=start_time,
+                limit=self.log_search_page_size,
+                offset=offset
+            )
+        except (ValueError, RuntimeError) as e:
+            ui.notify(str(e), type='warning')
+            return
+        except Exception as e:
+            logger.error(f"日志搜索失败: {e}")
+            ui.notify('日志搜索失败，请检查搜索关键字', type='negative')
+            return
+        
+        self._log_search_offset = offset
+        self.log_search_results.clear()
+        with self.log_search_results:
+            if not results:
+                ui.label('没有找到匹配的日志').classes('text-gray-500')
+            for item in results:
+                level_color = {'ERROR': 'text-red-600', 'WARNING': 'text-orange-500'}.get(item['level'], 'text-gray-500')
+                with ui.row().classes('w-full items-start gap-2 border-b py-1'):
+                    ui.label(item['timestamp'].strftime('%Y-%m-%d %H:%M:%S')).classes('text-xs text-gray-500 whitespace-nowrap')
+                    ui.label(item['level']).classes(f'text-xs font-semibold {level_color}')
+                    ui.link(item['run_id'][:8], f"/report/{item['run_id']}", new_tab=True).classes('text-xs').tooltip(item['run_id'])
+                    # snippet 已在存储层整行转义，只含 <mark> 标记，无需再经前端净化
+                    ui.html(item['snippet'], sanitize=False).classes('font-mono text-sm break-all flex-1')
+        
+        self.log_search_pager.set_visibility(offset > 0 or has_more)
+        self.log_search_page_label.set_text(f'第 {offset // self.log_search_page_size + 1} 页')
+        self.log_search_prev_button.set_enabled(offset > 0)
+        self.log_search_next_button.set_enabled(has_more)
+    
     def _download_logs(self, run_id: str = None):
         """下载测试日志"""
         target_run_id = run_id or self.current_run_id
@@ -1269,8 +1314,15 @@ class TestMonitor:
         """加载测试报告列表"""
         logger.info("开始加载报告列表")
         
-        # 从数据库获取所有测试运行记录
-        test_runs = storage_service.get_all_test_runs()
+        # 按 (start_time, run_id) 键集分页获取已展开页数内的测试运行记录
+        test_runs = []
+        cursor = None
+        for _ in range(self._report_pages):
+            page, cursor = storage_service.get_test_runs_page(page_size=settings.REPORT_PAGE_SIZE, cursor=cursor)
+            test_runs.extend(page)
+            if cursor is None:
+                break
+        self.load_more_reports_button.set_visibility(cursor is not None)
         logger.info(f"从数据库获取到 {len(test_runs)} 条测试记录")
         
         # 格式化数据为前端需要的格式
@@ -1349,6 +1401,11 @@ class TestMonitor:
         
         logger.info(f"当前已渲染报告数: {len(self.report_cards)}")
     
+    def _load_more_reports(self):
+        """展开下一页测试报告"""
+        self._report_pages += 1
+        self._load_reports()
+    
     def _render_reports(self, reports):
         """渲染报告列表到UI（按排序顺序：运行中在前，时间倒序）"""
         logger.info(f"开始渲染 {len(reports)} 个报告")
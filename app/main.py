@@ -1,13 +1,14 @@
 from nicegui import ui, app
 from app.authentication import auth
 from app.dashboards import SystemMonitor, TestMonitor
-from app.services import monitor_service, storage_service
+from app.services import monitor_service, storage_service, retention_service, export_service
+from app.services.export_service import JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED, JOB_CANCELLED
 from config.settings import settings
 import logging
 import os
 import time
-import sqlite3
 from datetime import datetime
+from functools import partial
 from typing import Dict, Any
 
 class RemoteTestMonitorApp:
@@ -242,6 +243,8 @@ class RemoteTestMonitorApp:
     
     def _create_export_panel(self):
         """创建导出面板"""
+        # 本页面提交、尚未通知结果的导出任务
+        watched_jobs = set()
         with ui.card().classes('w-full p-4'):
             ui.label('数据导出').classes('text-2xl font-bold mb-4 text-gray-700')
             
@@ -282,21 +285,41 @@ class RemoteTestMonitorApp:
                         self.start_time.on_value_change(validate_date)
                         self.end_time.on_value_change(validate_date)
                     
+                    # 运行ID - 仅测试日志可用，留空时导出时间范围内所有运行的日志
+                    with ui.row().classes('items-center mb-4') as self.run_id_container:
+                        ui.label('运行ID:').classes('text-sm text-gray-600 mr-2 w-24')
+                        self.export_run_id = ui.input(placeholder='留空导出时间范围内所有运行的日志').classes('flex-grow')
+                    
+                    # 数据粒度选择 - 仅系统监控数据可用
+                    with ui.row().classes('items-center mb-4') as self.resolution_container:
+                        ui.label('数据粒度:').classes('text-sm text-gray-600 mr-2 w-24')
+                        self.export_resolution = ui.select(
+                            {'raw': '原始数据', '1m': '1分钟汇总', '1h': '1小时汇总', '1d': '1天汇总'},
+                            value='raw'
+                        ).classes('flex-grow')
+                    
                     # 导出格式选择
                     with ui.row().classes('items-center mb-4'):
                         ui.label('导出格式:').classes('text-sm text-gray-600 mr-2 w-24')
                         self.export_format = ui.select(
-                            ['CSV', 'JSON'],
+                            {'CSV': 'CSV', 'NDJSON': 'NDJSON', 'COLS': '列式二进制 (.cols，仅系统监控数据)'},
                             value='CSV'
                         ).classes('flex-grow')
                     
+                    # 是否以 gzip 压缩输出
+                    with ui.row().classes('items-center mb-4'):
+                        ui.label('压缩:').classes('text-sm text-gray-600 mr-2 w-24')
+                        self.export_compress = ui.checkbox('gzip 压缩 (.gz)', value=False)
+                    
                     # 导出按钮
                     with ui.row().classes('items-center justify-end'):
-                        self.export_button = ui.button('执行导出', on_click=self._export_data).props('color=primary')
+                        self.export_button = ui.button('执行导出', on_click=lambda: self._export_data(watched_jobs)).props('color=primary')
             
-            # 导出状态和结果显示
+            # 导出状态和任务列表
             self.export_status = ui.label('').classes('text-sm text-gray-600 mb-4')
             self.export_result = ui.column().classes('w-full')
+            self._export_jobs_snapshot = None
+            ui.timer(1.0, lambda: self._refresh_export_jobs(watched_jobs))
         
         # 初始化时间范围显示
         self._on_export_data_type_change()
@@ -306,21 +329,33 @@ class RemoteTestMonitorApp:
         # 只有系统监控数据、测试运行记录、测试日志需要时间范围
         show_time_range = self.export_data_type.value in ['系统监控数据', '测试运行记录', '测试日志']
         self.time_range_container.visible = show_time_range
+        self.resolution_container.visible = self.export_data_type.value == '系统监控数据'
+        self.run_id_container.visible = self.export_data_type.value == '测试日志'
     
-    def _export_data(self):
-        """执行数据导出"""
+    def _export_data(self, watched_jobs):
+        """提交后台导出任务（导出在工作线程中执行，不阻塞页面）"""
         try:
             data_type = self.export_data_type.value
             export_format = self.export_format.value
+            if export_format == 'COLS' and data_type != '系统监控数据':
+                ui.notify('列式二进制格式仅支持系统监控数据', type='warning')
+                return
             
             # 准备导出参数
             export_params = {
                 'data_type': data_type,
-                'format': export_format
+                'format': export_format,
+                'compress': self.export_compress.value
             }
             
+            # 测试日志指定运行ID且未选开始时间时导出整个运行的日志
+            run_id = (self.export_run_id.value or '').strip() if self.run_id_container.visible else ''
+            if run_id:
+                export_params['run_id'] = run_id
+            whole_run = run_id and not self.start_time.value
+            
             # 如果需要时间范围
-            if self.time_range_container.visible:
+            if self.time_range_container.visible and not whole_run:
                 if not self.start_time.value:
                     ui.notify('请选择开始时间', type='warning')
                     return
@@ -342,221 +377,86 @@ class RemoteTestMonitorApp:
                 export_params['start_time'] = start_time
                 export_params['end_time'] = end_time
             
-            # 更新状态
-            self.export_status.text = f'正在导出 {data_type}...'
-            self.export_status.classes(remove='text-red-500').classes('text-blue-500')
-            
-            # 执行导出
-            file_path = self._perform_export(export_params)
-            
-            # 显示结果
-            self.export_status.text = f'导出完成: {os.path.basename(file_path)}'
-            self.export_status.classes(remove='text-blue-500').classes('text-green-500')
-            
-            # 提供下载链接
-            self.export_result.clear()
-            import urllib.parse
-            with self.export_result:
-                filename = os.path.basename(file_path)
-                encoded_filename = urllib.parse.quote(filename)
-                ui.link(f'下载 {filename}', f'/export/{encoded_filename}')
-                ui.label(f'文件位置: {file_path}').classes('text-xs text-gray-500 mt-2')
+            if self.resolution_container.visible:
+                export_params['resolution'] = self.export_resolution.value
             
-            ui.notify(f'{data_type} 导出成功', type='success')
+            # 提交任务，完成后由定时器通知当前页面
+            job = export_service.submit(export_params)
+            watched_jobs.add(job.job_id)
+            self.export_status.text = f'已提交导出任务: {job.filename}'
+            self.export_status.classes(remove='text-red-500 text-green-500').classes('text-blue-500')
+            self._refresh_export_jobs(watched_jobs, force=True)
             
         except Exception as e:
             self.export_status.text = f'导出失败: {str(e)}'
             self.export_status.classes(remove='text-blue-500 text-green-500').classes('text-red-500')
             ui.notify(f'导出失败: {str(e)}', type='error')
     
-    def _perform_export(self, params):
-        """执行实际的导出操作"""
-        import csv
-        import json
-        import tempfile
-        import os
-        from datetime import datetime
-        
-        data_type = params['data_type']
-        export_format = params['format']
-        
-        # 准备导出目录
-        export_dir = os.path.join(os.getcwd(), 'export')
-        os.makedirs(export_dir, exist_ok=True)
-        
-        # 生成文件名
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        filename = f'{data_type}_{timestamp}.{export_format.lower()}'
-        file_path = os.path.join(export_dir, filename)
-        
-        if data_type == '系统监控数据':
-            # 导出系统监控数据
-            start_time = params['start_time']
-            end_time = params['end_time']
-            data = storage_service.get_system_data(start_time, end_time)
-            
-            if export_format == 'CSV':
-                with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    # 写入表头
-                    writer.writerow(['时间戳', 'CPU使用率(%)', '内存使用率(%)', '磁盘使用率(%)', '发送流量(KB)', '接收流量(KB)', '进程ID', '进程名称', '节点名称'])
-                    # 写入数据
-                    for item in data:
-                        writer.writerow([
-                            item.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                            item.cpu_percent,
-                            item.memory_percent,
-                            item.disk_percent,
-                            item.network_sent / 1024,
-                            item.network_recv / 1024,
-                            item.process_id,
-                            item.process_name,
-                            item.node_name
-                        ])
-            else:  # JSON
-                export_data = []
-                for item in data:
-                    export_data.append({
-                        '时间戳': item.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                        'CPU使用率(%)': item.cpu_percent,
-                        '内存使用率(%)': item.memory_percent,
-                        '磁盘使用率(%)': item.disk_percent,
-                        '发送流量(KB)': item.network_sent / 1024,
-                        '接收流量(KB)': item.network_recv / 1024,
-                        '进程ID': item.process_id,
-                        '进程名称': item.process_name,
-                        '节点名称': item.node_name
-                    })
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, ensure_ascii=False, indent=2)
-        
-        elif data_type == '测试运行记录':
-            # 导出测试运行记录
-            start_time = params['start_time']
-            end_time = params['end_time']
-            data = storage_service.get_test_runs_by_time_range(start_time, end_time)
-            
-            if export_format == 'CSV':
-                with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    # 写入表头
-                    writer.writerow(['运行ID', '开始时间', '结束时间', '状态', '总测试数', '通过数', '失败数', '跳过数', '测试路径', '报告路径', '节点名称', '退出码', '执行类型'])
-                    # 写入数据
-                    for item in data:
-                        writer.writerow([
-                            item.run_id,
-                            item.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                            item.end_time.strftime('%Y-%m-%d %H:%M:%S') if item.end_time else '',
-                            item.status,
-                            item.total_tests,
-                            item.passed_tests,
-                            item.failed_tests,
-                            item.skipped_tests,
-                            item.test_path,
-                            item.report_path or '',
-                            item.node_name,
-                            item.exit_code or '',
-                            item.execution_type
-                        ])
-            else:  # JSON
-                export_data = []
-                for item in data:
-                    export_data.append({
-                        '运行ID': item.run_id,
-                        '开始时间': item.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                        '结束时间': item.end_time.strftime('%Y-%m-%d %H:%M:%S') if item.end_time else '',
-                        '状态': item.status,
-                        '总测试数': item.total_tests,
-                        '通过数': item.passed_tests,
-                        '失败数': item.failed_tests,
-                        '跳过数': item.skipped_tests,
-                        '测试路径': item.test_path,
-                        '报告路径': item.report_path or '',
-                        '节点名称': item.node_name,
-                        '退出码': item.exit_code or '',
-                        '执行类型': item.execution_type
-                    })
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, ensure_ascii=False, indent=2)
+    def _cancel_export(self, job_id, watched_jobs):
+        """取消导出任务"""
+        if export_service.cancel(job_id):
+            ui.notify('已请求取消导出任务', type='info')
+        self._refresh_export_jobs(watched_jobs, force=True)
+    
+    def _refresh_export_jobs(self, watched_jobs, force=False):
+        """刷新导出任务列表，本页面提交的任务结束时弹出通知"""
+        import urllib.parse
+        jobs = export_service.list_jobs()
         
-        elif data_type == '测试日志':
-            # 这里需要获取所有测试日志，或者提供测试ID选择
-            # 为简化实现，先导出最近的1000条日志
-            with sqlite3.connect(settings.DB_PATH) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT run_id, timestamp, level, message FROM test_logs ORDER BY timestamp DESC LIMIT 1000')
-                data = cursor.fetchall()
-            
-            if export_format == 'CSV':
-                with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    # 写入表头
-                    writer.writerow(['运行ID', '时间戳', '日志级别', '消息'])
-                    # 写入数据
-                    for item in data:
-                        writer.writerow([
-                            item[0],
-                            datetime.fromisoformat(item[1]).strftime('%Y-%m-%d %H:%M:%S'),
-                            item[2],
-                            item[3]
-                        ])
-            else:  # JSON
-                export_data = []
-                for item in data:
-                    export_data.append({
-                        '运行ID': item[0],
-                        '时间戳': datetime.fromisoformat(item[1]).strftime('%Y-%m-%d %H:%M:%S'),
-                        '日志级别': item[2],
-                        '消息': item[3]
-                    })
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, ensure_ascii=False, indent=2)
+        # 本页面提交的任务结束时通知一次
+        for job in jobs:
+            if job.job_id not in watched_jobs or not job.finished:
+                continue
+            watched_jobs.discard(job.job_id)
+            if job.state == JOB_DONE:
+                self.export_status.text = f'导出完成: {job.filename}'
+                self.export_status.classes(remove='text-blue-500 text-red-500').classes('text-green-500')
+                ui.notify(f'{job.data_type} 导出成功，共 {job.rows_written} 行', type='positive')
+            elif job.state == JOB_FAILED:
+                self.export_status.text = f'导出失败: {job.error}'
+                self.export_status.classes(remove='text-blue-500 text-green-500').classes('text-red-500')
+                ui.notify(f'导出失败: {job.error}', type='negative')
+            else:
+                self.export_status.text = f'导出已取消: {job.filename}'
+                self.export_status.classes(remove='text-blue-500 text-green-500 text-red-500')
         
-        elif data_type == '机器配置':
-            # 导出机器配置
-            from app.services import remote_machine_service
-            data = remote_machine_service.get_all_machines()
-            
-            if export_format == 'CSV':
-                with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    # 写入表头
-                    writer.writerow(['机器ID', '名称', '主机', '端口', '平台', '用户名', '状态', '描述'])
-                    # 写入数据
-                    for item in data:
-                        writer.writerow([
-                            item.machine_id,
-                            item.name,
-                            item.host,
-                            item.port,
-                            'Linux' if item.platform == 'linux' else 'Windows',
-                            item.username,
-                            item.status,
-                            item.description or ''
-                        ])
-            else:  # JSON
-                export_data = []
-                for item in data:
-                    export_data.append({
-                        '机器ID': item.machine_id,
-                        '名称': item.name,
-                        '主机': item.host,
-                        '端口': item.port,
-                        '平台': 'Linux' if item.platform == 'linux' else 'Windows',
-                        '用户名': item.username,
-                        '状态': item.status,
-                        '描述': item.description or ''
-                    })
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, ensure_ascii=False, indent=2)
+        # 任务状态没有变化时不重建列表
+        snapshot = [(job.job_id, job.state, job.rows_written) for job in jobs]
+        if not force and snapshot == self._export_jobs_snapshot:
+            return
+        self._export_jobs_snapshot = snapshot
         
-        return file_path
+        state_labels = {JOB_QUEUED: '排队中', JOB_RUNNING: '导出中', JOB_DONE: '已完成',
+                        JOB_FAILED: '失败', JOB_CANCELLED: '已取消'}
+        self.export_result.clear()
+        with self.export_result:
+            for job in reversed(jobs):
+                with ui.row().classes('items-center w-full gap-4 border-b py-1'):
+                    ui.label(job.filename).classes('text-sm flex-grow')
+                    ui.label(state_labels.get(job.state, job.state)).classes('text-sm w-16')
+                    progress = f'{job.progress * 100:.0f}%' if job.progress is not None else '-'
+                    ui.label(f'{job.rows_written} 行 / {progress}').classes('text-sm text-gray-600 w-32')
+                    eta = job.eta_seconds
+                    ui.label(f'剩余约 {eta:.0f} 秒' if eta is not None else '').classes('text-xs text-gray-500 w-24')
+                    if job.state == JOB_DONE:
+                        ui.link('下载', f'/export/{urllib.parse.quote(job.filename)}')
+                    elif not job.finished:
+                        ui.button('取消', on_click=partial(self._cancel_export, job.job_id, watched_jobs)) \
+                            .props('flat dense color=negative')
+                    elif job.error:
+                        ui.label(job.error).classes('text-xs text-red-500')
     
     def run(self):
         """运行应用"""
         # 启动系统监控服务
         monitor_service.start_monitoring()
         
+        # 启动过期数据清理服务
+        retention_service.start()
+        
+        # 定期生成只读快照（DB_SNAPSHOT_INTERVAL > 0 时）
+        storage_service.start_snapshots()
+        
         # 定义报告文件访问路由
         @ui.page('/report/{run_id}')
         def report_page(run_id: str):
@@ -591,7 +491,7 @@ class RemoteTestMonitorApp:
         @ui.page('/export/{filename}')
         def export_download_page(filename: str):
             """导出文件下载页面"""
-            import fastapi
+            from fastapi.responses import FileResponse
             import urllib.parse
             
             # 先对URL编码的文件名进行解码，得到原始文件名
@@ -606,21 +506,17 @@ class RemoteTestMonitorApp:
                 return ui.label('文件不存在').classes('text-red-500 text-xl')
             
             try:
-                # 使用FastAPI的Response直接返回文件内容，完全控制响应头
-                with open(file_path, 'rb') as f:
-                    content = f.read()
-                
                 # 构建符合RFC 5987标准的Content-Disposition头
                 encoded_filename = urllib.parse.quote(decoded_filename)
                 # 使用filename*=charset''encoded-filename格式，两个单引号是必须的分隔符
                 content_disposition = f'attachment; filename*=UTF-8\'\'{encoded_filename}'
                 
-                return fastapi.Response(
-                    content=content,
+                # 使用FileResponse分块发送文件，不将整个导出文件读入内存
+                return FileResponse(
+                    file_path,
                     media_type='application/octet-stream',
                     headers={
-                        'Content-Disposition': content_disposition,
-                        'Content-Length': str(len(content))
+                        'Content-Disposition': content_disposition
                     }
                 )
             except Exception as e:
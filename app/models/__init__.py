@@ -1,9 +1,12 @@
-from .system_data import SystemData, ProcessData
+from .system_data import SystemData, SystemDataRollup, ProcessSample, ProcessData
 from .test_data import TestResult, TestRun, TestQueueItem, TestLog
 from .machine_data import RemoteMachine, MachinePlatform, MachineStatus
+from .records import SystemDataRecord, TestLogRecord
 
 __all__ = [
     "SystemData",
+    "SystemDataRollup",
+    "ProcessSample",
     "ProcessData",
     "TestResult",
     "TestRun",
@@ -11,5 +14,7 @@ __all__ = [
     "TestLog",
     "RemoteMachine",
     "MachinePlatform",
-    "MachineStatus"
+    "MachineStatus",
+    "SystemDataRecord",
+    "TestLogRecord"
 ]
@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Optional
+from .system_data import SystemData
+from .test_data import TestLog
+
+class _SlotRecord:
+    """热读路径使用的轻量只读行对象
+
+    用 __slots__ 保存字段，不做 pydantic 校验，构造开销和单个对象内存远小于模型；
+    属性名与对应的 pydantic 模型一致，需要模型时调用 to_model()。
+    """
+    __slots__ = ()
+    _model = None
+
+    def to_model(self):
+        """转换为经过校验的 pydantic 模型"""
+        return self._model(**{field: getattr(self, field) for field in self.__slots__})
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self):
+        fields = ', '.join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class SystemDataRecord(_SlotRecord):
+    """系统监控数据行（字段同 SystemData）"""
+    __slots__ = ("timestamp", "cpu_percent", "memory_percent", "disk_percent", "network_sent",
+                 "network_recv", "process_id", "process_name", "node_name")
+    _model = SystemData
+
+    def __init__(self, timestamp: datetime, cpu_percent: float, memory_percent: float, disk_percent: float,
+                 network_sent: int, network_recv: int, process_id: Optional[int] = None,
+                 process_name: Optional[str] = None, node_name: str = "localhost"):
+        self.timestamp = timestamp
+        self.cpu_percent = cpu_percent
+        self.memory_percent = memory_percent
+        self.disk_percent = disk_percent
+        self.network_sent = network_sent
+        self.network_recv = network_recv
+        self.process_id = process_id
+        self.process_name = process_name
+        self.node_name = node_name
+
+class TestLogRecord(_SlotRecord):
+    """测试日志行（字段同 TestLog）"""
+    __slots__ = ("run_id", "timestamp", "level", "message")
+    _model = TestLog
+
+    def __init__(self, run_id: str, timestamp: datetime, level: str, message: str):
+        self.run_id = run_id
+        self.timestamp = timestamp
+        self.level = level
+        self.message = message
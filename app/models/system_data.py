@@ -17,6 +17,51 @@ class SystemData(BaseModel):
     class Config:
         orm_mode = True
 
+class ProcessSample(BaseModel):
+    """被监控进程树的资源数据模型（每个进程树按标签形成独立的时间序列）"""
+    timestamp: datetime
+    label: str
+    run_id: Optional[str] = None
+    pid: int
+    process_name: Optional[str] = None
+    cpu_percent: float  # 进程及其所有子进程的 CPU 使用率之和
+    memory_percent: float  # 进程及其所有子进程的内存使用率之和
+    process_count: int = 1
+    node_name: str = "localhost"
+
+    class Config:
+        orm_mode = True
+
+class SystemDataRollup(BaseModel):
+    """系统监控数据汇总模型（按时间桶聚合）"""
+    timestamp: datetime  # 时间桶起始时间
+    resolution: str  # 1m, 1h, 1d
+    node_name: str = "localhost"
+    sample_count: int
+    cpu_percent_min: float
+    cpu_percent_max: float
+    cpu_percent_avg: float
+    cpu_percent_last: float
+    memory_percent_min: float
+    memory_percent_max: float
+    memory_percent_avg: float
+    memory_percent_last: float
+    disk_percent_min: float
+    disk_percent_max: float
+    disk_percent_avg: float
+    disk_percent_last: float
+    network_sent_min: float
+    network_sent_max: float
+    network_sent_avg: float
+    network_sent_last: float
+    network_recv_min: float
+    network_recv_max: float
+    network_recv_avg: float
+    network_recv_last: float
+
+    class Config:
+        orm_mode = True
+
 class ProcessData(BaseModel):
     """进程监控数据模型"""
     pid: int
@@ -3,11 +3,12 @@ from datetime import datetime
 from typing import List, Optional
 
 class TestResult(BaseModel):
-    """测试结果模型"""
-    test_id: str
+    """测试结果模型（单个测试用例的一次执行）"""
+    run_id: str
+    test_id: str  # pytest nodeid
     name: str
     status: str  # passed, failed, skipped
-    duration: float
+    duration: Optional[float] = None  # 秒，取自 pytest --durations 实测值，未取得前为空
     message: Optional[str] = None
     traceback: Optional[str] = None
     timestamp: datetime
@@ -1,13 +1,19 @@
 from .monitor_service import monitor_service
 from .test_service import test_service
 from .storage_service import storage_service
+from .storage_writer import storage_writer
+from .retention_service import retention_service
 from .alert_service import alert_service
 from .remote_machine_service import remote_machine_service
+from .export_service import export_service
 
 __all__ = [
     "monitor_service",
     "test_service",
     "storage_service",
+    "storage_writer",
+    "retention_service",
     "alert_service",
-    "remote_machine_service"
+    "remote_machine_service",
+    "export_service"
 ]
@@ -0,0 +1,349 @@
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from app.services.storage_service import storage_service
+from app.utils import TimeUtils, ExportUtils
+from config.settings import settings
+
+def _setup_logger():
+    logger = logging.getLogger('RemoteTestMonitor.ExportService')
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+logger = _setup_logger()
+
+# 导出任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+# 每写出多少行更新一次进度
+_PROGRESS_EVERY = 500
+
+# 列式二进制导出的列定义：(列名, array 类型码)，与 SYSTEM_DATA_BATCH_FIELDS 一一对应
+_SYSTEM_DATA_COLUMNS = (
+    ("timestamp_ms", "q"),
+    ("cpu_percent", "d"),
+    ("memory_percent", "d"),
+    ("disk_percent", "d"),
+    ("network_sent", "q"),
+    ("network_recv", "q"),
+    ("process_id", "q"),
+    ("process_name", "i"),
+    ("node_name", "i"),
+)
+
+class ExportCancelled(Exception):
+    """导出任务被用户取消"""
+
+class ExportJob:
+    """单个导出任务的状态（由工作线程更新，UI 线程只读）"""
+    def __init__(self, params: Dict[str, Any], filename: str):
+        self.job_id = uuid.uuid4().hex[:8]
+        self.params = params
+        self.data_type: str = params['data_type']
+        self.filename = filename
+        self.state = JOB_QUEUED
+        self.rows_written = 0
+        self.progress: Optional[float] = None  # 0~1，无法估计时为 None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """根据已用时间和进度估算剩余秒数"""
+        if self.state != JOB_RUNNING or not self.progress or self.started_at is None:
+            return None
+        elapsed = time.time() - self.started_at
+        return max(0.0, elapsed * (1 - self.progress) / self.progress)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "data_type": self.data_type,
+            "filename": self.filename,
+            "state": self.state,
+            "rows_written": self.rows_written,
+            "progress": self.progress,
+            "eta_seconds": self.eta_seconds,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+class ExportService:
+    """后台导出服务
+
+    导出任务提交到有界线程池中执行，NiceGUI 事件循环只负责提交和轮询状态，
+    多个用户同时导出也不会阻塞页面刷新。文件先写到 .part 临时文件，
+    完成后再改名，下载路由不会读到写了一半的文件；失败或取消时删除临时文件。
+    """
+    def __init__(self, storage=None, export_dir: Optional[str] = None,
+                 max_workers: Optional[int] = None, history_size: Optional[int] = None):
+        self._storage = storage or storage_service
+        self.export_dir = export_dir or os.path.join(os.getcwd(), 'export')
+        self._max_workers = max_workers or settings.EXPORT_MAX_WORKERS
+        self._history_size = history_size or settings.EXPORT_JOB_HISTORY
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, params: Dict[str, Any]) -> ExportJob:
+        """提交导出任务，立即返回任务对象
+
+        params: data_type、format（CSV/NDJSON/COLS）、compress，以及按数据类型需要的
+        start_time、end_time、resolution、run_id
+        """
+        job = ExportJob(params, self._make_filename(params))
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                    thread_name_prefix="ExportWorker")
+            self._jobs[job.job_id] = job
+            self._prune_history()
+            self._executor.submit(self._run, job)
+        logger.info(f"已提交导出任务 {job.job_id}: {job.filename}")
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """取消排队中或运行中的任务，任务已结束时返回 False"""
+        job = self.get_job(job_id)
+        if not job or job.finished:
+            return False
+        job._cancel_event.set()
+        return True
+
+    def get_job(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[ExportJob]:
+        """按提交顺序返回最近的任务（最新的在最后）"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self):
+        """取消所有未结束的任务并停止线程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job._cancel_event.set()
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _prune_history(self):
+        """只保留最近 history_size 个已结束的任务（调用方持有锁）"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self._history_size)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _make_filename(params: Dict[str, Any]) -> str:
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        filename = f"{params['data_type']}_{timestamp}_{uuid.uuid4().hex[:6]}.{params['format'].lower()}"
+        # 列式文件需要按偏移直接映射，不压缩
+        if params.get('compress') and params['format'] != 'COLS':
+            filename += '.gz'
+        return filename
+
+    def _run(self, job: ExportJob):
+        """工作线程：执行导出并更新任务状态"""
+        if job.cancel_requested:
+            job.state, job.finished_at = JOB_CANCELLED, time.time()
+            return
+        job.state, job.started_at = JOB_RUNNING, time.time()
+
+        os.makedirs(self.export_dir, exist_ok=True)
+        file_path = os.path.join(self.export_dir, job.filename)
+        part_path = file_path + '.part'
+        try:
+            export_format = job.params['format']
+            if export_format == 'COLS':
+                self._write_columns(job, part_path)
+            else:
+                headers, rows = self._export_rows(job)
+                compress = job.params.get('compress', False)
+                if export_format == 'CSV':
+                    ExportUtils.write_csv(part_path, headers, rows, compress)
+                else:  # NDJSON
+                    ExportUtils.write_ndjson(part_path, (dict(zip(headers, row)) for row in rows), compress)
+            os.replace(part_path, file_path)
+            job.progress = 1.0
+            job.state = JOB_DONE
+            logger.info(f"导出任务 {job.job_id} 完成: {job.rows_written} 行 -> {file_path}")
+        except ExportCancelled:
+            job.state = JOB_CANCELLED
+            logger.info(f"导出任务 {job.job_id} 已取消（已写出 {job.rows_written} 行）")
+        except Exception as e:
+            job.error = str(e)
+            job.state = JOB_FAILED
+            logger.error(f"导出任务 {job.job_id} 失败: {e}")
+        finally:
+            job.finished_at = time.time()
+            if job.state != JOB_DONE and os.path.exists(part_path):
+                try:
+                    os.remove(part_path)
+                except OSError as e:
+                    logger.warning(f"删除未完成的导出文件失败 {part_path}: {e}")
+
+    def _track(self, job: ExportJob, items: Iterable, to_row: Callable[[Any], List[Any]],
+               position: Optional[Callable[[Any], float]] = None):
+        """逐行转换数据，同时累计行数、更新进度并响应取消"""
+        for item in items:
+            if job.cancel_requested:
+                raise ExportCancelled()
+            yield to_row(item)
+            job.rows_written += 1
+            if position and job.rows_written % _PROGRESS_EVERY == 0:
+                job.progress = min(1.0, max(0.0, position(item)))
+
+    def _write_columns(self, job: ExportJob, file_path: str):
+        """导出系统监控数据为列式二进制文件（每个指标一段连续数组，node_name/process_name 字典编码）
+
+        数据直接取自存储层的游标批次，不构造行对象；未指定节点时依次导出所有节点，
+        文件内按节点、再按时间排序。
+        """
+        if job.data_type != '系统监控数据':
+            raise ValueError('列式二进制格式仅支持系统监控数据')
+        params = job.params
+        resolution = params.get('resolution', 'raw')
+        start_time, end_time = params['start_time'], params['end_time']
+        nodes = [params['node_name']] if params.get('node_name') else self._storage.get_system_data_nodes()
+
+        def batches():
+            for node_index, node in enumerate(nodes):
+                for batch in self._storage.iter_system_data_batches(resolution, start_time, end_time, node):
+                    if job.cancel_requested:
+                        raise ExportCancelled()
+                    yield batch
+                    job.rows_written += len(batch)
+                job.progress = (node_index + 1) / len(nodes)
+
+        ExportUtils.write_columns(
+            file_path, _SYSTEM_DATA_COLUMNS, batches(),
+            dictionary_columns=("process_name", "node_name"),
+            metadata={
+                "source": "system_data",
+                "resolution": resolution,
+                "start_ms": TimeUtils.to_epoch_ms(start_time),
+                "end_ms": TimeUtils.to_epoch_ms(end_time),
+                "sort": ["node_name", "timestamp_ms"]
+            }
+        )
+
+    @staticmethod
+    def _time_position(start_time: datetime, end_time: datetime) -> Callable[[Any], float]:
+        """按时间顺序导出时，用当前行的时间在 [start_time, end_time] 中的位置估计进度"""
+        span = (end_time - start_time).total_seconds() or 1.0
+        return lambda ts: (ts - start_time).total_seconds() / span
+
+    def _export_rows(self, job: ExportJob) -> Tuple[List[str], Iterable[List[Any]]]:
+        """返回导出数据的表头和逐行生成的数据"""
+        data_type, params = job.data_type, job.params
+
+        if data_type == '系统监控数据':
+            data = self._storage.iter_system_data_at_resolution(
+                params.get('resolution', 'raw'), params['start_time'], params['end_time']
+            )
+            position = self._time_position(params['start_time'], params['end_time'])
+            headers = ['时间戳', 'CPU使用率(%)', '内存使用率(%)', '磁盘使用率(%)', '发送流量(KB)', '接收流量(KB)', '进程ID', '进程名称', '节点名称']
+            return headers, self._track(job, data, lambda item: [
+                item.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                item.cpu_percent,
+                item.memory_percent,
+                item.disk_percent,
+                item.network_sent / 1024,
+                item.network_recv / 1024,
+                item.process_id,
+                item.process_name,
+                item.node_name
+            ], lambda item: position(item.timestamp))
+
+        if data_type == '测试运行记录':
+            # 按键集分页逐页读取，避免一次性加载全部记录
+            data = self._storage.iter_test_runs(start_time=params['start_time'], end_time=params['end_time'])
+            position = self._time_position(params['start_time'], params['end_time'])
+            headers = ['运行ID', '开始时间', '结束时间', '状态', '总测试数', '通过数', '失败数', '跳过数', '测试路径', '报告路径', '节点名称', '退出码', '执行类型']
+            return headers, self._track(job, data, lambda item: [
+                item.run_id,
+                item.start_time.strftime('%Y-%m-%d %H:%M:%S'),
+                item.end_time.strftime('%Y-%m-%d %H:%M:%S') if item.end_time else '',
+                item.status,
+                item.total_tests,
+                item.passed_tests,
+                item.failed_tests,
+                item.skipped_tests,
+                item.test_path,
+                item.report_path or '',
+                item.node_name,
+                item.exit_code or '',
+                item.execution_type
+            ], lambda item: position(item.start_time))
+
+        if data_type == '测试日志':
+            # 指定运行ID时沿 (run_id, timestamp) 读取该运行（可再按时间范围过滤），否则导出时间范围内所有运行的日志
+            run_id = params.get('run_id')
+            start_time, end_time = params.get('start_time'), params.get('end_time')
+            if run_id:
+                data = self._storage.iter_test_logs_in_range(run_id, start_time, end_time)
+                if start_time and end_time:
+                    time_position = self._time_position(start_time, end_time)
+                    position = lambda item: time_position(item.timestamp)
+                else:
+                    total = self._storage.count_test_logs(run_id) or 1
+                    position = lambda item: job.rows_written / total
+            else:
+                data = self._storage.iter_test_logs_across_runs(start_time, end_time)
+                position = None
+            headers = ['运行ID', '时间戳', '日志级别', '消息']
+            return headers, self._track(job, data, lambda item: [
+                item.run_id,
+                item.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                item.level,
+                item.message
+            ], position)
+
+        if data_type == '机器配置':
+            from app.services.remote_machine_service import remote_machine_service
+            data = remote_machine_service.get_all_machines()
+            headers = ['机器ID', '名称', '主机', '端口', '平台', '用户名', '状态', '描述']
+            return headers, self._track(job, data, lambda item: [
+                item.machine_id,
+                item.name,
+                item.host,
+                item.port,
+                'Linux' if item.platform == 'linux' else 'Windows',
+                item.username,
+                item.status,
+                item.description or ''
+            ])
+
+        raise ValueError(f'不支持的数据类型: {data_type}')
+
+# 创建全局导出服务实例，进程退出时取消未完成的任务
+export_service = ExportService()
+atexit.register(export_service.shutdown)
@@ -0,0 +1,461 @@
+import heapq
+import sqlite3
+import struct
+import threading
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.models import TestLog, TestLogRecord
+from app.utils.time_utils import TimeUtils
+from config.settings import settings
+
+# 日志级别编码（块内每行用 1 字节保存级别），未知级别按 INFO 处理
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+_LEVEL_CODES = {level: code for code, level in enumerate(LOG_LEVELS)}
+
+# 块内每行记录的头部：毫秒时间戳 + 级别编码，后接 UTF-8 消息
+_RECORD_HEADER = struct.Struct('<qB')
+
+def _pack_offsets(offsets: array) -> bytes:
+    """行偏移按小端 uint32 保存，数据库文件可在不同字节序的机器间使用"""
+    return struct.pack(f'<{len(offsets)}I', *offsets)
+
+def _unpack_offsets(data: bytes) -> array:
+    return array('I', struct.unpack(f'<{len(data) // 4}I', data))
+
+def reserve_log_ids(conn: sqlite3.Connection, count: int) -> int:
+    """从 test_logs 的自增序列中预留 count 个连续ID，返回第一个（调用方需已持有写事务）
+
+    逐行存储的日志以 test_logs.id、块内日志以块预留的ID作为全文索引的 rowid，两者不会重复。
+    """
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'test_logs'").fetchone()
+    last_id = max(row[0] if row else 0, conn.execute('SELECT COALESCE(MAX(id), 0) FROM test_logs').fetchone()[0])
+    if row is None:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('test_logs', ?)", (last_id + count,))
+    else:
+        conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'test_logs'", (last_id + count,))
+    return last_id + 1
+
+def level_mask(levels: Iterable[str]) -> int:
+    """将级别集合转换为块的 level_mask 位图"""
+    mask = 0
+    for level in levels:
+        mask |= 1 << _LEVEL_CODES.get(level, _LEVEL_CODES["INFO"])
+    return mask
+
+class _Block:
+    """解压后的日志块：payload 为连续的行记录，offsets[i] 为第 i 行在 payload 中的起始位置
+
+    第 i 行在全文索引中的 rowid 为 first_rowid + i，建块时按 LOG_BLOCK_LINES 预留。
+    """
+    __slots__ = ("block_no", "first_line", "first_rowid", "first_ts", "last_ts", "level_mask", "offsets", "payload")
+
+    def __init__(self, block_no: int, first_line: int, first_rowid: Optional[int] = None):
+        self.block_no = block_no
+        self.first_line = first_line
+        self.first_rowid = first_rowid
+        self.first_ts = None
+        self.last_ts = None
+        self.level_mask = 0
+        self.offsets = array('I')
+        self.payload = bytearray()
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets)
+
+    def append(self, timestamp_ms: int, level: str, message: str):
+        code = _LEVEL_CODES.get(level, _LEVEL_CODES["INFO"])
+        self.offsets.append(len(self.payload))
+        self.payload += _RECORD_HEADER.pack(timestamp_ms, code)
+        self.payload += message.encode('utf-8')
+        if self.first_ts is None:
+            self.first_ts = timestamp_ms
+        self.last_ts = timestamp_ms if self.last_ts is None else max(self.last_ts, timestamp_ms)
+        self.level_mask |= 1 << code
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, int, str]]:
+        """按行号区间（块内下标）解析记录，返回 (时间戳, 级别编码, 消息)"""
+        stop = self.line_count if stop is None else min(stop, self.line_count)
+        payload = self.payload
+        for i in range(start, stop):
+            begin = self.offsets[i]
+            end = self.offsets[i + 1] if i + 1 < self.line_count else len(payload)
+            timestamp_ms, code = _RECORD_HEADER.unpack_from(payload, begin)
+            yield timestamp_ms, code, bytes(payload[begin + _RECORD_HEADER.size:end]).decode('utf-8')
+
+    def copy(self) -> "_Block":
+        block = _Block(self.block_no, self.first_line, self.first_rowid)
+        block.first_ts, block.last_ts, block.level_mask = self.first_ts, self.last_ts, self.level_mask
+        block.offsets = array('I', self.offsets)
+        block.payload = bytearray(self.payload)
+        return block
+
+    def truncate(self, line_count: int):
+        """截断到前 line_count 行（写入事务失败时回滚尾块）"""
+        if line_count >= self.line_count:
+            return
+        end = self.offsets[line_count] if line_count else 0
+        del self.offsets[line_count:]
+        del self.payload[end:]
+        self.first_ts, self.last_ts, self.level_mask = None, None, 0
+        for timestamp_ms, code, _ in self.records():
+            if self.first_ts is None:
+                self.first_ts = timestamp_ms
+            self.last_ts = timestamp_ms if self.last_ts is None else max(self.last_ts, timestamp_ms)
+            self.level_mask |= 1 << code
+
+class LogBlockStore:
+    """压缩块日志存储
+
+    将同一测试运行的连续日志行打包为 zlib 压缩块（test_log_blocks 表），
+    每块记录行偏移索引、首行行号、首末时间戳和级别位图。各测试运行未写满的尾块保存在内存中，
+    写满或测试运行结束（close_run）时才压缩写入，追加日志不会反复解压和重写尾块；
+    读取时按块顺序解压并附上内存中的尾块，可按行号窗口定位到具体块，也可按级别跳过无关块。
+    """
+    def __init__(self, connection_factory: Callable[[], sqlite3.Connection],
+                 read_connection_factory: Optional[Callable[[], sqlite3.Connection]] = None):
+        self._get_connection = connection_factory
+        # 读取使用独立的只读连接，不与写入竞争
+        self._get_read_connection = read_connection_factory or connection_factory
+        # 测试运行ID -> 尚未写入数据库的尾块
+        self._tails: Dict[str, _Block] = {}
+        self._lock = threading.Lock()
+
+    def append(self, logs: List[TestLog],
+               on_written: Optional[Callable[[sqlite3.Connection, List[Tuple[int, TestLog]]], None]] = None):
+        """在单独的写事务中按测试运行追加日志行：先填满内存中的尾块，写满的块压缩写入数据库
+
+        on_written 在同一事务中接收各行的 (全文索引 rowid, 日志)；事务失败时内存中的尾块恢复原状。
+        """
+        by_run: Dict[str, List[TestLog]] = defaultdict(list)
+        for log in logs:
+            by_run[log.run_id].append(log)
+
+        conn = self._get_connection()
+        with self._lock:
+            # 测试运行ID -> (追加前的尾块, 追加前的行数)，用于事务失败时回滚内存状态
+            undo: Dict[str, Tuple[Optional[_Block], int]] = {}
+            try:
+                with conn:
+                    if not conn.in_transaction:
+                        conn.execute('BEGIN IMMEDIATE')
+                    written = []
+                    for run_id, run_logs in by_run.items():
+                        tail = self._tails.get(run_id)
+                        undo[run_id] = (tail, tail.line_count if tail else 0)
+                        written.extend(self._append_run(conn, run_id, run_logs))
+                    if on_written:
+                        on_written(conn, written)
+            except Exception:
+                for run_id, (tail, line_count) in undo.items():
+                    if tail is None:
+                        self._tails.pop(run_id, None)
+                    else:
+                        tail.truncate(line_count)
+                        self._tails[run_id] = tail
+                raise
+
+    def _append_run(self, conn: sqlite3.Connection, run_id: str, logs: List[TestLog]) -> List[Tuple[int, TestLog]]:
+        block = self._tails.get(run_id) or self._next_block(conn, run_id)
+        written = []
+        for log in logs:
+            if self._is_full(block):
+                self._write_block(conn, run_id, block)
+                block = self._new_block(conn, block.block_no + 1, block.first_line + block.line_count)
+            written.append((block.first_rowid + block.line_count, log))
+            block.append(TimeUtils.to_epoch_ms(log.timestamp), log.level, log.message)
+        self._tails[run_id] = block
+        return written
+
+    def close_run(self, run_id: Optional[str] = None):
+        """将测试运行（未指定时为全部）的尾块写入数据库并移出内存，测试运行结束或服务关闭时调用"""
+        conn = self._get_connection()
+        with self._lock:
+            run_ids = list(self._tails) if run_id is None else [run_id]
+            with conn:
+                for item in run_ids:
+                    block = self._tails.get(item)
+                    if block is not None:
+                        self._write_block(conn, item, block)
+            for item in run_ids:
+                self._tails.pop(item, None)
+
+    def discard_run(self, run_id: Optional[str] = None) -> List[Tuple[int, int]]:
+        """丢弃测试运行（未指定时为全部）内存中的尾块，返回其 (first_rowid, line_count) 以便删除全文索引行"""
+        with self._lock:
+            if run_id is None:
+                tails = list(self._tails.values())
+                self._tails.clear()
+            else:
+                tail = self._tails.pop(run_id, None)
+                tails = [tail] if tail is not None else []
+        return [(tail.first_rowid, tail.line_count) for tail in tails if tail.line_count]
+
+    def _tail_snapshot(self, run_id: str) -> Optional[_Block]:
+        """复制测试运行内存中的尾块，供读取时在锁外解析"""
+        with self._lock:
+            tail = self._tails.get(run_id)
+            return tail.copy() if tail is not None and tail.line_count else None
+
+    @staticmethod
+    def _is_full(block: _Block) -> bool:
+        return block.line_count >= settings.LOG_BLOCK_LINES or len(block.payload) >= settings.LOG_BLOCK_MAX_BYTES
+
+    @staticmethod
+    def _new_block(conn: sqlite3.Connection, block_no: int, first_line: int) -> _Block:
+        """创建空块，并为其中的行预留全文索引 rowid"""
+        return _Block(block_no, first_line, reserve_log_ids(conn, settings.LOG_BLOCK_LINES))
+
+    def _next_block(self, conn: sqlite3.Connection, run_id: str) -> _Block:
+        """在测试运行已写入的最后一个块之后创建新块
+
+        已写入数据库的块不再续写（运行结束后迟到的日志另起一块），无需解压旧块。
+        """
+        row = conn.execute('''
+            SELECT block_no, first_line, line_count
+            FROM test_log_blocks
+            WHERE run_id = ?
+            ORDER BY block_no DESC
+            LIMIT 1
+        ''', (run_id,)).fetchone()
+        if row is None:
+            return self._new_block(conn, 0, 0)
+        return self._new_block(conn, row[0] + 1, row[1] + row[2])
+
+    @staticmethod
+    def _write_block(conn: sqlite3.Connection, run_id: str, block: _Block):
+        if not block.line_count:
+            return
+        conn.execute('''
+            INSERT OR REPLACE INTO test_log_blocks
+            (run_id, block_no, first_line, first_rowid, line_count, first_ts, last_ts, level_mask, offsets, payload)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            run_id,
+            block.block_no,
+            block.first_line,
+            block.first_rowid,
+            block.line_count,
+            block.first_ts,
+            block.last_ts,
+            block.level_mask,
+            _pack_offsets(block.offsets),
+            zlib.compress(bytes(block.payload), settings.LOG_BLOCK_COMPRESSION_LEVEL)
+        ))
+
+    def _iter_blocks(self, cursor: sqlite3.Cursor, tail: Optional[_Block]) -> Iterator[_Block]:
+        """依次解码查询到的块，最后返回内存中的尾块"""
+        while True:
+            # 每次只取少量块，流式读取大日志时不会把所有块都载入内存
+            rows = cursor.fetchmany(8)
+            if not rows:
+                break
+            for row in rows:
+                yield self._decode_block(row)
+        if tail is not None:
+            yield tail
+
+    def iter_indexed_lines(self, run_id: str) -> Iterator[Tuple[int, TestLogRecord]]:
+        """按行号顺序读取测试运行已写入的全部日志及其全文索引 rowid（重建索引时使用）"""
+        conn = self._get_read_connection()
+        cursor = conn.execute('''
+            SELECT block_no, first_line, line_count, first_ts, last_ts, level_mask, offsets, payload, first_rowid
+            FROM test_log_blocks
+            WHERE run_id = ?
+            ORDER BY block_no
+        ''', (run_id,))
+        for block in self._iter_blocks(cursor, None):
+            for i, (timestamp_ms, code, message) in enumerate(block.records()):
+                yield block.first_rowid + i, TestLogRecord(run_id, TimeUtils.from_epoch_ms(timestamp_ms), LOG_LEVELS[code], message)
+
+    @staticmethod
+    def _decode_block(row) -> _Block:
+        """解码块查询结果（列顺序同 _write_block，first_rowid 列可省略）"""
+        block = _Block(row[0], row[1], row[8] if len(row) > 8 else None)
+        block.first_ts, block.last_ts, block.level_mask = row[3], row[4], row[5]
+        block.offsets = _unpack_offsets(row[6])
+        block.payload = bytearray(zlib.decompress(row[7]))
+        return block
+
+    def iter_logs(self, run_id: str, start_line: int = 0, count: Optional[int] = None,
+                  levels: Optional[Iterable[str]] = None) -> Iterator[TestLogRecord]:
+        """顺序读取日志：从 start_line 开始最多 count 行（按原始行号计），可按级别过滤"""
+        mask = level_mask(levels) if levels else None
+        stop_line = None if count is None else start_line + count
+        # 先取尾块快照，数据库中只读其之前的块，避免尾块恰好写入时重复返回
+        tail = self._tail_snapshot(run_id)
+        conditions = ["run_id = ?", "first_line + line_count > ?"]
+        params: List = [run_id, start_line]
+        if stop_line is not None:
+            conditions.append("first_line < ?")
+            params.append(stop_line)
+        if mask is not None:
+            conditions.append("(level_mask & ?) != 0")
+            params.append(mask)
+        if tail is not None:
+            conditions.append("block_no < ?")
+            params.append(tail.block_no)
+
+        conn = self._get_read_connection()
+        cursor = conn.execute(f'''
+            SELECT block_no, first_line, line_count, first_ts, last_ts, level_mask, offsets, payload
+            FROM test_log_blocks
+            WHERE {' AND '.join(conditions)}
+            ORDER BY block_no
+        ''', params)
+        for block in self._iter_blocks(cursor, tail):
+            start = max(0, start_line - block.first_line)
+            stop = None if stop_line is None else stop_line - block.first_line
+            for timestamp_ms, code, message in block.records(start, stop):
+                if mask is not None and not (mask >> code) & 1:
+                    continue
+                yield TestLogRecord(run_id, TimeUtils.from_epoch_ms(timestamp_ms), LOG_LEVELS[code], message)
+
+    def iter_logs_in_range(self, run_id: str, start_ms: Optional[int] = None,
+                           end_ms: Optional[int] = None) -> Iterator[TestLogRecord]:
+        """按行号顺序读取时间戳在 [start_ms, end_ms] 内的日志，与该范围不相交的块直接跳过"""
+        tail = self._tail_snapshot(run_id)
+        conditions = ["run_id = ?"]
+        params: List = [run_id]
+        if start_ms is not None:
+            conditions.append("last_ts >= ?")
+            params.append(start_ms)
+        if end_ms is not None:
+            conditions.append("first_ts <= ?")
+            params.append(end_ms)
+        if tail is not None:
+            conditions.append("block_no < ?")
+            params.append(tail.block_no)
+
+        conn = self._get_read_connection()
+        cursor = conn.execute(f'''
+            SELECT block_no, first_line, line_count, first_ts, last_ts, level_mask, offsets, payload
+            FROM test_log_blocks
+            WHERE {' AND '.join(conditions)}
+            ORDER BY block_no
+        ''', params)
+        for block in self._iter_blocks(cursor, tail):
+            for timestamp_ms, code, message in block.records():
+                if start_ms is not None and timestamp_ms < start_ms:
+                    continue
+                if end_ms is not None and timestamp_ms > end_ms:
+                    continue
+                yield TestLogRecord(run_id, TimeUtils.from_epoch_ms(timestamp_ms), LOG_LEVELS[code], message)
+
+    def search_logs(self, text: str, run_id: Optional[str] = None, levels: Optional[Iterable[str]] = None,
+                    start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+                    limit: int = 50) -> List[Tuple[int, str, str, str]]:
+        """逐块解压查找消息中包含 text 的日志，返回时间戳最新的至多 limit 条 (时间戳, 运行ID, 级别, 消息)，按时间倒序
+
+        先查找内存中的尾块，再按 last_ts 倒序读取数据库中的块，已找到 limit 条且剩余块都早于其中最旧的一条时提前结束。
+        """
+        mask = level_mask(levels) if levels else None
+        with self._lock:
+            tails = [
+                (tail_run_id, tail.copy()) for tail_run_id, tail in self._tails.items()
+                if tail.line_count and (not run_id or tail_run_id == run_id)
+            ]
+        conditions = []
+        params: List = []
+        if run_id:
+            conditions.append("run_id = ?")
+            params.append(run_id)
+        if start_ms is not None:
+            conditions.append("last_ts >= ?")
+            params.append(start_ms)
+        if end_ms is not None:
+            conditions.append("first_ts <= ?")
+            params.append(end_ms)
+        if mask is not None:
+            conditions.append("(level_mask & ?) != 0")
+            params.append(mask)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # 小顶堆保存目前最新的 limit 条，序号用于时间戳相同时保持稳定比较
+        found: List[Tuple[int, int, str, str, str]] = []
+        seq = 0
+
+        def scan(block_run_id: str, block: _Block):
+            nonlocal seq
+            for timestamp_ms, code, message in block.records():
+                if text not in message:
+                    continue
+                if mask is not None and not (mask >> code) & 1:
+                    continue
+                if start_ms is not None and timestamp_ms < start_ms:
+                    continue
+                if end_ms is not None and timestamp_ms > end_ms:
+                    continue
+                seq += 1
+                item = (timestamp_ms, seq, block_run_id, LOG_LEVELS[code], message)
+                if len(found) < limit:
+                    heapq.heappush(found, item)
+                elif item[0] > found[0][0]:
+                    heapq.heapreplace(found, item)
+
+        if limit > 0:
+            for tail_run_id, tail in tails:
+                scan(tail_run_id, tail)
+        # 快照之后尾块可能已写满并写入数据库，跳过这些已查找过的块
+        scanned = {(tail_run_id, tail.block_no) for tail_run_id, tail in tails}
+
+        conn = self._get_read_connection()
+        cursor = conn.execute(f'''
+            SELECT run_id, block_no, first_line, line_count, first_ts, last_ts, level_mask, offsets, payload
+            FROM test_log_blocks
+            {where}
+            ORDER BY last_ts DESC
+        ''', params)
+        while limit > 0:
+            rows = cursor.fetchmany(8)
+            if not rows:
+                break
+            if len(found) == limit and rows[0][5] < found[0][0]:
+                break
+            for row in rows:
+                if len(found) == limit and row[5] < found[0][0]:
+                    continue
+                if (row[0], row[1]) in scanned:
+                    continue
+                scan(row[0], self._decode_block(row[1:]))
+        found.sort(reverse=True)
+        return [(timestamp_ms, item_run_id, level, message) for timestamp_ms, _, item_run_id, level, message in found]
+
+    def get_run_ids(self) -> List[str]:
+        """获取有块数据（含内存中的尾块）的所有测试运行ID"""
+        conn = self._get_read_connection()
+        run_ids = {row[0] for row in conn.execute('SELECT DISTINCT run_id FROM test_log_blocks')}
+        with self._lock:
+            run_ids.update(run_id for run_id, tail in self._tails.items() if tail.line_count)
+        return list(run_ids)
+
+    def count_lines(self, run_id: str) -> int:
+        """获取测试运行的日志总行数"""
+        with self._lock:
+            tail = self._tails.get(run_id)
+            if tail is not None and tail.line_count:
+                # 尾块之前的块都已写满，尾块末行的行号即为总行数
+                return tail.first_line + tail.line_count
+        conn = self._get_read_connection()
+        row = conn.execute(
+            'SELECT COALESCE(SUM(line_count), 0) FROM test_log_blocks WHERE run_id = ?', (run_id,)
+        ).fetchone()
+        return row[0]
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取块数量、行数和压缩后大小（内存中的尾块按未压缩大小计）"""
+        conn = self._get_read_connection()
+        row = conn.execute('''
+            SELECT COUNT(*), COALESCE(SUM(line_count), 0), COALESCE(SUM(LENGTH(payload) + LENGTH(offsets)), 0)
+            FROM test_log_blocks
+        ''').fetchone()
+        stats = {"blocks": row[0], "lines": row[1], "stored_bytes": row[2]}
+        with self._lock:
+            for tail in self._tails.values():
+                if tail.line_count:
+                    stats["blocks"] += 1
+                    stats["lines"] += tail.line_count
+                    stats["stored_bytes"] += len(tail.payload) + 4 * tail.line_count
+        return stats
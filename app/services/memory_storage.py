@@ -0,0 +1,606 @@
+import bisect
+import html
+import itertools
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+from app.models import SystemData, SystemDataRollup, ProcessSample, TestResult, TestRun, TestQueueItem, TestLog, SystemDataRecord, TestLogRecord
+from app.services.storage_backend import StorageBackend, ROLLUP_RESOLUTIONS, ROLLUP_METRICS
+from app.utils.time_utils import TimeUtils
+
+def _setup_logger():
+    logger = logging.getLogger('RemoteTestMonitor.MemoryStorage')
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+logger = _setup_logger()
+
+class MemoryStorageService(StorageBackend):
+    """纯内存存储后端
+
+    按主键建立字典索引，按时间排序的数据保存在有序数组中（bisect 插入和范围查找），
+    查询语义与 SQLite 后端保持一致（日志搜索没有相关度，按时间倒序返回）。系统数据和日志以只读行对象保存，读取时直接返回。数据不落盘，进程退出即丢失，
+    适用于单元测试、服务层基准测试以及短期 CI 任务的临时监控模式。
+    """
+    persistent = False
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # 插入序号，用于相同时间戳的记录保持写入顺序
+        self._seq = itertools.count()
+        # node_name -> 有序的 (timestamp_ms, seq) 键及对应的样本
+        self._system_keys: Dict[str, List[Tuple[int, int]]] = {}
+        self._system_rows: Dict[str, List[SystemDataRecord]] = {}
+        # resolution -> node_name -> 有序的时间桶起点 / bucket_start -> 汇总状态
+        self._rollup_keys: Dict[str, Dict[str, List[int]]] = {resolution: {} for resolution in ROLLUP_RESOLUTIONS}
+        self._rollups: Dict[str, Dict[str, Dict[int, Dict[str, Any]]]] = {resolution: {} for resolution in ROLLUP_RESOLUTIONS}
+        # node_name -> 有序的 (timestamp_ms, seq) 键及对应的进程树资源样本
+        self._process_keys: Dict[str, List[Tuple[int, int]]] = {}
+        self._process_rows: Dict[str, List[ProcessSample]] = {}
+        # run_id -> 测试运行记录，以及按 (start_time_ms, run_id) 排序的键
+        self._test_runs: Dict[str, TestRun] = {}
+        self._test_run_keys: List[Tuple[int, str]] = []
+        # run_id -> 测试用例结果；test_id -> 按 (timestamp_ms, seq) 排序的同一用例历史结果
+        self._test_results: Dict[str, List[TestResult]] = {}
+        self._test_case_keys: Dict[str, List[Tuple[int, int]]] = {}
+        self._test_case_rows: Dict[str, List[TestResult]] = {}
+        self._test_queue: Dict[str, TestQueueItem] = {}
+        # run_id -> 按 (timestamp_ms, seq) 排序的日志
+        self._log_keys: Dict[str, List[Tuple[int, int]]] = {}
+        self._log_rows: Dict[str, List[TestLogRecord]] = {}
+        self._remote_machines: Dict[str, Any] = {}
+
+    # ---------- 系统监控数据 ----------
+
+    def save_system_data_batch(self, data_list: List[SystemData]):
+        """批量保存系统监控数据，并增量更新各粒度汇总"""
+        if not data_list:
+            return
+        with self._lock:
+            for data in data_list:
+                timestamp = TimeUtils.to_epoch_ms(data.timestamp)
+                keys = self._system_keys.setdefault(data.node_name, [])
+                key = (timestamp, next(self._seq))
+                index = bisect.bisect_right(keys, key)
+                keys.insert(index, key)
+                self._system_rows.setdefault(data.node_name, []).insert(index, SystemDataRecord(
+                    data.timestamp, data.cpu_percent, data.memory_percent, data.disk_percent, data.network_sent,
+                    data.network_recv, data.process_id, data.process_name, data.node_name
+                ))
+                for resolution, bucket_ms in ROLLUP_RESOLUTIONS.items():
+                    self._merge_rollup(resolution, data, timestamp, (timestamp // bucket_ms) * bucket_ms)
+
+    def _merge_rollup(self, resolution: str, data: SystemData, timestamp: int, bucket_start: int):
+        """将单条样本合并到对应时间桶的汇总状态（与 SQLite 的 UPSERT 语义一致）"""
+        buckets = self._rollups[resolution].setdefault(data.node_name, {})
+        rollup = buckets.get(bucket_start)
+        if rollup is None:
+            bisect.insort(self._rollup_keys[resolution].setdefault(data.node_name, []), bucket_start)
+            buckets[bucket_start] = {"sample_count": 1, "last_timestamp": timestamp, **{
+                metric: [getattr(data, metric)] * 4 for metric in ROLLUP_METRICS
+            }}
+            return
+        rollup["sample_count"] += 1
+        for metric in ROLLUP_METRICS:
+            value = getattr(data, metric)
+            values = rollup[metric]
+            values[0] = min(values[0], value)
+            values[1] = max(values[1], value)
+            values[2] += value
+            if timestamp >= rollup["last_timestamp"]:
+                values[3] = value
+        rollup["last_timestamp"] = max(rollup["last_timestamp"], timestamp)
+
+    def get_system_data(self, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> List[SystemDataRecord]:
+        """获取指定时间范围的系统监控数据"""
+        with self._lock:
+            keys = self._system_keys.get(node_name, [])
+            rows = self._system_rows.get(node_name, [])
+            low = bisect.bisect_left(keys, (TimeUtils.to_epoch_ms(start_time), -1))
+            high = bisect.bisect_right(keys, (TimeUtils.to_epoch_ms(end_time), float('inf')))
+            return rows[low:high]
+
+    def iter_system_data(self, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> Iterator[SystemDataRecord]:
+        """按时间顺序读取指定时间范围的系统监控数据"""
+        yield from self.get_system_data(start_time, end_time, node_name)
+
+    def get_system_data_nodes(self) -> List[str]:
+        """获取有系统监控数据的节点名称（升序）"""
+        with self._lock:
+            return sorted(node for node, keys in self._system_keys.items() if keys)
+
+    def iter_system_data_rollup(self, resolution: str, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> Iterator[SystemDataRollup]:
+        """按时间桶顺序读取指定粒度的系统数据汇总（包含起始时间所在的时间桶）"""
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"不支持的汇总粒度: {resolution}")
+        bucket_ms = ROLLUP_RESOLUTIONS[resolution]
+        start_ms = TimeUtils.to_epoch_ms(start_time)
+
+        with self._lock:
+            keys = self._rollup_keys[resolution].get(node_name, [])
+            buckets = self._rollups[resolution].get(node_name, {})
+            low = bisect.bisect_left(keys, (start_ms // bucket_ms) * bucket_ms)
+            high = bisect.bisect_right(keys, TimeUtils.to_epoch_ms(end_time))
+            snapshot = [
+                (bucket_start, buckets[bucket_start]["sample_count"],
+                 {metric: tuple(buckets[bucket_start][metric]) for metric in ROLLUP_METRICS})
+                for bucket_start in keys[low:high]
+            ]
+        for bucket_start, sample_count, metrics in snapshot:
+            values = {}
+            for metric, (metric_min, metric_max, metric_sum, metric_last) in metrics.items():
+                values[f"{metric}_min"] = metric_min
+                values[f"{metric}_max"] = metric_max
+                values[f"{metric}_avg"] = metric_sum / sample_count
+                values[f"{metric}_last"] = metric_last
+            yield SystemDataRollup(
+                timestamp=TimeUtils.from_epoch_ms(bucket_start),
+                resolution=resolution,
+                node_name=node_name,
+                sample_count=sample_count,
+                **values
+            )
+
+    # ---------- 被监控进程树数据 ----------
+
+    def save_process_samples(self, samples: List[ProcessSample]):
+        """批量保存被监控进程树的资源样本"""
+        with self._lock:
+            for sample in samples:
+                keys = self._process_keys.setdefault(sample.node_name, [])
+                key = (TimeUtils.to_epoch_ms(sample.timestamp), next(self._seq))
+                index = bisect.bisect_right(keys, key)
+                keys.insert(index, key)
+                self._process_rows.setdefault(sample.node_name, []).insert(index, sample.model_copy())
+
+    def get_process_samples(self, start_time: datetime, end_time: datetime, label: Optional[str] = None,
+                            run_id: Optional[str] = None, node_name: str = "localhost") -> List[ProcessSample]:
+        """获取指定时间范围的进程树资源样本（按时间顺序），可按标签或测试运行ID过滤"""
+        with self._lock:
+            keys = self._process_keys.get(node_name, [])
+            rows = self._process_rows.get(node_name, [])
+            low = bisect.bisect_left(keys, (TimeUtils.to_epoch_ms(start_time), -1))
+            high = bisect.bisect_right(keys, (TimeUtils.to_epoch_ms(end_time), float('inf')))
+            return [
+                sample.model_copy() for sample in rows[low:high]
+                if (label is None or sample.label == label) and (run_id is None or sample.run_id == run_id)
+            ]
+
+    def _remove_process_samples(self, predicate):
+        """移除满足条件的进程树资源样本（调用方持有锁）"""
+        for node_name in list(self._process_keys):
+            pairs = [
+                (key, sample)
+                for key, sample in zip(self._process_keys[node_name], self._process_rows[node_name])
+                if not predicate(sample)
+            ]
+            self._process_keys[node_name] = [key for key, _ in pairs]
+            self._process_rows[node_name] = [sample for _, sample in pairs]
+
+    # ---------- 测试运行 ----------
+
+    @staticmethod
+    def _test_run_key(test_run: TestRun) -> Tuple[int, str]:
+        return TimeUtils.to_epoch_ms(test_run.start_time), test_run.run_id
+
+    def save_test_run(self, test_run: TestRun):
+        """保存测试运行数据（存在则整体替换）"""
+        with self._lock:
+            old = self._test_runs.get(test_run.run_id)
+            if old is not None:
+                self._test_run_keys.remove(self._test_run_key(old))
+            bisect.insort(self._test_run_keys, self._test_run_key(test_run))
+            self._test_runs[test_run.run_id] = test_run.model_copy()
+
+    def get_test_run(self, run_id: str) -> Optional[TestRun]:
+        """获取指定测试运行数据（每次返回新的 TestRun 对象）"""
+        with self._lock:
+            test_run = self._test_runs.get(run_id)
+            return test_run.model_copy() if test_run else None
+
+    def increment_test_counters(self, run_id: str, passed: int = 0, failed: int = 0,
+                                skipped: int = 0) -> Optional[TestRun]:
+        """在锁内原子地累加通过/失败/跳过计数，返回更新后的测试运行数据，记录不存在时返回 None"""
+        with self._lock:
+            test_run = self._test_runs.get(run_id)
+            if test_run is None:
+                return None
+            test_run.total_tests = (test_run.passed_tests + test_run.failed_tests + test_run.skipped_tests
+                                    + passed + failed + skipped)
+            test_run.passed_tests += passed
+            test_run.failed_tests += failed
+            test_run.skipped_tests += skipped
+            return test_run.model_copy()
+
+    def get_running_tests(self) -> List[TestRun]:
+        """获取所有正在运行的测试（只返回真正活跃的测试）"""
+        current_time = datetime.now()
+        cutoff_ms = TimeUtils.to_epoch_ms(current_time - timedelta(hours=1))
+        with self._lock:
+            start = bisect.bisect_right(self._test_run_keys, (cutoff_ms, chr(0x10FFFF)))
+            active_tests = [
+                self._test_runs[run_id].model_copy()
+                for _, run_id in reversed(self._test_run_keys[start:])
+                if self._test_runs[run_id].status == 'running'
+                and self._is_active_test(self._test_runs[run_id], current_time)
+            ]
+        logger.debug(f"筛选后的活跃测试数量: {len(active_tests)}")
+        return active_tests
+
+    def get_all_test_runs(self, limit: int = 100) -> List[TestRun]:
+        """获取最近的测试运行记录"""
+        with self._lock:
+            keys = self._test_run_keys[-limit:] if limit > 0 else []
+            return [self._test_runs[run_id].model_copy() for _, run_id in reversed(keys)]
+
+    def get_test_runs_by_time_range(self, start_time: datetime, end_time: datetime) -> List[TestRun]:
+        """根据时间范围获取测试运行记录"""
+        with self._lock:
+            low = bisect.bisect_left(self._test_run_keys, (TimeUtils.to_epoch_ms(start_time), ""))
+            high = bisect.bisect_right(self._test_run_keys, (TimeUtils.to_epoch_ms(end_time), chr(0x10FFFF)))
+            return [self._test_runs[run_id].model_copy() for _, run_id in self._test_run_keys[low:high]]
+
+    def get_test_runs_page(self, page_size: int = 50, cursor: Optional[str] = None,
+                           status: Optional[str] = None, node_name: Optional[str] = None,
+                           execution_type: Optional[str] = None,
+                           start_time: Optional[datetime] = None, end_time: Optional[datetime] = None,
+                           ended_after: Optional[datetime] = None,
+                           descending: bool = True) -> Tuple[List[TestRun], Optional[str]]:
+        """按 (start_time, run_id) 键集分页获取测试运行记录
+
+        返回 (当前页记录, 下一页游标)，没有更多数据时游标为 None。
+        通过二分查找定位游标位置后顺序扫描有序键。
+        """
+        with self._lock:
+            keys = self._test_run_keys
+            low, high = 0, len(keys)
+            if start_time:
+                low = bisect.bisect_left(keys, (TimeUtils.to_epoch_ms(start_time), ""))
+            if end_time:
+                high = bisect.bisect_right(keys, (TimeUtils.to_epoch_ms(end_time), chr(0x10FFFF)))
+            if cursor:
+                position = self._decode_test_run_cursor(cursor)
+                if descending:
+                    high = min(high, bisect.bisect_left(keys, position))
+                else:
+                    low = max(low, bisect.bisect_right(keys, position))
+            indexes = range(high - 1, low - 1, -1) if descending else range(low, high)
+
+            rows = []
+            for index in indexes:
+                test_run = self._test_runs[keys[index][1]]
+                if status and test_run.status != status:
+                    continue
+                if node_name and test_run.node_name != node_name:
+                    continue
+                if execution_type and test_run.execution_type != execution_type:
+                    continue
+                if ended_after and test_run.end_time and test_run.end_time < ended_after:
+                    continue
+                rows.append(test_run.model_copy())
+                # 多取一条用于判断是否还有下一页
+                if len(rows) > page_size:
+                    break
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = self._encode_test_run_cursor(*self._test_run_key(rows[-1]))
+        return rows, next_cursor
+
+    def get_test_run_trend(self, start_time: datetime, end_time: datetime, bucket_seconds: int,
+                           statuses: Tuple[str, ...] = ('completed', 'failed', 'stopped')) -> List[Dict[str, Any]]:
+        """按时间桶聚合测试运行统计
+
+        时间桶从 start_time 起按 bucket_seconds 划分，返回每个桶的运行次数、通过率、
+        失败用例数、失败运行数和平均耗时；没有运行记录的桶对应指标为 None。
+        只统计状态在 statuses 中且有用例的运行。
+        """
+        start_ms = TimeUtils.to_epoch_ms(start_time)
+        end_ms = TimeUtils.to_epoch_ms(end_time)
+        bucket_ms = int(bucket_seconds * 1000)
+
+        buckets: Dict[int, Dict[str, Any]] = {}
+        with self._lock:
+            low = bisect.bisect_left(self._test_run_keys, (start_ms, ""))
+            high = bisect.bisect_left(self._test_run_keys, (end_ms, ""))
+            for run_start, run_id in self._test_run_keys[low:high]:
+                test_run = self._test_runs[run_id]
+                if test_run.status not in statuses or test_run.total_tests <= 0:
+                    continue
+                bucket = buckets.setdefault((run_start - start_ms) // bucket_ms, {
+                    "run_count": 0, "passed_tests": 0, "total_tests": 0, "failed_tests": 0,
+                    "failed_runs": 0, "duration_sum": 0, "duration_count": 0
+                })
+                bucket["run_count"] += 1
+                bucket["passed_tests"] += test_run.passed_tests
+                bucket["total_tests"] += test_run.total_tests
+                bucket["failed_tests"] += test_run.failed_tests
+                bucket["failed_runs"] += test_run.status == 'failed'
+                if test_run.end_time is not None:
+                    bucket["duration_sum"] += TimeUtils.to_epoch_ms(test_run.end_time) - run_start
+                    bucket["duration_count"] += 1
+
+        bucket_count = max(0, -(-(end_ms - start_ms) // bucket_ms))
+        trend = []
+        for index in range(bucket_count):
+            bucket = buckets.get(index)
+            trend.append({
+                "bucket_start": TimeUtils.from_epoch_ms(start_ms + index * bucket_ms),
+                "run_count": bucket["run_count"] if bucket else 0,
+                "pass_rate": round(bucket["passed_tests"] * 100.0 / bucket["total_tests"], 2) if bucket else None,
+                "passed_tests": bucket["passed_tests"] if bucket else 0,
+                "total_tests": bucket["total_tests"] if bucket else 0,
+                "failed_tests": bucket["failed_tests"] if bucket else 0,
+                "failed_runs": bucket["failed_runs"] if bucket else 0,
+                "avg_duration": bucket["duration_sum"] / bucket["duration_count"] / 1000.0
+                if bucket and bucket["duration_count"] else None
+            })
+        return trend
+
+    def delete_test_run(self, run_id: str) -> bool:
+        """删除指定测试运行记录及其日志、结果和进程树资源数据"""
+        with self._lock:
+            self._log_keys.pop(run_id, None)
+            self._log_rows.pop(run_id, None)
+            for test_id in {result.test_id for result in self._test_results.pop(run_id, [])}:
+                self._remove_test_case_results(test_id, run_id)
+            self._remove_process_samples(lambda sample: sample.run_id == run_id)
+            test_run = self._test_runs.pop(run_id, None)
+            if test_run is not None:
+                self._test_run_keys.remove(self._test_run_key(test_run))
+            return True
+
+    def _remove_test_case_results(self, test_id: str, run_id: str):
+        """从用例历史索引中移除指定测试运行的结果"""
+        pairs = [
+            (key, result)
+            for key, result in zip(self._test_case_keys[test_id], self._test_case_rows[test_id])
+            if result.run_id != run_id
+        ]
+        if not pairs:
+            del self._test_case_keys[test_id]
+            del self._test_case_rows[test_id]
+            return
+        self._test_case_keys[test_id] = [key for key, _ in pairs]
+        self._test_case_rows[test_id] = [result for _, result in pairs]
+
+    def delete_all_test_runs(self) -> bool:
+        """删除所有测试运行记录、日志、结果以及与测试运行关联的进程树资源数据"""
+        with self._lock:
+            self._remove_process_samples(lambda sample: sample.run_id is not None)
+            self._log_keys.clear()
+            self._log_rows.clear()
+            self._test_results.clear()
+            self._test_case_keys.clear()
+            self._test_case_rows.clear()
+            self._test_runs.clear()
+            self._test_run_keys.clear()
+            return True
+
+    # ---------- 测试结果与队列 ----------
+
+    def save_test_results(self, results: List[TestResult]):
+        """批量保存测试用例结果"""
+        with self._lock:
+            for result in results:
+                # 运行索引与用例索引共享同一对象，更新耗时/信息时两边同时可见
+                result = result.model_copy()
+                self._test_results.setdefault(result.run_id, []).append(result)
+                keys = self._test_case_keys.setdefault(result.test_id, [])
+                key = (TimeUtils.to_epoch_ms(result.timestamp), next(self._seq))
+                index = bisect.bisect_right(keys, key)
+                keys.insert(index, key)
+                self._test_case_rows.setdefault(result.test_id, []).insert(index, result)
+
+    def update_test_results(self, run_id: str, durations: Optional[Dict[str, float]] = None,
+                            messages: Optional[Dict[str, str]] = None):
+        """按 nodeid 批量更新指定测试运行中用例的耗时和失败信息"""
+        durations = durations or {}
+        messages = messages or {}
+        with self._lock:
+            for result in self._test_results.get(run_id, []):
+                if result.test_id in durations:
+                    result.duration = durations[result.test_id]
+                if result.test_id in messages:
+                    result.message = messages[result.test_id]
+
+    def get_test_case_history(self, test_id: str, limit: int = 100, start_time: Optional[datetime] = None,
+                              end_time: Optional[datetime] = None) -> List[TestResult]:
+        """获取指定用例（nodeid）最近的执行结果和耗时，按时间倒序"""
+        with self._lock:
+            keys = self._test_case_keys.get(test_id, [])
+            rows = self._test_case_rows.get(test_id, [])
+            low, high = 0, len(keys)
+            if start_time:
+                low = bisect.bisect_left(keys, (TimeUtils.to_epoch_ms(start_time), -1))
+            if end_time:
+                high = bisect.bisect_right(keys, (TimeUtils.to_epoch_ms(end_time), float('inf')))
+            window = rows[max(low, high - limit):high] if limit > 0 else []
+            return [result.model_copy() for result in reversed(window)]
+
+    def get_slowest_tests(self, run_id: str, limit: int = 10) -> List[TestResult]:
+        """获取指定测试运行中耗时最长的用例"""
+        with self._lock:
+            results = [result.model_copy() for result in self._test_results.get(run_id, [])]
+        # 与 SQLite 的 ORDER BY duration DESC 一致，尚无实测耗时的用例排在最后
+        return sorted(results, key=lambda result: (result.duration is not None, result.duration or 0.0), reverse=True)[:limit]
+
+    def save_test_queue_item(self, item: TestQueueItem):
+        """保存测试队列项"""
+        with self._lock:
+            if item.queue_id in self._test_queue:
+                raise ValueError(f"测试队列项已存在: {item.queue_id}")
+            self._test_queue[item.queue_id] = item.model_copy()
+
+    def update_test_queue_item(self, queue_id: str, status: str):
+        """更新测试队列项状态"""
+        with self._lock:
+            item = self._test_queue.get(queue_id)
+            if item is not None:
+                item.status = status
+
+    def get_test_queue(self) -> List[TestQueueItem]:
+        """获取测试队列（按优先级降序、创建时间升序）"""
+        with self._lock:
+            items = [item.model_copy() for item in self._test_queue.values()]
+        return sorted(items, key=lambda item: (-item.priority, item.created_at))
+
+    # ---------- 测试日志 ----------
+
+    def save_test_logs(self, logs: List[TestLog]):
+        """批量保存测试日志"""
+        if not logs:
+            return
+        with self._lock:
+            for log in logs:
+                keys = self._log_keys.setdefault(log.run_id, [])
+                key = (TimeUtils.to_epoch_ms(log.timestamp), next(self._seq))
+                index = bisect.bisect_right(keys, key)
+                keys.insert(index, key)
+                self._log_rows.setdefault(log.run_id, []).insert(index, TestLogRecord(log.run_id, log.timestamp, log.level, log.message))
+
+    def iter_test_logs(self, run_id: str, start_line: int = 0, count: Optional[int] = None,
+                       levels: Optional[List[str]] = None) -> Iterator[TestLogRecord]:
+        """按行号顺序读取指定测试运行的日志（按级别过滤在行号窗口内进行）"""
+        with self._lock:
+            rows = self._log_rows.get(run_id, [])
+            window = rows[start_line:] if count is None else rows[start_line:start_line + count]
+        for log in window:
+            if levels and log.level not in levels:
+                continue
+            yield log
+
+    def iter_test_logs_in_range(self, run_id: str, start_time: Optional[datetime] = None,
+                                end_time: Optional[datetime] = None) -> Iterator[TestLogRecord]:
+        """按时间顺序读取指定测试运行在时间范围内的日志（在有序键数组上二分定位）"""
+        with self._lock:
+            keys = self._log_keys.get(run_id, [])
+            lo = 0 if start_time is None else bisect.bisect_left(keys, (TimeUtils.to_epoch_ms(start_time),))
+            hi = len(keys) if end_time is None else bisect.bisect_left(keys, (TimeUtils.to_epoch_ms(end_time) + 1,))
+            window = self._log_rows.get(run_id, [])[lo:hi]
+        yield from window
+
+    def count_test_logs(self, run_id: str) -> int:
+        """获取指定测试运行的日志行数"""
+        with self._lock:
+            return len(self._log_rows.get(run_id, []))
+
+    def search_test_logs(self, query: str, run_id: Optional[str] = None, levels: Optional[List[str]] = None,
+                         start_time: Optional[datetime] = None, end_time: Optional[datetime] = None,
+                         limit: int = 50, offset: int = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """按子串匹配搜索测试日志，按时间倒序返回
+
+        返回 (结果列表, 是否还有更多结果)，结果字段与 SQLite 后端相同。匹配规则与 SQLite 后端的 trigram 分词一致：
+        3 个字符及以上的关键字不区分大小写，不足 3 个字符时按子串扫描、区分大小写。
+        内存后端没有相关度，结果始终按时间倒序（SQLite 后端的全文检索按相关度排序），也不受 LOG_SEARCH_ENABLED 影响。
+        """
+        query = query.strip()
+        if not query:
+            return [], False
+        case_sensitive = len(query) < 3
+        needle = query if case_sensitive else query.lower()
+        start_ms = TimeUtils.to_epoch_ms(start_time)
+        end_ms = TimeUtils.to_epoch_ms(end_time)
+
+        with self._lock:
+            run_ids = [run_id] if run_id else list(self._log_rows)
+            candidates = [
+                (key, log)
+                for current_run in run_ids
+                for key, log in zip(self._log_keys.get(current_run, []), self._log_rows.get(current_run, []))
+            ]
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        matches = []
+        for (timestamp, _), log in candidates:
+            if levels and log.level not in levels:
+                continue
+            if start_ms is not None and timestamp < start_ms:
+                continue
+            if end_ms is not None and timestamp > end_ms:
+                continue
+            if needle not in (log.message if case_sensitive else log.message.lower()):
+                continue
+            matches.append(log)
+            if len(matches) > offset + limit:
+                break
+
+        results = [
+            {
+                "run_id": log.run_id,
+                "timestamp": log.timestamp,
+                "level": log.level,
+                "message": log.message,
+                "snippet": self._highlight(log.message, needle, case_sensitive)
+            }
+            for log in matches[offset:offset + limit]
+        ]
+        return results, len(matches) > offset + limit
+
+    @staticmethod
+    def _highlight(message: str, needle: str, case_sensitive: bool = False) -> str:
+        """HTML 转义整行日志，并用 <mark> 标记所有命中位置"""
+        haystack = message if case_sensitive else message.lower()
+        parts = []
+        position = 0
+        while True:
+            index = haystack.find(needle, position)
+            if index < 0:
+                break
+            parts.append(html.escape(message[position:index]))
+            parts.append(f"<mark>{html.escape(message[index:index + len(needle)])}</mark>")
+            position = index + len(needle)
+        parts.append(html.escape(message[position:]))
+        return ''.join(parts)
+
+    def delete_test_logs(self, run_id: str) -> bool:
+        """删除指定测试运行的所有日志"""
+        with self._lock:
+            self._log_keys.pop(run_id, None)
+            self._log_rows.pop(run_id, None)
+            return True
+
+    # ---------- 远程机器 ----------
+
+    def save_remote_machine(self, machine) -> bool:
+        """保存远程机器配置"""
+        with self._lock:
+            self._remote_machines[machine.machine_id] = machine.model_copy()
+            return True
+
+    def get_remote_machine(self, machine_id: str):
+        """获取指定远程机器配置"""
+        with self._lock:
+            machine = self._remote_machines.get(machine_id)
+            return machine.model_copy() if machine else None
+
+    def get_all_remote_machines(self) -> List:
+        """获取所有远程机器配置（按名称排序）"""
+        with self._lock:
+            machines = [machine.model_copy() for machine in self._remote_machines.values()]
+        return sorted(machines, key=lambda machine: machine.name)
+
+    def delete_remote_machine(self, machine_id: str) -> bool:
+        """删除远程机器配置"""
+        with self._lock:
+            self._remote_machines.pop(machine_id, None)
+            return True
+
+    def check_machine_exists(self, host: str, port: int, username: str) -> bool:
+        """检查机器配置是否已存在"""
+        with self._lock:
+            return any(
+                machine.host == host and machine.port == port and machine.username == username
+                for machine in self._remote_machines.values()
+            )
+
+    def update_machine_status(self, machine_id: str, status: str) -> bool:
+        """更新机器状态"""
+        with self._lock:
+            machine = self._remote_machines.get(machine_id)
+            if machine is not None:
+                machine.status = status
+                machine.updated_at = datetime.now().isoformat()
+            return True
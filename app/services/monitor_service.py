@@ -1,88 +1,185 @@
 import psutil
 import time
 import threading
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, Optional
-from app.models import SystemData
-from app.services.storage_service import storage_service
+from typing import Dict, Any, List, Optional
+from app.models import SystemData, ProcessSample
+from app.services.sample_dispatcher import SampleDispatcher
+from app.services.storage_writer import storage_writer
 from app.utils.process_utils import ProcessUtils
+from app.utils.procfs_collector import ProcfsSystemCollector, procfs_enabled
 from config.settings import settings
 
+class _WatchedProcess:
+    """被监控的进程树：跟踪器、标签以及最近一次采样结果"""
+    def __init__(self, pid: int, label: str, run_id: Optional[str]):
+        self.pid = pid
+        self.label = label
+        self.run_id = run_id
+        self.tracker = ProcessUtils.create_tree_tracker(pid)
+        self.latest: Optional[ProcessSample] = None
+
 class MonitorService:
     def __init__(self):
         self._monitoring = False
         self._interval = settings.MONITOR_INTERVAL
         self._thread = None
-        self._target_process_id = None
-        self._system_data_callbacks = []
+        self._stop_event = threading.Event()
+        # 被监控的进程树：标签 -> 进程树，每个进程树在同一采样周期内采样并形成独立的时间序列
+        self._watched: Dict[str, _WatchedProcess] = {}
+        self._watch_lock = threading.Lock()
+        # 高频样本 (monotonic 时间, 样本) 只保存在内存环形缓冲区，按 MONITOR_PERSIST_INTERVAL 汇总后才落库
+        self._recent_samples: deque = deque(maxlen=settings.MONITOR_HIGHRES_BUFFER_SIZE)
+        self._window: Optional[Dict[str, Any]] = None
+        self._ticks = 0
+        self._missed_ticks = 0
+        self._max_tick_delay = 0.0
+        # Linux 上通过预先打开的 /proc 文件采集系统级资源，其他平台使用 psutil
+        self._system_collector = ProcfsSystemCollector() if procfs_enabled() else None
+        # 回调由单个常驻分发线程投递，采样线程只做 O(1) 的发布
+        self._dispatcher = SampleDispatcher(name="MonitorCallbacks")
     
     def start_monitoring(self, process_id: Optional[int] = None):
-        """启动监控服务"""
+        """启动监控服务，指定 process_id 时同时监控该进程树"""
+        if process_id:
+            self.watch_process(process_id)
         if not self._monitoring:
             self._monitoring = True
-            self._target_process_id = process_id
+            self._stop_event.clear()
             self._thread = threading.Thread(target=self._monitor_loop, daemon=True)
             self._thread.start()
     
     def stop_monitoring(self):
         """停止监控服务"""
         self._monitoring = False
+        self._stop_event.set()
         if self._thread:
             self._thread.join(timeout=5.0)
             self._thread = None
     
-    def set_interval(self, interval: int):
-        """设置监控频率（秒）"""
+    def set_interval(self, interval: float):
+        """设置监控频率（秒，最小可到 MIN_MONITOR_INTERVAL，如 0.1）"""
         if settings.MIN_MONITOR_INTERVAL <= interval <= settings.MAX_MONITOR_INTERVAL:
             self._interval = interval
     
-    def get_interval(self) -> int:
+    def get_interval(self) -> float:
         """获取当前监控频率"""
         return self._interval
     
-    def register_system_data_callback(self, callback):
-        """注册系统数据回调函数"""
-        if callback not in self._system_data_callbacks:
-            self._system_data_callbacks.append(callback)
+    def register_system_data_callback(self, callback, policy: Optional[str] = None):
+        """注册系统数据回调函数
+        
+        policy 为回调积压时的溢出策略："drop_oldest" 依次投递、丢弃已被覆盖的旧样本，
+        "latest" 只投递最新样本；未指定时使用 settings.MONITOR_CALLBACK_OVERFLOW。
+        """
+        self._dispatcher.subscribe(callback, policy)
     
     def unregister_system_data_callback(self, callback):
         """注销系统数据回调函数"""
-        if callback in self._system_data_callbacks:
-            self._system_data_callbacks.remove(callback)
+        self._dispatcher.unsubscribe(callback)
+    
+    def get_callback_stats(self) -> Dict[str, Any]:
+        """获取回调分发统计（各回调的积压、丢弃样本数和投递延迟）"""
+        return self._dispatcher.get_stats()
+    
+    def get_recent_samples(self, seconds: Optional[float] = None) -> List[SystemData]:
+        """获取内存缓冲区中的高频样本（按时间顺序），seconds 指定时只返回最近这段时间的样本"""
+        samples = list(self._recent_samples)
+        if seconds is not None:
+            cutoff = time.monotonic() - seconds
+            samples = [item for item in samples if item[0] >= cutoff]
+        return [sample for _, sample in samples]
+    
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """获取调度统计：已执行周期数、错过的周期数和最大启动延迟（秒）"""
+        return {
+            "interval": self._interval,
+            "ticks": self._ticks,
+            "missed_ticks": self._missed_ticks,
+            "max_tick_delay": self._max_tick_delay,
+            "buffered_samples": len(self._recent_samples)
+        }
     
     def _monitor_loop(self):
-        """监控循环"""
+        """监控循环
+        
+        基于 time.monotonic() 的固定相位调度：第 n 个周期在 起点 + n * 间隔 时刻开始，
+        采样耗时不会累积成漂移；采样超时错过的周期直接跳过并计入 missed_ticks，
+        不会为了追赶而连续采样。
+        """
+        next_tick = time.monotonic()
         while self._monitoring:
-            start_time = time.time()
-            
+            delay = time.monotonic() - next_tick
+            self._max_tick_delay = max(self._max_tick_delay, delay)
             try:
-                # 收集系统数据
-                system_data = self._collect_system_data()
-                
-                # 保存到数据库（在单独的线程中执行，避免阻塞）
-                threading.Thread(target=lambda: storage_service.save_system_data(system_data), daemon=True).start()
-                
-                # 触发回调（在单独的线程池中执行，避免阻塞）
-                if self._system_data_callbacks:
-                    def execute_callbacks():
-                        for callback in self._system_data_callbacks:
-                            try:
-                                callback(system_data)
-                            except Exception as e:
-                                print(f"Callback error: {e}")
-                    
-                    # 使用单独的线程执行回调，避免阻塞监控循环
-                    threading.Thread(target=execute_callbacks, daemon=True).start()
+                self._sample(next_tick)
             except Exception as e:
                 print(f"Monitor loop error: {e}")
+            self._ticks += 1
             
-            # 等待下一个监控周期
-            elapsed_time = time.time() - start_time
-            sleep_time = max(0, self._interval - elapsed_time)
-            time.sleep(sleep_time)
+            # 计算下一个周期的开始时刻，跳过已经错过的周期
+            interval = self._interval
+            next_tick += interval
+            now = time.monotonic()
+            if now >= next_tick:
+                missed = int((now - next_tick) // interval) + 1
+                self._missed_ticks += missed
+                next_tick += missed * interval
+            self._stop_event.wait(next_tick - now)
+    
+    def _sample(self, tick_time: float):
+        """采集一个高频样本；每满 MONITOR_PERSIST_INTERVAL 将窗口汇总为一条数据落库并通知回调
+        
+        窗口按计划的周期时刻 tick_time 计算，不受单次采样启动延迟的影响。
+        """
+        system_data = self._collect_system_data()
+        self._recent_samples.append((time.monotonic(), system_data))
+        process_samples = self._collect_process_samples(system_data.timestamp)
+        
+        window = self._window
+        if window is None:
+            window = self._window = {"start": tick_time, "sample": system_data, "processes": {}}
+        else:
+            # 窗口内的使用率取峰值，短时突发不会被平均掉；网络计数和进程信息取最新值
+            peak = window["sample"]
+            window["sample"] = system_data.model_copy(update={
+                "cpu_percent": max(peak.cpu_percent, system_data.cpu_percent),
+                "memory_percent": max(peak.memory_percent, system_data.memory_percent),
+                "disk_percent": max(peak.disk_percent, system_data.disk_percent)
+            })
+        
+        # 各进程树同样按窗口取峰值，窗口内已结束的进程树保留结束前的数据
+        processes = window["processes"]
+        for sample in process_samples:
+            peak = processes.get(sample.label)
+            if peak is not None and peak.pid == sample.pid:
+                sample = sample.model_copy(update={
+                    "cpu_percent": max(peak.cpu_percent, sample.cpu_percent),
+                    "memory_percent": max(peak.memory_percent, sample.memory_percent)
+                })
+            processes[sample.label] = sample
+        
+        # 采样间隔不小于落库间隔时每个样本都落库，与原有行为一致
+        if tick_time - window["start"] + 1e-6 < settings.MONITOR_PERSIST_INTERVAL - self._interval:
+            return
+        self._window = None
+        persisted = window["sample"]
+        
+        # 提交到批量写入队列，由写入线程统一落库
+        storage_writer.enqueue_system_data(persisted)
+        for sample in processes.values():
+            storage_writer.enqueue_process_sample(sample)
+        
+        # 发布给回调分发线程，不阻塞监控循环
+        if self._dispatcher.has_subscribers():
+            self._dispatcher.publish(persisted)
     
     def _collect_system_data(self) -> SystemData:
         """收集系统数据"""
+        if self._system_collector is not None:
+            return SystemData(timestamp=datetime.now(), **self._system_collector.sample())
+        
         # 获取系统级资源使用情况（使用interval=0提高效率，返回自上次调用以来的平均值）
         cpu_percent = psutil.cpu_percent(interval=0)
         memory = psutil.virtual_memory()
@@ -91,39 +188,43 @@ class MonitorService:
         # 获取网络统计信息
         net_io = psutil.net_io_counters()
         
-        process_id = None
-        process_name = None
-        
-        # 如果指定了目标进程，获取其资源使用情况
-        if self._target_process_id:
-            process_info = ProcessUtils.get_process_info(self._target_process_id)
-            if process_info:
-                process_id = self._target_process_id
-                process_name = process_info["name"]
-                
-                # 计算进程及其子进程的总资源使用
-                process_resources = ProcessUtils.calculate_total_resource_usage(self._target_process_id)
-                cpu_percent = process_resources["total_cpu"]
-                memory_percent = process_resources["total_memory"]
-            else:
-                # 进程不存在，重置目标进程ID
-                self._target_process_id = None
-                memory_percent = memory.percent
-        else:
-            # 使用系统级资源
-            memory_percent = memory.percent
-        
+        # 系统数据始终为系统级资源，被监控进程树的数据单独记录为 ProcessSample
         return SystemData(
             timestamp=datetime.now(),
             cpu_percent=cpu_percent,
-            memory_percent=memory_percent,
+            memory_percent=memory.percent,
             disk_percent=disk.percent,
             network_sent=net_io.bytes_sent,
-            network_recv=net_io.bytes_recv,
-            process_id=process_id,
-            process_name=process_name
+            network_recv=net_io.bytes_recv
         )
     
+    def _collect_process_samples(self, timestamp: datetime) -> List[ProcessSample]:
+        """对所有被监控的进程树各采样一次，已结束的进程树自动移出监控列表"""
+        with self._watch_lock:
+            watched = list(self._watched.values())
+        
+        samples = []
+        for process in watched:
+            # 计算进程及其子进程的总资源使用
+            process_resources = process.tracker.sample()
+            if process_resources is None:
+                with self._watch_lock:
+                    if self._watched.get(process.label) is process:
+                        del self._watched[process.label]
+                continue
+            process.latest = ProcessSample(
+                timestamp=timestamp,
+                label=process.label,
+                run_id=process.run_id,
+                pid=process.pid,
+                process_name=process_resources["name"],
+                cpu_percent=process_resources["total_cpu"],
+                memory_percent=process_resources["total_memory"],
+                process_count=process_resources["process_count"]
+            )
+            samples.append(process.latest)
+        return samples
+    
     def get_current_system_data(self) -> SystemData:
         """获取当前系统数据"""
         return self._collect_system_data()
@@ -132,15 +233,54 @@ class MonitorService:
         """获取特定进程及其子进程的资源使用情况"""
         return ProcessUtils.calculate_total_resource_usage(pid)
     
-    def monitor_external_process(self, pid: int):
-        """开始监控外部进程"""
-        self._target_process_id = pid
+    def watch_process(self, pid: int, label: Optional[str] = None, run_id: Optional[str] = None) -> str:
+        """将进程树加入监控列表，返回其标签
+        
+        标签默认为 run_id，未指定 run_id 时为 "pid-<pid>"；相同标签的进程树会被替换。
+        进程结束后自动移出监控列表。
+        """
+        label = label or run_id or f"pid-{pid}"
+        with self._watch_lock:
+            self._watched[label] = _WatchedProcess(pid, label, run_id)
+        return label
+    
+    def unwatch_process(self, label: str) -> bool:
+        """将进程树移出监控列表"""
+        with self._watch_lock:
+            return self._watched.pop(label, None) is not None
+    
+    def get_watched_processes(self) -> List[Dict[str, Any]]:
+        """获取被监控的进程树及其最近一次采样结果"""
+        with self._watch_lock:
+            watched = list(self._watched.values())
+        result = []
+        for process in watched:
+            latest = process.latest
+            result.append({
+                "label": process.label,
+                "run_id": process.run_id,
+                "pid": process.pid,
+                "process_name": latest.process_name if latest else None,
+                "cpu_percent": latest.cpu_percent if latest else None,
+                "memory_percent": latest.memory_percent if latest else None,
+                "process_count": latest.process_count if latest else None
+            })
+        return result
+    
+    def monitor_external_process(self, pid: int, label: Optional[str] = None, run_id: Optional[str] = None) -> str:
+        """开始监控外部进程树（可同时监控多个），返回其标签"""
+        label = self.watch_process(pid, label, run_id)
         if not self._monitoring:
-            self.start_monitoring(pid)
+            self.start_monitoring()
+        return label
     
-    def stop_monitoring_process(self):
-        """停止监控特定进程，恢复系统级监控"""
-        self._target_process_id = None
+    def stop_monitoring_process(self, label: Optional[str] = None):
+        """停止监控指定标签的进程树，未指定标签时停止监控所有进程树，系统级监控不受影响"""
+        if label is not None:
+            self.unwatch_process(label)
+            return
+        with self._watch_lock:
+            self._watched.clear()
 
 # 创建全局监控服务实例
 monitor_service = MonitorService()
@@ -1,3 +1,4 @@
+import re
 import uuid
 import logging
 import asyncio
@@ -15,6 +16,20 @@ def _setup_logger():
 
 logger = _setup_logger()
 
+# 旧版本 pytest 输出 "This is pytest version 5.4.3, ..."，新版本输出 "pytest 7.4.0"
+_PYTEST_VERSION = re.compile(r'pytest (?:version )?(\d+)\.(\d+)')
+
+def pytest_duration_args(version_output: str) -> str:
+    """按远程 `pytest --version` 的输出生成耗时参数
+
+    --durations-min 需要 pytest 6.2 及以上，旧版本只能输出 0.005 秒以上的耗时，未输出耗时的用例不回填。
+    --durations=0 会为每个用例的各阶段各输出一行耗时，这些行也会存入测试日志。
+    """
+    match = _PYTEST_VERSION.search(version_output)
+    if match and (int(match.group(1)), int(match.group(2))) >= (6, 2):
+        return "--durations=0 --durations-min=0"
+    return "--durations=0"
+
 class RemoteMachineService:
     def __init__(self):
         self._active_connections: Dict[str, Any] = {}
@@ -461,7 +476,9 @@ if (Test-Path -LiteralPath $path) {{
             ssh.connect(**connect_kwargs)
             
             remote_report_path = f"/tmp/{run_id}_report.html"
-            command = f'cd /tmp && python -m pytest {test_path} -v --tb=short --html={remote_report_path} --self-contained-html 2>&1'
+            _, version_stdout, _ = ssh.exec_command('cd /tmp && python -m pytest --version 2>&1', timeout=30)
+            duration_args = pytest_duration_args(version_stdout.read().decode('utf-8', errors='replace'))
+            command = f'cd /tmp && python -m pytest {test_path} -v --tb=short {duration_args} --html={remote_report_path} --self-contained-html 2>&1'
             
             stdin, stdout, stderr = ssh.exec_command(command, timeout=600)
             
@@ -478,8 +495,8 @@ if (Test-Path -LiteralPath $path) {{
                                 level="INFO",
                                 message=l
                             )
-                            from app.services.storage_service import storage_service
-                            storage_service.save_test_log(test_log)
+                            from app.services.storage_writer import storage_writer
+                            storage_writer.enqueue_test_log(test_log)
                             
                             # 触发日志回调
                             test_service._trigger_log_callbacks(test_log)
@@ -503,8 +520,8 @@ if (Test-Path -LiteralPath $path) {{
                                 level="ERROR",
                                 message=l
                             )
-                            from app.services.storage_service import storage_service
-                            storage_service.save_test_log(test_log)
+                            from app.services.storage_writer import storage_writer
+                            storage_writer.enqueue_test_log(test_log)
                             
                             # 触发日志回调
                             test_service._trigger_log_callbacks(test_log)
@@ -525,8 +542,8 @@ if (Test-Path -LiteralPath $path) {{
                             level="INFO",
                             message=l
                         )
-                        from app.services.storage_service import storage_service
-                        storage_service.save_test_log(test_log)
+                        from app.services.storage_writer import storage_writer
+                        storage_writer.enqueue_test_log(test_log)
                         test_service._trigger_log_callbacks(test_log)
                         
                         # 解析测试结果行，更新统计计数
@@ -547,8 +564,8 @@ if (Test-Path -LiteralPath $path) {{
                             level="ERROR",
                             message=l
                         )
-                        from app.services.storage_service import storage_service
-                        storage_service.save_test_log(test_log)
+                        from app.services.storage_writer import storage_writer
+                        storage_writer.enqueue_test_log(test_log)
                         test_service._trigger_log_callbacks(test_log)
                         logger.warning(f"[Remote][{run_id}] Linux测试错误: {l[:50]}...")
             
@@ -655,7 +672,9 @@ if (Test-Path -LiteralPath $path) {{
             
             # 命令行使用%TEMP%语法
             cmd_remote_report_path = fr"%TEMP%\{run_id}_report.html"
-            command = f'cd /d %TEMP% && python -m pytest {test_path} -v --tb=short --html={cmd_remote_report_path} --self-contained-html' 
+            version_result = session.run_cmd('cmd.exe', ['/c', 'cd /d %TEMP% && python -m pytest --version 2>&1'])
+            duration_args = pytest_duration_args(version_result.std_out.decode('gbk', errors='replace'))
+            command = f'cd /d %TEMP% && python -m pytest {test_path} -v --tb=short {duration_args} --html={cmd_remote_report_path} --self-contained-html' 
             # PowerShell使用$env:TEMP语法
             powershell_remote_path = fr"$env:TEMP\{run_id}_report.html"
             
@@ -673,8 +692,8 @@ if (Test-Path -LiteralPath $path) {{
                         level="INFO",
                         message=line.strip()
                     )
-                    from app.services.storage_service import storage_service
-                    storage_service.save_test_log(test_log)
+                    from app.services.storage_writer import storage_writer
+                    storage_writer.enqueue_test_log(test_log)
                     
                     # 触发日志回调
                     test_service._trigger_log_callbacks(test_log)
@@ -701,8 +720,8 @@ if (Test-Path -LiteralPath $path) {{
                             level="ERROR",
                             message=line.strip()
                         )
-                        from app.services.storage_service import storage_service
-                        storage_service.save_test_log(test_log)
+                        from app.services.storage_writer import storage_writer
+                        storage_writer.enqueue_test_log(test_log)
                         
                         # 触发日志回调
                         test_service._trigger_log_callbacks(test_log)
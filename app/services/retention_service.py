@@ -0,0 +1,162 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from app.services.log_block_store import level_mask
+from app.services.storage_service import storage_service
+from config.settings import settings
+
+def _setup_logger():
+    logger = logging.getLogger('RemoteTestMonitor.RetentionService')
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+logger = _setup_logger()
+
+class RetentionPolicy:
+    """单条保留策略：删除 table 中 time_column 早于 days 天前、且满足 condition 的行"""
+    def __init__(self, name: str, table: str, time_column: str, days: int,
+                 condition: str = "", params: tuple = (), key_columns: str = "rowid"):
+        self.name = name
+        self.table = table
+        self.time_column = time_column
+        self.days = days
+        self.condition = condition
+        self.params = params
+        self.key_columns = key_columns
+
+def default_policies() -> List[RetentionPolicy]:
+    """根据配置生成默认保留策略（天数为 0 的策略表示永久保留）"""
+    rollup_key = "node_name, bucket_start"
+    # 压缩块按块内出现的最高日志级别决定保留天数
+    error_mask = level_mask(("ERROR", "CRITICAL"))
+    warning_mask = level_mask(("WARNING",))
+    return [
+        RetentionPolicy("system_data", "system_data", "timestamp", settings.RETENTION_SYSTEM_DATA_DAYS),
+        RetentionPolicy("process_samples", "process_samples", "timestamp", settings.RETENTION_SYSTEM_DATA_DAYS),
+        RetentionPolicy("system_data_1m", "system_data_1m", "bucket_start",
+                        settings.RETENTION_ROLLUP_1M_DAYS, key_columns=rollup_key),
+        RetentionPolicy("system_data_1h", "system_data_1h", "bucket_start",
+                        settings.RETENTION_ROLLUP_1H_DAYS, key_columns=rollup_key),
+        RetentionPolicy("system_data_1d", "system_data_1d", "bucket_start",
+                        settings.RETENTION_ROLLUP_1D_DAYS, key_columns=rollup_key),
+        RetentionPolicy("test_logs_error", "test_logs", "timestamp", settings.RETENTION_TEST_LOG_ERROR_DAYS,
+                        condition="level = 'ERROR'"),
+        RetentionPolicy("test_logs_warning", "test_logs", "timestamp", settings.RETENTION_TEST_LOG_WARNING_DAYS,
+                        condition="level = 'WARNING'"),
+        RetentionPolicy("test_logs_info", "test_logs", "timestamp", settings.RETENTION_TEST_LOG_INFO_DAYS,
+                        condition="level NOT IN ('ERROR', 'WARNING')"),
+        RetentionPolicy("test_log_blocks_error", "test_log_blocks", "last_ts", settings.RETENTION_TEST_LOG_ERROR_DAYS,
+                        condition=f"level_mask & {error_mask} != 0"),
+        RetentionPolicy("test_log_blocks_warning", "test_log_blocks", "last_ts", settings.RETENTION_TEST_LOG_WARNING_DAYS,
+                        condition=f"level_mask & {error_mask} = 0 AND level_mask & {warning_mask} != 0"),
+        RetentionPolicy("test_log_blocks_info", "test_log_blocks", "last_ts", settings.RETENTION_TEST_LOG_INFO_DAYS,
+                        condition=f"level_mask & {error_mask | warning_mask} = 0"),
+        # 仅清理已结束的队列记录，排队中和运行中的任务不受影响
+        RetentionPolicy("test_queue", "test_queue", "created_at", settings.RETENTION_TEST_QUEUE_DAYS,
+                        condition="status NOT IN ('queued', 'running')"),
+    ]
+
+class RetentionService:
+    """数据保留服务
+
+    后台定期按策略分批删除过期数据，随后执行增量 VACUUM 回收空闲页，
+    使数据库大小和查询延迟在长期运行的主机上保持有界。
+    """
+    def __init__(self, storage=None, policies: Optional[List[RetentionPolicy]] = None):
+        self._storage = storage or storage_service
+        self._policies = policies if policies is not None else default_policies()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._run_lock = threading.Lock()
+        self._last_report: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        """启动后台清理线程（未启用数据保留、存储后端不持久化或线程已运行时不做任何事）"""
+        if not settings.RETENTION_ENABLED or not self._storage.persistent:
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._retention_loop, name="RetentionService", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """停止后台清理线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def get_policies(self) -> List[RetentionPolicy]:
+        """获取当前保留策略"""
+        return list(self._policies)
+
+    def get_last_report(self) -> Optional[Dict[str, Any]]:
+        """获取最近一次清理的报告"""
+        return self._last_report
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """执行一次清理，返回各策略删除的行数和回收的空间"""
+        with self._run_lock:
+            now = now or datetime.now()
+            started = datetime.now()
+            size_before = self._storage.get_database_size()
+
+            deleted: Dict[str, int] = {}
+            for policy in self._policies:
+                if policy.days <= 0:
+                    continue
+                if self._stop_event.is_set():
+                    break
+                try:
+                    deleted[policy.name] = self._storage.delete_expired_rows(
+                        policy.table,
+                        policy.time_column,
+                        now - timedelta(days=policy.days),
+                        condition=policy.condition,
+                        params=policy.params,
+                        key_columns=policy.key_columns,
+                        batch_size=settings.RETENTION_BATCH_SIZE,
+                        pause=settings.RETENTION_BATCH_PAUSE
+                    )
+                except Exception as e:
+                    logger.error(f"清理 {policy.name} 过期数据失败: {e}")
+
+            pages_reclaimed = 0
+            try:
+                pages_reclaimed = self._storage.incremental_vacuum()
+            except Exception as e:
+                logger.error(f"增量 VACUUM 失败: {e}")
+
+            size_after = self._storage.get_database_size()
+            report = {
+                "started_at": started,
+                "duration": (datetime.now() - started).total_seconds(),
+                "deleted": deleted,
+                "total_deleted": sum(deleted.values()),
+                "pages_reclaimed": pages_reclaimed,
+                "size_before": size_before["size_bytes"],
+                "size_after": size_after["size_bytes"],
+                "bytes_reclaimed": max(0, size_before["size_bytes"] - size_after["size_bytes"])
+            }
+            self._last_report = report
+
+            if report["total_deleted"] or pages_reclaimed:
+                logger.info(
+                    f"数据清理完成: 删除 {report['total_deleted']} 行 {deleted}，"
+                    f"回收 {report['bytes_reclaimed'] / 1024 / 1024:.2f} MB，耗时 {report['duration']:.2f} 秒"
+                )
+            return report
+
+    def _retention_loop(self):
+        """后台清理循环"""
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"数据清理任务出错: {e}")
+            self._stop_event.wait(settings.RETENTION_CHECK_INTERVAL)
+
+# 创建全局数据保留服务实例
+retention_service = RetentionService()
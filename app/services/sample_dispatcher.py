@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from config.settings import settings
+
+def _setup_logger():
+    logger = logging.getLogger('RemoteTestMonitor.SampleDispatcher')
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+logger = _setup_logger()
+
+# 订阅者积压超出环形缓冲区时的处理策略
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # 依次投递仍在缓冲区内的样本，丢弃已被覆盖的旧样本
+OVERFLOW_LATEST = "latest"  # 只投递最新样本，跳过所有积压样本
+
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_LATEST)
+
+class _Subscriber:
+    """订阅者的投递位置和统计"""
+    def __init__(self, callback: Callable[[Any], None], policy: str, next_seq: int):
+        self.callback = callback
+        self.policy = policy
+        self.next_seq = next_seq
+        # 每个订阅者同一时间最多只有一个样本在投递中，保证按序投递
+        self.busy = False
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def name(self) -> str:
+        return getattr(self.callback, '__qualname__', repr(self.callback))
+
+class SampleDispatcher:
+    """监控样本分发器
+
+    采样线程把样本追加到固定容量的环形缓冲区（O(1)，与订阅者数量无关），
+    由单个常驻分发线程按各订阅者自己的读取位置取样本，提交到固定大小的回调线程池执行。
+    每个订阅者同一时间只有一个样本在投递中，慢回调只会让自己积压，不影响其他订阅者；
+    积压超过缓冲区容量时按订阅者的溢出策略丢弃旧样本或只投递最新样本。
+    """
+    def __init__(self, capacity: Optional[int] = None, default_policy: Optional[str] = None,
+                 workers: Optional[int] = None, name: str = "SampleDispatcher"):
+        self._capacity = max(1, capacity or settings.MONITOR_CALLBACK_QUEUE_SIZE)
+        self._workers = max(1, workers or settings.MONITOR_CALLBACK_WORKERS)
+        self._default_policy = default_policy or settings.MONITOR_CALLBACK_OVERFLOW
+        if self._default_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"不支持的溢出策略: {self._default_policy}")
+        self._name = name
+        # 环形缓冲区中的元素为 (序号, 样本, 发布时间)
+        self._buffer: deque = deque(maxlen=self._capacity)
+        self._last_seq = 0
+        self._subscribers: List[_Subscriber] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running = False
+        self._published = 0
+
+    def subscribe(self, callback: Callable[[Any], None], policy: Optional[str] = None):
+        """注册订阅者（只接收注册之后发布的样本，重复注册无副作用）"""
+        policy = policy or self._default_policy
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"不支持的溢出策略: {policy}")
+        with self._condition:
+            if any(subscriber.callback == callback for subscriber in self._subscribers):
+                return
+            self._subscribers.append(_Subscriber(callback, policy, self._last_seq + 1))
+        self.start()
+
+    def unsubscribe(self, callback: Callable[[Any], None]):
+        """注销订阅者"""
+        with self._condition:
+            self._subscribers = [subscriber for subscriber in self._subscribers if subscriber.callback != callback]
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def publish(self, sample: Any):
+        """发布样本（不阻塞，不等待任何回调）"""
+        with self._condition:
+            self._last_seq += 1
+            self._buffer.append((self._last_seq, sample, time.monotonic()))
+            self._published += 1
+            self._condition.notify()
+
+    def start(self):
+        """启动分发线程（重复调用无副作用）"""
+        with self._condition:
+            if self._thread and self._thread.is_alive():
+                return
+            self._running = True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix=self._name)
+            self._thread = threading.Thread(target=self._dispatch_loop, name=self._name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """停止分发线程（未投递的样本被丢弃）"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            thread, executor = self._thread, self._executor
+            self._executor = None
+        if thread:
+            thread.join(timeout=timeout)
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取发布总数、缓冲区占用以及各订阅者的积压、投递、丢弃、错误次数和延迟（秒）"""
+        with self._condition:
+            return {
+                "published": self._published,
+                "buffered": len(self._buffer),
+                "capacity": self._capacity,
+                "subscribers": [
+                    {
+                        "name": subscriber.name,
+                        "policy": subscriber.policy,
+                        "pending": max(0, self._last_seq - subscriber.next_seq + 1),
+                        "delivered": subscriber.delivered,
+                        "dropped": subscriber.dropped,
+                        "errors": subscriber.errors,
+                        "last_lag": subscriber.last_lag,
+                        "max_lag": subscriber.max_lag
+                    }
+                    for subscriber in self._subscribers
+                ]
+            }
+
+    def _next_item(self, subscriber: _Subscriber):
+        """取订阅者的下一个待投递样本并推进读取位置，按溢出策略统计丢弃数（调用方持有锁）"""
+        if subscriber.next_seq > self._last_seq or not self._buffer:
+            return None
+        oldest_seq = self._buffer[0][0]
+        if subscriber.policy == OVERFLOW_LATEST:
+            skip_to = self._last_seq
+        else:
+            skip_to = oldest_seq
+        if subscriber.next_seq < skip_to:
+            subscriber.dropped += skip_to - subscriber.next_seq
+            subscriber.next_seq = skip_to
+        item = self._buffer[subscriber.next_seq - oldest_seq]
+        subscriber.next_seq += 1
+        return item
+
+    def _dispatch_loop(self):
+        """分发线程主循环：给每个空闲且有积压的订阅者取一个样本，提交到回调线程池"""
+        while True:
+            with self._condition:
+                while self._running and not self._ready_subscribers():
+                    self._condition.wait()
+                if not self._running:
+                    return
+                for subscriber in self._ready_subscribers():
+                    item = self._next_item(subscriber)
+                    if item is None:
+                        continue
+                    subscriber.busy = True
+                    self._executor.submit(self._deliver, subscriber, item)
+
+    def _ready_subscribers(self) -> List[_Subscriber]:
+        """空闲且有待投递样本的订阅者（调用方持有锁）"""
+        return [s for s in self._subscribers if not s.busy and s.next_seq <= self._last_seq]
+
+    def _deliver(self, subscriber: _Subscriber, item):
+        """在回调线程中执行一次投递，完成后唤醒分发线程"""
+        _, sample, published_at = item
+        try:
+            subscriber.callback(sample)
+        except Exception as e:
+            subscriber.errors += 1
+            logger.error(f"回调 {subscriber.name} 执行失败: {e}")
+        lag = time.monotonic() - published_at
+        with self._condition:
+            subscriber.delivered += 1
+            subscriber.last_lag = lag
+            subscriber.max_lag = max(subscriber.max_lag, lag)
+            subscriber.busy = False
+            self._condition.notify()
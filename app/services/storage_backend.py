@@ -0,0 +1,349 @@
+import base64
+import binascii
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+from app.models import SystemData, SystemDataRollup, ProcessSample, TestResult, TestRun, TestQueueItem, TestLog, SystemDataRecord, TestLogRecord
+from app.utils.time_utils import TimeUtils
+from config.settings import settings
+
+# 系统监控数据汇总粒度：名称 -> 时间桶宽度（毫秒）
+ROLLUP_RESOLUTIONS = {
+    "1m": 60 * 1000,
+    "1h": 60 * 60 * 1000,
+    "1d": 24 * 60 * 60 * 1000,
+}
+
+# 参与汇总的系统指标，每个指标在汇总表中保存 min/max/sum/last 四列
+ROLLUP_METRICS = ("cpu_percent", "memory_percent", "disk_percent", "network_sent", "network_recv")
+
+# iter_system_data_batches 返回的行元组字段顺序（timestamp 为毫秒时间戳）
+SYSTEM_DATA_BATCH_FIELDS = ("timestamp", "cpu_percent", "memory_percent", "disk_percent", "network_sent",
+                            "network_recv", "process_id", "process_name", "node_name")
+
+class StorageBackend(ABC):
+    """存储后端接口
+
+    定义服务层使用的全部存储操作。SQLite 实现见 storage_service.StorageService，
+    纯内存实现见 memory_storage.MemoryStorageService，由 settings.STORAGE_BACKEND 选择。
+    与具体后端无关的组合逻辑（粒度选择、分页遍历等）在此基类中实现。
+
+    系统数据和日志的读取接口返回轻量行对象（SystemDataRecord / TestLogRecord），
+    不做 pydantic 校验；需要模型时调用行对象的 to_model()。
+    """
+    # 数据是否持久化到磁盘（内存后端为 False，不启动数据保留任务）
+    persistent = True
+
+    def close(self):
+        """释放后端持有的资源"""
+
+    def start_snapshots(self):
+        """启动定期生成只读快照（不支持快照的后端不做任何事）"""
+
+    def stop_snapshots(self, timeout: float = 10.0):
+        """停止定期生成只读快照"""
+
+    # ---------- 系统监控数据 ----------
+
+    def save_system_data(self, data: SystemData):
+        """保存系统监控数据"""
+        self.save_system_data_batch([data])
+
+    @abstractmethod
+    def save_system_data_batch(self, data_list: List[SystemData]):
+        """批量保存系统监控数据，并增量更新各粒度汇总"""
+
+    @abstractmethod
+    def get_system_data(self, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> List[SystemDataRecord]:
+        """获取指定时间范围的原始系统监控数据"""
+
+    @abstractmethod
+    def iter_system_data(self, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> Iterator[SystemDataRecord]:
+        """按时间顺序流式读取指定时间范围的原始系统监控数据"""
+
+    def get_system_data_rollup(self, resolution: str, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> List[SystemDataRollup]:
+        """获取指定粒度的系统数据汇总（包含起始时间所在的时间桶）"""
+        return list(self.iter_system_data_rollup(resolution, start_time, end_time, node_name))
+
+    @abstractmethod
+    def iter_system_data_rollup(self, resolution: str, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> Iterator[SystemDataRollup]:
+        """按时间桶顺序流式读取指定粒度的系统数据汇总（包含起始时间所在的时间桶）"""
+
+    def choose_resolution(self, start_time: datetime, end_time: datetime, max_points: int) -> str:
+        """选择点数不超过预算的最细粒度，返回 "raw" 或汇总粒度名称"""
+        span_seconds = max((end_time - start_time).total_seconds(), 0)
+        # 原始数据每个落库间隔最多一条（高频样本只保存在内存中）
+        if span_seconds / max(settings.MONITOR_INTERVAL, settings.MONITOR_PERSIST_INTERVAL, 1) <= max_points:
+            return "raw"
+        for resolution, bucket_ms in ROLLUP_RESOLUTIONS.items():
+            if span_seconds / (bucket_ms / 1000) <= max_points:
+                return resolution
+        return list(ROLLUP_RESOLUTIONS)[-1]
+
+    def get_system_data_at_resolution(self, resolution: str, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> List[SystemDataRecord]:
+        """按指定粒度获取系统数据：使用率取时间桶平均值，网络累计计数取桶内最新值"""
+        if resolution == "raw":
+            return self.get_system_data(start_time, end_time, node_name)
+        return list(self.iter_system_data_at_resolution(resolution, start_time, end_time, node_name))
+
+    def iter_system_data_at_resolution(self, resolution: str, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> Iterator[SystemDataRecord]:
+        """按指定粒度流式读取系统数据（用于导出，内存占用与时间范围无关）"""
+        if resolution == "raw":
+            yield from self.iter_system_data(start_time, end_time, node_name)
+            return
+        for rollup in self.iter_system_data_rollup(resolution, start_time, end_time, node_name):
+            yield SystemDataRecord(
+                timestamp=rollup.timestamp,
+                cpu_percent=rollup.cpu_percent_avg,
+                memory_percent=rollup.memory_percent_avg,
+                disk_percent=rollup.disk_percent_avg,
+                network_sent=int(rollup.network_sent_last),
+                network_recv=int(rollup.network_recv_last),
+                node_name=rollup.node_name
+            )
+
+    @abstractmethod
+    def get_system_data_nodes(self) -> List[str]:
+        """获取有系统监控数据的节点名称（升序）"""
+
+    def iter_system_data_batches(self, resolution: str, start_time: datetime, end_time: datetime,
+                                 node_name: Optional[str] = None, batch_size: int = 1000) -> Iterator[List[tuple]]:
+        """按节点、再按时间顺序分批读取系统数据的原始行元组（字段见 SYSTEM_DATA_BATCH_FIELDS）
+
+        供列式导出等批量消费方使用，不构造行对象；node_name 为 None 时依次读取所有节点。
+        """
+        nodes = [node_name] if node_name else self.get_system_data_nodes()
+        for node in nodes:
+            yield from self._iter_node_system_data_batches(resolution, start_time, end_time, node, batch_size)
+
+    def _iter_node_system_data_batches(self, resolution: str, start_time: datetime, end_time: datetime,
+                                       node_name: str, batch_size: int) -> Iterator[List[tuple]]:
+        """单个节点的分批行元组，默认由行对象转换，后端可以直接从游标批量读取"""
+        batch = []
+        for item in self.iter_system_data_at_resolution(resolution, start_time, end_time, node_name):
+            batch.append((TimeUtils.to_epoch_ms(item.timestamp), item.cpu_percent, item.memory_percent,
+                          item.disk_percent, item.network_sent, item.network_recv, item.process_id,
+                          item.process_name, item.node_name))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def get_system_data_series(self, start_time: datetime, end_time: datetime, node_name: str = "localhost", max_points: int = 500) -> List[SystemDataRecord]:
+        """获取用于图表/导出的系统数据序列，自动选择满足点数预算的粒度"""
+        resolution = self.choose_resolution(start_time, end_time, max_points)
+        return self.get_system_data_at_resolution(resolution, start_time, end_time, node_name)
+
+    # ---------- 被监控进程树数据 ----------
+
+    @abstractmethod
+    def save_process_samples(self, samples: List[ProcessSample]):
+        """批量保存被监控进程树的资源样本"""
+
+    @abstractmethod
+    def get_process_samples(self, start_time: datetime, end_time: datetime, label: Optional[str] = None,
+                            run_id: Optional[str] = None, node_name: str = "localhost") -> List[ProcessSample]:
+        """获取指定时间范围的进程树资源样本（按时间顺序），可按标签或测试运行ID过滤"""
+
+    # ---------- 测试运行 ----------
+
+    @abstractmethod
+    def save_test_run(self, test_run: TestRun):
+        """保存测试运行数据"""
+
+    @abstractmethod
+    def get_test_run(self, run_id: str) -> Optional[TestRun]:
+        """获取指定测试运行数据（每次返回新的对象）"""
+
+    @abstractmethod
+    def increment_test_counters(self, run_id: str, passed: int = 0, failed: int = 0,
+                                skipped: int = 0) -> Optional[TestRun]:
+        """原子地累加通过/失败/跳过计数，返回更新后的测试运行数据"""
+
+    @abstractmethod
+    def get_running_tests(self) -> List[TestRun]:
+        """获取所有正在运行的测试（只返回真正活跃的测试）"""
+
+    @abstractmethod
+    def get_all_test_runs(self, limit: int = 100) -> List[TestRun]:
+        """获取最近的测试运行记录"""
+
+    @abstractmethod
+    def get_test_runs_by_time_range(self, start_time: datetime, end_time: datetime) -> List[TestRun]:
+        """根据时间范围获取测试运行记录"""
+
+    @abstractmethod
+    def get_test_runs_page(self, page_size: int = 50, cursor: Optional[str] = None,
+                           status: Optional[str] = None, node_name: Optional[str] = None,
+                           execution_type: Optional[str] = None,
+                           start_time: Optional[datetime] = None, end_time: Optional[datetime] = None,
+                           ended_after: Optional[datetime] = None,
+                           descending: bool = True) -> Tuple[List[TestRun], Optional[str]]:
+        """按 (start_time, run_id) 键集分页获取测试运行记录，返回 (当前页记录, 下一页游标)
+
+        start_time/end_time 过滤运行的开始时间；指定 ended_after 时只返回未结束或结束时间不早于它的运行。
+        """
+
+    def iter_test_runs(self, page_size: int = 500, **filters) -> Iterator[TestRun]:
+        """按开始时间顺序逐页遍历测试运行记录（参数同 get_test_runs_page），内存占用与总记录数无关"""
+        filters.setdefault('descending', False)
+        cursor = None
+        while True:
+            runs, cursor = self.get_test_runs_page(page_size=page_size, cursor=cursor, **filters)
+            yield from runs
+            if cursor is None:
+                return
+
+    @abstractmethod
+    def get_test_run_trend(self, start_time: datetime, end_time: datetime, bucket_seconds: int,
+                           statuses: Tuple[str, ...] = ('completed', 'failed', 'stopped')) -> List[Dict[str, Any]]:
+        """按时间桶聚合测试运行统计"""
+
+    @abstractmethod
+    def delete_test_run(self, run_id: str) -> bool:
+        """删除指定测试运行记录及其日志和结果"""
+
+    @abstractmethod
+    def delete_all_test_runs(self) -> bool:
+        """删除所有测试运行记录、日志和结果"""
+
+    @staticmethod
+    def _encode_test_run_cursor(start_ms: int, run_id: str) -> str:
+        """将分页位置 (start_time, run_id) 编码为不透明的游标字符串"""
+        return base64.urlsafe_b64encode(f"{start_ms}:{run_id}".encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _decode_test_run_cursor(cursor: str) -> Tuple[int, str]:
+        """解析游标字符串，格式错误时抛出 ValueError"""
+        try:
+            start_ms, run_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split(':', 1)
+            return int(start_ms), run_id
+        except (binascii.Error, UnicodeError, ValueError) as e:
+            raise ValueError(f"无效的分页游标: {cursor}") from e
+
+    @staticmethod
+    def _is_active_test(test_run: TestRun, current_time: datetime) -> bool:
+        """运行中的测试是否仍然活跃：已有测试进展，或在 10 分钟内开始"""
+        has_progress = (test_run.total_tests > 0 or
+                        test_run.passed_tests > 0 or
+                        test_run.failed_tests > 0 or
+                        test_run.skipped_tests > 0)
+        return has_progress or (current_time - test_run.start_time).total_seconds() < 600
+
+    # ---------- 测试结果与队列 ----------
+
+    def save_test_result(self, result: TestResult):
+        """保存测试用例结果"""
+        self.save_test_results([result])
+
+    @abstractmethod
+    def save_test_results(self, results: List[TestResult]):
+        """批量保存测试用例结果"""
+
+    @abstractmethod
+    def update_test_results(self, run_id: str, durations: Optional[Dict[str, float]] = None,
+                            messages: Optional[Dict[str, str]] = None):
+        """按 nodeid 批量更新指定测试运行中用例的耗时和失败信息"""
+
+    @abstractmethod
+    def get_test_case_history(self, test_id: str, limit: int = 100, start_time: Optional[datetime] = None,
+                              end_time: Optional[datetime] = None) -> List[TestResult]:
+        """获取指定用例（nodeid）最近的执行结果和耗时，按时间倒序"""
+
+    @abstractmethod
+    def get_slowest_tests(self, run_id: str, limit: int = 10) -> List[TestResult]:
+        """获取指定测试运行中耗时最长的用例"""
+
+    @abstractmethod
+    def save_test_queue_item(self, item: TestQueueItem):
+        """保存测试队列项"""
+
+    @abstractmethod
+    def update_test_queue_item(self, queue_id: str, status: str):
+        """更新测试队列项状态"""
+
+    @abstractmethod
+    def get_test_queue(self) -> List[TestQueueItem]:
+        """获取测试队列（按优先级降序、创建时间升序）"""
+
+    # ---------- 测试日志 ----------
+
+    def save_test_log(self, log: TestLog):
+        """保存测试日志"""
+        self.save_test_logs([log])
+
+    @abstractmethod
+    def save_test_logs(self, logs: List[TestLog]):
+        """批量保存测试日志"""
+
+    def get_test_logs(self, run_id: str) -> List[TestLogRecord]:
+        """获取指定测试运行的日志"""
+        return list(self.iter_test_logs(run_id))
+
+    def get_test_log_lines(self, run_id: str, start_line: int = 0, count: int = 1000,
+                           levels: Optional[List[str]] = None) -> List[TestLogRecord]:
+        """获取指定测试运行从 start_line 开始的 count 行日志（行号从 0 开始，按级别过滤在窗口内进行）"""
+        return list(self.iter_test_logs(run_id, start_line, count, levels))
+
+    @abstractmethod
+    def iter_test_logs(self, run_id: str, start_line: int = 0, count: Optional[int] = None,
+                       levels: Optional[List[str]] = None) -> Iterator[TestLogRecord]:
+        """按行号顺序流式读取指定测试运行的日志"""
+
+    @abstractmethod
+    def iter_test_logs_in_range(self, run_id: str, start_time: Optional[datetime] = None,
+                                end_time: Optional[datetime] = None) -> Iterator[TestLogRecord]:
+        """按时间顺序流式读取指定测试运行在时间范围内的日志（不指定范围时读取整个运行）"""
+
+    def iter_test_logs_across_runs(self, start_time: datetime, end_time: datetime) -> Iterator[TestLogRecord]:
+        """流式读取时间范围内所有测试运行的日志，按运行开始时间逐个运行输出
+
+        开始于 end_time 之前、且未在 start_time 之前结束的运行都可能有落在范围内的日志，
+        这些运行在查询中过滤后按键集分页遍历，每个运行的日志再按 (run_id, timestamp) 范围读取。
+        """
+        for run in self.iter_test_runs(end_time=end_time, ended_after=start_time):
+            yield from self.iter_test_logs_in_range(run.run_id, start_time, end_time)
+
+    @abstractmethod
+    def count_test_logs(self, run_id: str) -> int:
+        """获取指定测试运行的日志行数"""
+
+    @abstractmethod
+    def search_test_logs(self, query: str, run_id: Optional[str] = None, levels: Optional[List[str]] = None,
+                         start_time: Optional[datetime] = None, end_time: Optional[datetime] = None,
+                         limit: int = 50, offset: int = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """全文搜索测试日志，返回 (结果列表, 是否还有更多结果)"""
+
+    @abstractmethod
+    def delete_test_logs(self, run_id: str) -> bool:
+        """删除指定测试运行的所有日志"""
+
+    def close_test_logs(self, run_id: Optional[str] = None):
+        """测试运行（未指定时为全部）的日志已写完，后端可在此写入缓冲的日志"""
+
+    # ---------- 远程机器 ----------
+
+    @abstractmethod
+    def save_remote_machine(self, machine) -> bool:
+        """保存远程机器配置"""
+
+    @abstractmethod
+    def get_remote_machine(self, machine_id: str):
+        """获取指定远程机器配置"""
+
+    @abstractmethod
+    def get_all_remote_machines(self) -> List:
+        """获取所有远程机器配置（按名称排序）"""
+
+    @abstractmethod
+    def delete_remote_machine(self, machine_id: str) -> bool:
+        """删除远程机器配置"""
+
+    @abstractmethod
+    def check_machine_exists(self, host: str, port: int, username: str) -> bool:
+        """检查机器配置是否已存在"""
+
+    @abstractmethod
+    def update_machine_status(self, machine_id: str, status: str) -> bool:
+        """更新机器状态"""
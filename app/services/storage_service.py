@@ -1,9 +1,19 @@
 import sqlite3
 import os
+import glob
+import html
+from collections import OrderedDict
+from pathlib import Path
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-from app.models import SystemData, TestResult, TestRun, TestQueueItem, TestLog
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+from app.models import SystemData, SystemDataRollup, ProcessSample, TestResult, TestRun, TestQueueItem, TestLog, SystemDataRecord, TestLogRecord
+from app.services.log_block_store import LogBlockStore, reserve_log_ids
+from app.services.storage_backend import StorageBackend, ROLLUP_RESOLUTIONS, ROLLUP_METRICS
+from app.utils.export_utils import ExportUtils
+from app.utils.time_utils import TimeUtils
 from config.settings import settings
 
 def _setup_logger():
@@ -13,24 +23,357 @@ def _setup_logger():
 
 logger = _setup_logger()
 
-class StorageService:
-    def __init__(self):
-        self.db_path = settings.DB_PATH
+_ROLLUP_COLUMNS = ["node_name", "bucket_start", "sample_count", "last_timestamp"] + [
+    f"{metric}_{agg}" for metric in ROLLUP_METRICS for agg in ("min", "max", "sum", "last")
+]
+
+# test_runs 表的查询列顺序，与 StorageService._row_to_test_run 对应
+_TEST_RUN_COLUMNS = (
+    "run_id, start_time, end_time, status, total_tests, passed_tests, failed_tests, skipped_tests, "
+    "test_path, report_path, node_name, exit_code, execution_type"
+)
+
+# test_results 表的查询列顺序，与 StorageService._row_to_test_result 对应
+_TEST_RESULT_COLUMNS = "run_id, test_id, name, status, duration, message, traceback, timestamp"
+
+# 流式读取时每次从游标获取的行数
+_FETCH_BATCH_SIZE = 1000
+
+# UPDATE ... RETURNING 需要 SQLite 3.35 及以上版本
+_SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# 日志搜索结果中标记命中位置的哨兵字符，HTML 转义后再替换为 <mark> 标签
+_SNIPPET_START = "\x02"
+_SNIPPET_END = "\x03"
+
+def _fts5_tokenizer() -> Optional[str]:
+    """检测可用的 FTS5 分词器：优先 trigram（支持任意子串和中文），不支持 FTS5 时返回 None"""
+    conn = sqlite3.connect(':memory:')
+    try:
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                conn.execute(f"CREATE VIRTUAL TABLE probe USING fts5(content, tokenize='{tokenizer}')")
+                return tokenizer
+            except sqlite3.OperationalError:
+                continue
+        return None
+    finally:
+        conn.close()
+
+_FTS_TOKENIZER = _fts5_tokenizer()
+
+def _rollup_table(resolution: str) -> str:
+    """获取汇总粒度对应的表名"""
+    if resolution not in ROLLUP_RESOLUTIONS:
+        raise ValueError(f"不支持的汇总粒度: {resolution}")
+    return f"system_data_{resolution}"
+
+def _rollup_upsert_sql(table: str) -> str:
+    """生成增量合并汇总行的 UPSERT 语句（SET 右侧引用的均为更新前的旧值）"""
+    updates = ["sample_count = sample_count + excluded.sample_count"]
+    for metric in ROLLUP_METRICS:
+        updates.extend([
+            f"{metric}_min = MIN({metric}_min, excluded.{metric}_min)",
+            f"{metric}_max = MAX({metric}_max, excluded.{metric}_max)",
+            f"{metric}_sum = {metric}_sum + excluded.{metric}_sum",
+            f"{metric}_last = CASE WHEN excluded.last_timestamp >= last_timestamp "
+            f"THEN excluded.{metric}_last ELSE {metric}_last END",
+        ])
+    updates.append("last_timestamp = MAX(last_timestamp, excluded.last_timestamp)")
+    return (
+        f"INSERT INTO {table} ({', '.join(_ROLLUP_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(_ROLLUP_COLUMNS))}) "
+        f"ON CONFLICT (node_name, bucket_start) DO UPDATE SET {', '.join(updates)}"
+    )
+
+class _LRUCache:
+    """线程安全的有界 LRU 缓存，记录命中、未命中和淘汰次数
+    
+    generation 在每次写入或失效时递增：读穿透时先记录 generation，查询数据库后
+    仅在期间没有发生写入时才回填缓存，避免并发写入后回填旧数据。
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """获取缓存值，未命中时返回 None"""
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value, generation: Optional[int] = None):
+        """写入缓存；指定 generation 时，仅在其后没有发生写入或失效的情况下写入"""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if generation is None:
+                self.generation += 1
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key=None):
+        """使指定键（未指定时为全部）失效"""
+        with self._lock:
+            self.generation += 1
+            if key is None:
+                self._items.clear()
+            else:
+                self._items.pop(key, None)
+    
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._items),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+class StorageService(StorageBackend):
+    """SQLite 存储后端
+    
+    写入使用每线程一个的读写连接；查询使用每线程一个的只读连接（mode=ro URI、query_only），
+    在 WAL 模式下作为独立读者读取已提交的数据，与日志和监控数据的写入互不阻塞。
+    开启快照（DB_SNAPSHOT_INTERVAL > 0）后，后台线程定期用在线备份 API 复制出只读快照文件，
+    聚合类的分析查询在快照上执行，不占用主库的 WAL 读事务。
+    """
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or settings.DB_PATH
+        # 连接池：每个线程按用途（读写/只读/快照）各持有一个长连接，避免每次操作都重新打开数据库
+        self._local = threading.local()
+        self._connections: Dict[Tuple[int, str], tuple] = {}
+        self._connections_lock = threading.Lock()
+        # 只读快照：文件名为 <DB_SNAPSHOT_PATH 或 db_path>.snapshot.<generation>.db，每次刷新递增 generation
+        self._snapshot_prefix = settings.DB_SNAPSHOT_PATH or f"{os.path.splitext(self.db_path)[0]}.snapshot"
+        self._snapshot_path: Optional[str] = None
+        self._snapshot_generation = 0
+        self._snapshot_time: Optional[datetime] = None
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._snapshot_stop = threading.Event()
+        # 压缩块日志存储（settings.LOG_STORE = "blocks" 时使用）
+        self.log_blocks = LogBlockStore(self._get_connection, self._get_read_connection)
+        # 测试运行记录的读穿透/写穿透缓存，缓存按 _TEST_RUN_COLUMNS 顺序的行元组
+        self._test_run_cache = _LRUCache(settings.TEST_RUN_CACHE_SIZE)
         self._initialize_db()
     
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建新的数据库连接并应用性能相关的PRAGMA设置"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=settings.DB_BUSY_TIMEOUT,
+            check_same_thread=False,  # 仅由所属线程使用，但允许连接池在其他线程中关闭
+            cached_statements=settings.DB_CACHED_STATEMENTS
+        )
+        # WAL 模式下读写互不阻塞，synchronous=NORMAL 在 WAL 下仍能保证数据库一致性
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{settings.DB_CACHE_SIZE_KB}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+    
+    @staticmethod
+    def _create_read_connection(db_path: str) -> sqlite3.Connection:
+        """创建只读连接：以 mode=ro URI 打开，并设置 query_only 防止误写"""
+        conn = sqlite3.connect(
+            f"{Path(os.path.abspath(db_path)).as_uri()}?mode=ro",
+            uri=True,
+            timeout=settings.DB_BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=settings.DB_CACHED_STATEMENTS
+        )
+        conn.execute('PRAGMA query_only=1')
+        conn.execute(f'PRAGMA cache_size=-{settings.DB_CACHE_SIZE_KB}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+    
+    def _register_connection(self, kind: str, conn: sqlite3.Connection):
+        """将当前线程新建的连接登记到连接池（同一线程同一用途的旧连接由调用方关闭）"""
+        with self._connections_lock:
+            self._prune_connections()
+            self._connections[(threading.get_ident(), kind)] = (threading.current_thread(), conn)
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的读写长连接，不存在时创建并登记到连接池"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._create_connection()
+            self._local.conn = conn
+            self._register_connection('rw', conn)
+        return conn
+    
+    def _get_read_connection(self) -> sqlite3.Connection:
+        """获取当前线程的只读长连接（查询路径使用，不参与写锁竞争）"""
+        conn = getattr(self._local, 'read_conn', None)
+        if conn is None:
+            # 确保数据库文件和 WAL 已由读写连接创建，只读连接无法自行创建
+            self._get_connection()
+            conn = self._create_read_connection(self.db_path)
+            self._local.read_conn = conn
+            self._register_connection('ro', conn)
+        return conn
+    
+    def _get_snapshot_connection(self) -> sqlite3.Connection:
+        """获取当前线程的快照只读连接；未开启快照或尚未生成快照时返回主库的只读连接"""
+        path, generation = self._snapshot_path, self._snapshot_generation
+        if path is None:
+            return self._get_read_connection()
+        cached = getattr(self._local, 'snapshot', None)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        if cached is not None:
+            # 快照已刷新，关闭旧快照上的连接
+            try:
+                cached[1].close()
+            except sqlite3.Error:
+                pass
+        conn = self._create_read_connection(path)
+        self._local.snapshot = (generation, conn)
+        self._register_connection('snapshot', conn)
+        return conn
+    
+    def _prune_connections(self):
+        """关闭已退出线程遗留的连接（调用方需持有连接池锁）"""
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+                del self._connections[ident]
+    
+    def get_pool_size(self) -> int:
+        """获取连接池中的连接数量"""
+        with self._connections_lock:
+            return len(self._connections)
+    
+    def refresh_snapshot(self) -> str:
+        """用 SQLite 在线备份 API 将主库复制为新的只读快照文件，返回快照路径
+        
+        备份在一个只读连接上一次完成，WAL 模式下只持有读事务，不阻塞写入；
+        新快照写完后才切换，之后的快照查询在新文件上重新打开连接。
+        """
+        with self._snapshot_lock:
+            generation = self._snapshot_generation + 1
+            path = f"{self._snapshot_prefix}.{generation}.db"
+            snapshot_dir = os.path.dirname(path)
+            if snapshot_dir:
+                os.makedirs(snapshot_dir, exist_ok=True)
+            if os.path.exists(path):
+                os.remove(path)
+            
+            started = time.monotonic()
+            source = self._create_read_connection(self.db_path)
+            target = sqlite3.connect(path)
+            try:
+                source.backup(target)
+                # 快照只读，改回回滚日志模式，读取时不需要 -wal/-shm 文件
+                target.execute('PRAGMA journal_mode=DELETE')
+            finally:
+                target.close()
+                source.close()
+            
+            self._snapshot_path, self._snapshot_generation = path, generation
+            self._snapshot_time = datetime.now()
+            logger.debug(f"已生成只读快照 {path}，耗时 {time.monotonic() - started:.2f} 秒")
+            self._prune_snapshots()
+            return path
+    
+    def _prune_snapshots(self):
+        """删除早于上一代的快照文件（仍被其他线程打开而删除失败的文件留待下次再删）"""
+        keep = {self._snapshot_path, f"{self._snapshot_prefix}.{self._snapshot_generation - 1}.db"}
+        for path in glob.glob(f"{glob.escape(self._snapshot_prefix)}.*.db"):
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def get_snapshot_info(self) -> Dict[str, Any]:
+        """获取当前快照的路径、代数和生成时间"""
+        return {
+            "path": self._snapshot_path,
+            "generation": self._snapshot_generation,
+            "created_at": self._snapshot_time
+        }
+    
+    def start_snapshots(self):
+        """启动定期刷新快照的后台线程（DB_SNAPSHOT_INTERVAL 为 0 或线程已运行时不做任何事）"""
+        if settings.DB_SNAPSHOT_INTERVAL <= 0:
+            return
+        if self._snapshot_thread and self._snapshot_thread.is_alive():
+            return
+        self._snapshot_stop.clear()
+        self._snapshot_thread = threading.Thread(target=self._snapshot_loop, name="StorageSnapshot", daemon=True)
+        self._snapshot_thread.start()
+    
+    def stop_snapshots(self, timeout: float = 10.0):
+        """停止快照刷新线程"""
+        self._snapshot_stop.set()
+        if self._snapshot_thread:
+            self._snapshot_thread.join(timeout=timeout)
+            self._snapshot_thread = None
+    
+    def _snapshot_loop(self):
+        while not self._snapshot_stop.is_set():
+            try:
+                self.refresh_snapshot()
+            except Exception as e:
+                logger.error(f"生成只读快照失败: {e}")
+            self._snapshot_stop.wait(settings.DB_SNAPSHOT_INTERVAL)
+    
+    def close(self):
+        """停止快照刷新，写入内存中的日志尾块并关闭连接池中的所有连接"""
+        self.stop_snapshots()
+        try:
+            self.log_blocks.close_run()
+        except sqlite3.Error as e:
+            logger.error(f"写入日志尾块失败: {e}")
+        with self._connections_lock:
+            for thread, conn in self._connections.values():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+    
     def _initialize_db(self):
         """初始化数据库，创建所需的表"""
         # 确保数据库目录存在
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             
+            # 新建数据库启用增量 VACUUM，便于数据清理后回收空间（仅在建表前生效）
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            
             # 创建系统监控数据表
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS system_data (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     cpu_percent REAL NOT NULL,
                     memory_percent REAL NOT NULL,
                     disk_percent REAL NOT NULL,
@@ -46,8 +389,8 @@ class StorageService:
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS test_runs (
                     run_id TEXT PRIMARY KEY,
-                    start_time DATETIME NOT NULL,
-                    end_time DATETIME,
+                    start_time INTEGER NOT NULL,
+                    end_time INTEGER,
                     status TEXT NOT NULL,
                     total_tests INTEGER DEFAULT 0,
                     passed_tests INTEGER DEFAULT 0,
@@ -84,7 +427,7 @@ class StorageService:
                     duration REAL NOT NULL,
                     message TEXT,
                     traceback TEXT,
-                    timestamp DATETIME NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     FOREIGN KEY (run_id) REFERENCES test_runs (run_id)
                 )
             ''')
@@ -96,7 +439,7 @@ class StorageService:
                     test_path TEXT NOT NULL,
                     priority INTEGER DEFAULT 0,
                     status TEXT NOT NULL,
-                    created_at DATETIME NOT NULL
+                    created_at INTEGER NOT NULL
                 )
             ''')
             
@@ -105,7 +448,7 @@ class StorageService:
                 CREATE TABLE IF NOT EXISTS test_logs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     run_id TEXT NOT NULL,
-                    timestamp DATETIME NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     level TEXT NOT NULL,
                     message TEXT NOT NULL,
                     FOREIGN KEY (run_id) REFERENCES test_runs (run_id)
@@ -131,34 +474,459 @@ class StorageService:
             ''')
             
             conn.commit()
+            
+            # 执行版本化的数据库结构迁移
+            self._apply_migrations(conn)
     
-    def save_system_data(self, data: SystemData):
-        """保存系统监控数据"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+    def _apply_migrations(self, conn: sqlite3.Connection):
+        """按版本号顺序执行数据库结构迁移，当前版本记录在 PRAGMA user_version 中"""
+        for version, migration, transactional in self._MIGRATIONS:
+            current_version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version <= current_version:
+                continue
+            
+            logger.info(f"执行数据库迁移: v{current_version} -> v{version}")
+            if not transactional:
+                # 非事务迁移自行分批提交，必须可重复执行（中断后重启会从头再跑一遍）
+                migration(self, conn)
+                conn.execute(f'PRAGMA user_version = {version}')
+                conn.commit()
+                continue
+            
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # 获取写锁后再次确认版本，避免多个进程重复迁移
+                if conn.execute('PRAGMA user_version').fetchone()[0] >= version:
+                    conn.rollback()
+                    continue
+                migration(self, conn)
+                conn.execute(f'PRAGMA user_version = {version}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                logger.error(f"数据库迁移到 v{version} 失败")
+                raise
+    
+    def _migrate_v1_indexes(self, conn: sqlite3.Connection):
+        """v1: 为常用查询条件创建复合索引"""
+        # get_system_data: node_name 等值过滤 + timestamp 范围/排序
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_system_data_node_time ON system_data (node_name, timestamp)')
+        # get_test_logs / delete_test_run: run_id 等值过滤 + timestamp 排序
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_logs_run_time ON test_logs (run_id, timestamp)')
+        # get_all_test_runs / get_test_runs_by_time_range: 按 start_time 排序和范围过滤
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_runs_start_time ON test_runs (start_time)')
+        # get_running_tests: status 等值过滤 + start_time 范围
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_runs_status_start ON test_runs (status, start_time)')
+        # delete_test_run: 按 run_id 删除测试结果
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_results_run ON test_results (run_id)')
+    
+    # 需要转换为整数毫秒时间戳的列：(表名, 列名)
+    _EPOCH_MS_COLUMNS = [
+        ('system_data', 'timestamp'),
+        ('test_runs', 'start_time'),
+        ('test_runs', 'end_time'),
+        ('test_results', 'timestamp'),
+        ('test_queue', 'created_at'),
+        ('test_logs', 'timestamp'),
+    ]
+    
+    def _migrate_v2_epoch_timestamps(self, conn: sqlite3.Connection):
+        """v2: 将 ISO-8601 文本时间戳原地转换为整数毫秒时间戳
+        
+        旧数据由无时区的本地时间生成，julianday(..., 'utc') 先按本地时间换算为 UTC，
+        与 TimeUtils.to_epoch_ms 的结果一致。按 rowid 分批更新并逐批提交，
+        迁移期间其他连接仍可正常读写。
+        """
+        batch_size = settings.DB_MIGRATION_BATCH_SIZE
+        for table, column in self._EPOCH_MS_COLUMNS:
+            converted = 0
+            while True:
+                cursor = conn.execute(f'''
+                    UPDATE {table}
+                    SET {column} = CAST(ROUND((julianday({column}, 'utc') - 2440587.5) * 86400000) AS INTEGER)
+                    WHERE rowid IN (
+                        SELECT rowid FROM {table}
+                        WHERE typeof({column}) = 'text' AND julianday({column}) IS NOT NULL
+                        LIMIT ?
+                    )
+                ''', (batch_size,))
+                conn.commit()
+                converted += cursor.rowcount
+                if cursor.rowcount < batch_size:
+                    break
+            if converted:
+                logger.info(f"已转换 {table}.{column} 的 {converted} 行时间戳")
+    
+    def _migrate_v3_rollups(self, conn: sqlite3.Connection):
+        """v3: 创建 1分钟/1小时/1天 粒度的系统数据汇总表，并用已有原始数据回填"""
+        metric_columns = ',\n'.join(
+            f"{metric}_{agg} REAL NOT NULL"
+            for metric in ROLLUP_METRICS for agg in ("min", "max", "sum", "last")
+        )
+        aggregates = ', '.join(
+            f"MIN({metric}), MAX({metric}), SUM({metric}), MAX(CASE WHEN rn = 1 THEN {metric} END)"
+            for metric in ROLLUP_METRICS
+        )
+        for resolution, bucket_ms in ROLLUP_RESOLUTIONS.items():
+            table = _rollup_table(resolution)
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    node_name TEXT NOT NULL,
+                    bucket_start INTEGER NOT NULL,
+                    sample_count INTEGER NOT NULL,
+                    last_timestamp INTEGER NOT NULL,
+                    {metric_columns},
+                    PRIMARY KEY (node_name, bucket_start)
+                ) WITHOUT ROWID
+            ''')
+            # rn = 1 为每个时间桶内最新的一条样本，用于取 last 值
+            conn.execute(f'''
+                INSERT OR REPLACE INTO {table} ({', '.join(_ROLLUP_COLUMNS)})
+                SELECT node_name, bucket_start, COUNT(*), MAX(timestamp), {aggregates}
+                FROM (
+                    SELECT *, (timestamp / {bucket_ms}) * {bucket_ms} AS bucket_start,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY node_name, timestamp / {bucket_ms} ORDER BY timestamp DESC
+                           ) AS rn
+                    FROM system_data
+                    WHERE typeof(timestamp) = 'integer'
+                )
+                GROUP BY node_name, bucket_start
+            ''')
+    
+    def _migrate_v4_incremental_vacuum(self, conn: sqlite3.Connection):
+        """v4: 为已有数据库启用增量 VACUUM，并创建数据清理所需的索引"""
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_logs_level_time ON test_logs (level, timestamp)')
+        conn.commit()
+        
+        # auto_vacuum 模式只能在建表前设置，已有数据库需要执行一次完整 VACUUM 才能切换
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            logger.info("为已有数据库启用增量 VACUUM，正在执行一次完整 VACUUM...")
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+    
+    def _migrate_v5_test_run_keyset_index(self, conn: sqlite3.Connection):
+        """v5: 为测试运行记录的键集分页创建 (start_time, run_id) 索引"""
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_runs_start_run ON test_runs (start_time, run_id)')
+        # 新索引已覆盖按 start_time 的排序和范围过滤
+        conn.execute('DROP INDEX IF EXISTS idx_test_runs_start_time')
+    
+    def _migrate_v6_log_blocks(self, conn: sqlite3.Connection):
+        """v6: 创建压缩块日志表"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS test_log_blocks (
+                run_id TEXT NOT NULL,
+                block_no INTEGER NOT NULL,
+                first_line INTEGER NOT NULL,
+                line_count INTEGER NOT NULL,
+                first_ts INTEGER NOT NULL,
+                last_ts INTEGER NOT NULL,
+                level_mask INTEGER NOT NULL,
+                offsets BLOB NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (run_id, block_no)
+            )
+        ''')
+        # 数据保留按块的最后时间戳清理
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_log_blocks_last_ts ON test_log_blocks (last_ts)')
+    
+    def _migrate_v7_log_search(self, conn: sqlite3.Connection):
+        """v7: 创建测试日志全文索引（已有日志由 v12 按日志ID回填）"""
+        if _FTS_TOKENIZER is None:
+            logger.warning("当前 SQLite 未启用 FTS5，跳过日志全文索引")
+            return
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS test_logs_fts USING fts5(
+                message,
+                run_id,
+                level UNINDEXED,
+                timestamp UNINDEXED,
+                tokenize = '{_FTS_TOKENIZER}'
+            )
+        ''')
+    
+    def _migrate_v8_test_result_indexes(self, conn: sqlite3.Connection):
+        """v8: 为用例历史和最慢用例查询创建 test_results 索引"""
+        # get_test_case_history: test_id 等值过滤 + timestamp 排序
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_results_test_time ON test_results (test_id, timestamp)')
+        # get_slowest_tests: run_id 等值过滤 + duration 排序
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_results_run_duration ON test_results (run_id, duration)')
+        # 新索引已覆盖按 run_id 的过滤和删除
+        conn.execute('DROP INDEX IF EXISTS idx_test_results_run')
+    
+    def _migrate_v10_nullable_test_result_duration(self, conn: sqlite3.Connection):
+        """v10: test_results.duration 改为可空，未取得 pytest 实测耗时的用例不再写入估算值（SQLite 需重建表）"""
+        conn.execute('''
+            CREATE TABLE test_results_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                test_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                duration REAL,
+                message TEXT,
+                traceback TEXT,
+                timestamp INTEGER NOT NULL,
+                FOREIGN KEY (run_id) REFERENCES test_runs (run_id)
+            )
+        ''')
+        conn.execute(f'''
+            INSERT INTO test_results_new (id, {_TEST_RESULT_COLUMNS})
+            SELECT id, {_TEST_RESULT_COLUMNS} FROM test_results
+        ''')
+        conn.execute('DROP TABLE test_results')
+        conn.execute('ALTER TABLE test_results_new RENAME TO test_results')
+        # 重建 v8 创建的索引
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_results_test_time ON test_results (test_id, timestamp)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_results_run_duration ON test_results (run_id, duration)')
+    
+    def _migrate_v9_process_samples(self, conn: sqlite3.Connection):
+        """v9: 创建被监控进程树资源数据表（每个标签一条时间序列）"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS process_samples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp INTEGER NOT NULL,
+                label TEXT NOT NULL,
+                run_id TEXT,
+                pid INTEGER NOT NULL,
+                process_name TEXT,
+                cpu_percent REAL NOT NULL,
+                memory_percent REAL NOT NULL,
+                process_count INTEGER NOT NULL DEFAULT 1,
+                node_name TEXT NOT NULL DEFAULT 'localhost'
+            )
+        ''')
+        # 按时间范围查询和数据保留清理
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_process_samples_node_time ON process_samples (node_name, timestamp)')
+        # 按测试运行查询和随测试运行删除
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_process_samples_run_time ON process_samples (run_id, timestamp)')
+    
+    def _migrate_v11_test_run_end_time_index(self, conn: sqlite3.Connection):
+        """v11: 键集分页索引追加 end_time 列，按结束时间过滤运行时不必回表"""
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_test_runs_start_run_end ON test_runs (start_time, run_id, end_time)')
+        # 新索引的前缀与 v5 的 (start_time, run_id) 索引相同
+        conn.execute('DROP INDEX IF EXISTS idx_test_runs_start_run')
+    
+    def _migrate_v12_log_index_rowids(self, conn: sqlite3.Connection):
+        """v12: 全文索引的 rowid 改为日志ID（块内日志为块预留的连续ID），并重建索引（可重复执行）
+        
+        之后删除日志时可按ID直接删除对应的索引行。
+        """
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(test_log_blocks)')]
+        if 'first_rowid' not in columns:
+            conn.execute('ALTER TABLE test_log_blocks ADD COLUMN first_rowid INTEGER')
+            conn.commit()
+        
+        batch_size = settings.DB_MIGRATION_BATCH_SIZE
+        while True:
+            with conn:
+                rows = conn.execute(
+                    'SELECT rowid, line_count FROM test_log_blocks WHERE first_rowid IS NULL LIMIT ?',
+                    (batch_size,)
+                ).fetchall()
+                for rowid, line_count in rows:
+                    first_rowid = reserve_log_ids(conn, max(line_count, settings.LOG_BLOCK_LINES))
+                    conn.execute('UPDATE test_log_blocks SET first_rowid = ? WHERE rowid = ?', (first_rowid, rowid))
+            if len(rows) < batch_size:
+                break
+        
+        if _FTS_TOKENIZER is None:
+            return
+        conn.execute('DELETE FROM test_logs_fts')
+        conn.commit()
+        
+        last_id = 0
+        while True:
+            rows = conn.execute('''
+                SELECT id, message, run_id, level, timestamp FROM test_logs
+                WHERE id > ? ORDER BY id LIMIT ?
+            ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            conn.executemany(
+                'INSERT INTO test_logs_fts (rowid, message, run_id, level, timestamp) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            conn.commit()
+            last_id = rows[-1][0]
+        
+        for run_id in self.log_blocks.get_run_ids():
+            batch = []
+            for entry in self.log_blocks.iter_indexed_lines(run_id):
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    self._index_test_logs(conn, batch, force=True)
+                    batch = []
+            self._index_test_logs(conn, batch, force=True)
+            conn.commit()
+    
+    # 数据库结构迁移列表：(目标版本号, 迁移方法, 是否在单个事务中执行)
+    # 只能追加，不能修改已发布的版本
+    _MIGRATIONS = [
+        (1, _migrate_v1_indexes, True),
+        (2, _migrate_v2_epoch_timestamps, False),
+        (3, _migrate_v3_rollups, True),
+        (4, _migrate_v4_incremental_vacuum, False),
+        (5, _migrate_v5_test_run_keyset_index, True),
+        (6, _migrate_v6_log_blocks, True),
+        (7, _migrate_v7_log_search, False),
+        (8, _migrate_v8_test_result_indexes, True),
+        (9, _migrate_v9_process_samples, True),
+        (10, _migrate_v10_nullable_test_result_duration, True),
+        (11, _migrate_v11_test_run_end_time_index, True),
+        (12, _migrate_v12_log_index_rowids, False),
+    ]
+    
+    @staticmethod
+    def _system_data_params(data: SystemData) -> tuple:
+        """将系统监控数据转换为插入语句参数"""
+        return (
+            TimeUtils.to_epoch_ms(data.timestamp),
+            data.cpu_percent,
+            data.memory_percent,
+            data.disk_percent,
+            data.network_sent,
+            data.network_recv,
+            data.process_id,
+            data.process_name,
+            data.node_name
+        )
+    
+    def save_system_data_batch(self, data_list: List[SystemData]):
+        """在单个事务中批量保存系统监控数据，并增量更新各粒度汇总表"""
+        if not data_list:
+            return
+        with self._get_connection() as conn:
+            conn.executemany('''
                 INSERT INTO system_data 
                 (timestamp, cpu_percent, memory_percent, disk_percent, network_sent, network_recv, process_id, process_name, node_name)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                data.timestamp.isoformat(),
-                data.cpu_percent,
-                data.memory_percent,
-                data.disk_percent,
-                data.network_sent,
-                data.network_recv,
-                data.process_id,
-                data.process_name,
-                data.node_name
-            ))
-            conn.commit()
+            ''', [self._system_data_params(data) for data in data_list])
+            
+            for resolution, bucket_ms in ROLLUP_RESOLUTIONS.items():
+                conn.executemany(
+                    _rollup_upsert_sql(_rollup_table(resolution)),
+                    [self._rollup_params(data, bucket_ms) for data in data_list]
+                )
+    
+    @staticmethod
+    def _rollup_params(data: SystemData, bucket_ms: int) -> tuple:
+        """将单条样本转换为汇总表 UPSERT 参数（样本数为1，min/max/sum/last 均为样本值）"""
+        timestamp = TimeUtils.to_epoch_ms(data.timestamp)
+        params = [data.node_name, (timestamp // bucket_ms) * bucket_ms, 1, timestamp]
+        for metric in ROLLUP_METRICS:
+            value = getattr(data, metric)
+            params.extend((value, value, value, value))
+        return tuple(params)
     
-    def get_system_data(self, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> List[SystemData]:
+    def iter_system_data_rollup(self, resolution: str, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> Iterator[SystemDataRollup]:
+        """按时间桶顺序分批读取指定粒度的系统数据汇总（包含起始时间所在的时间桶）"""
+        table = _rollup_table(resolution)
+        bucket_ms = ROLLUP_RESOLUTIONS[resolution]
+        start_ms = TimeUtils.to_epoch_ms(start_time)
+        
+        cursor = self._get_read_connection().cursor()
+        cursor.execute(f'''
+            SELECT {', '.join(_ROLLUP_COLUMNS)}
+            FROM {table}
+            WHERE node_name = ? AND bucket_start BETWEEN ? AND ?
+            ORDER BY bucket_start
+        ''', (node_name, (start_ms // bucket_ms) * bucket_ms, TimeUtils.to_epoch_ms(end_time)))
+        
+        for row in self._iter_rows(cursor):
+            sample_count = row[2]
+            values = {}
+            for index, metric in enumerate(ROLLUP_METRICS):
+                metric_min, metric_max, metric_sum, metric_last = row[4 + index * 4: 8 + index * 4]
+                values[f"{metric}_min"] = metric_min
+                values[f"{metric}_max"] = metric_max
+                values[f"{metric}_avg"] = metric_sum / sample_count
+                values[f"{metric}_last"] = metric_last
+            yield SystemDataRollup(
+                timestamp=TimeUtils.from_epoch_ms(row[1]),
+                resolution=resolution,
+                node_name=row[0],
+                sample_count=sample_count,
+                **values
+            )
+    
+    @staticmethod
+    def _iter_rows(cursor: sqlite3.Cursor) -> Iterator[tuple]:
+        """以 fetchmany 分批遍历游标结果，避免一次性加载全部行"""
+        while True:
+            rows = cursor.fetchmany(_FETCH_BATCH_SIZE)
+            if not rows:
+                return
+            yield from rows
+    
+    @staticmethod
+    def _row_to_system_data(row) -> SystemDataRecord:
+        """将 system_data 查询行转换为轻量行对象（列顺序与 SystemDataRecord 字段一致）"""
+        return SystemDataRecord(TimeUtils.from_epoch_ms(row[0]), *row[1:])
+    
+    def iter_system_data(self, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> Iterator[SystemDataRecord]:
+        """按时间顺序分批读取指定时间范围的系统监控数据"""
+        cursor = self._get_read_connection().execute('''
+            SELECT timestamp, cpu_percent, memory_percent, disk_percent, network_sent, network_recv, process_id, process_name, node_name
+            FROM system_data
+            WHERE timestamp BETWEEN ? AND ? AND node_name = ?
+            ORDER BY timestamp
+        ''', (TimeUtils.to_epoch_ms(start_time), TimeUtils.to_epoch_ms(end_time), node_name))
+        for row in self._iter_rows(cursor):
+            yield self._row_to_system_data(row)
+    
+    def get_system_data_nodes(self) -> List[str]:
+        """获取有系统监控数据的节点名称（升序）
+        
+        沿 (node_name, timestamp) 索引逐个跳到下一个节点名，耗时只与节点数有关。
+        """
+        rows = self._get_read_connection().execute('''
+            WITH RECURSIVE nodes(name) AS (
+                SELECT MIN(node_name) FROM system_data
+                UNION ALL
+                SELECT (SELECT MIN(node_name) FROM system_data WHERE node_name > nodes.name)
+                FROM nodes WHERE nodes.name IS NOT NULL
+            )
+            SELECT name FROM nodes WHERE name IS NOT NULL
+        ''').fetchall()
+        return [row[0] for row in rows]
+    
+    def _iter_node_system_data_batches(self, resolution: str, start_time: datetime, end_time: datetime,
+                                       node_name: str, batch_size: int) -> Iterator[List[tuple]]:
+        """直接以 fetchmany 批次返回查询行（原始数据和汇总数据的列顺序均与 SYSTEM_DATA_BATCH_FIELDS 一致）"""
+        end_ms = TimeUtils.to_epoch_ms(end_time)
+        if resolution == "raw":
+            cursor = self._get_read_connection().execute('''
+                SELECT timestamp, cpu_percent, memory_percent, disk_percent, network_sent, network_recv, process_id, process_name, node_name
+                FROM system_data
+                WHERE node_name = ? AND timestamp BETWEEN ? AND ?
+                ORDER BY timestamp
+            ''', (node_name, TimeUtils.to_epoch_ms(start_time), end_ms))
+        else:
+            table = _rollup_table(resolution)
+            bucket_ms = ROLLUP_RESOLUTIONS[resolution]
+            cursor = self._get_read_connection().execute(f'''
+                SELECT bucket_start,
+                       cpu_percent_sum / sample_count,
+                       memory_percent_sum / sample_count,
+                       disk_percent_sum / sample_count,
+                       CAST(network_sent_last AS INTEGER),
+                       CAST(network_recv_last AS INTEGER),
+                       NULL, NULL, node_name
+                FROM {table}
+                WHERE node_name = ? AND bucket_start BETWEEN ? AND ?
+                ORDER BY bucket_start
+            ''', (node_name, (TimeUtils.to_epoch_ms(start_time) // bucket_ms) * bucket_ms, end_ms))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    
+    def get_system_data(self, start_time: datetime, end_time: datetime, node_name: str = "localhost") -> List[SystemDataRecord]:
         """获取指定时间范围的系统监控数据"""
-        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            # 检查连接状态
+            conn = self._get_read_connection()
             cursor = conn.cursor()
             
             # 执行查询
@@ -167,38 +935,17 @@ class StorageService:
                 FROM system_data
                 WHERE timestamp BETWEEN ? AND ? AND node_name = ?
                 ORDER BY timestamp
-            ''', (start_time.isoformat(), end_time.isoformat(), node_name))
+            ''', (TimeUtils.to_epoch_ms(start_time), TimeUtils.to_epoch_ms(end_time), node_name))
             
             rows = cursor.fetchall()
-            result = [
-                SystemData(
-                    timestamp=datetime.fromisoformat(row[0]),
-                    cpu_percent=row[1],
-                    memory_percent=row[2],
-                    disk_percent=row[3],
-                    network_sent=row[4],
-                    network_recv=row[5],
-                    process_id=row[6],
-                    process_name=row[7],
-                    node_name=row[8]
-                ) for row in rows
-            ]
-            return result
+            return [self._row_to_system_data(row) for row in rows]
         except sqlite3.DatabaseError as e:
             logger.error(f"获取系统数据时数据库错误: {e}")
             logger.info("尝试检查和修复数据库...")
             
-            # 尝试修复数据库
-            if conn:
-                try:
-                    conn.close()
-                except:
-                    pass
-                    
-            # 重新连接并运行完整性检查
+            # 运行完整性检查
             try:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
+                cursor = self._get_read_connection().cursor()
                 cursor.execute('PRAGMA integrity_check')
                 check_result = cursor.fetchone()
                 
@@ -213,19 +960,61 @@ class StorageService:
             except Exception as e2:
                 logger.error(f"修复数据库时发生错误: {e2}")
                 return []
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                except:
-                    pass
+    
+    def save_process_samples(self, samples: List[ProcessSample]):
+        """在单个事务中批量保存被监控进程树的资源样本"""
+        if not samples:
+            return
+        with self._get_connection() as conn:
+            conn.executemany('''
+                INSERT INTO process_samples
+                (timestamp, label, run_id, pid, process_name, cpu_percent, memory_percent, process_count, node_name)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (TimeUtils.to_epoch_ms(sample.timestamp), sample.label, sample.run_id, sample.pid, sample.process_name,
+                 sample.cpu_percent, sample.memory_percent, sample.process_count, sample.node_name)
+                for sample in samples
+            ])
+    
+    def get_process_samples(self, start_time: datetime, end_time: datetime, label: Optional[str] = None,
+                            run_id: Optional[str] = None, node_name: str = "localhost") -> List[ProcessSample]:
+        """获取指定时间范围的进程树资源样本（按时间顺序），可按标签或测试运行ID过滤"""
+        conditions = ['node_name = ?', 'timestamp BETWEEN ? AND ?']
+        params = [node_name, TimeUtils.to_epoch_ms(start_time), TimeUtils.to_epoch_ms(end_time)]
+        if run_id is not None:
+            conditions.append('run_id = ?')
+            params.append(run_id)
+        if label is not None:
+            conditions.append('label = ?')
+            params.append(label)
+        
+        rows = self._get_read_connection().execute(f'''
+            SELECT timestamp, label, run_id, pid, process_name, cpu_percent, memory_percent, process_count, node_name
+            FROM process_samples
+            WHERE {' AND '.join(conditions)}
+            ORDER BY timestamp, id
+        ''', params).fetchall()
+        return [
+            ProcessSample(
+                timestamp=TimeUtils.from_epoch_ms(row[0]),
+                label=row[1],
+                run_id=row[2],
+                pid=row[3],
+                process_name=row[4],
+                cpu_percent=row[5],
+                memory_percent=row[6],
+                process_count=row[7],
+                node_name=row[8]
+            )
+            for row in rows
+        ]
     
     def get_running_tests(self) -> List[TestRun]:
         """获取所有正在运行的测试（只返回真正活跃的测试）"""
         current_time = datetime.now()
         cutoff_time = current_time - timedelta(hours=1)  # 1小时前
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT run_id, start_time, end_time, status, total_tests, passed_tests, failed_tests, skipped_tests, test_path, report_path, node_name, exit_code
@@ -233,7 +1022,7 @@ class StorageService:
                 WHERE status = 'running'
                   AND start_time > ?
                 ORDER BY start_time DESC
-            ''', (cutoff_time.isoformat(),))
+            ''', (TimeUtils.to_epoch_ms(cutoff_time),))
             
             rows = cursor.fetchall()
             active_tests = []
@@ -241,8 +1030,8 @@ class StorageService:
             for row in rows:
                 test_run = TestRun(
                     run_id=row[0],
-                    start_time=datetime.fromisoformat(row[1]),
-                    end_time=datetime.fromisoformat(row[2]) if row[2] else None,
+                    start_time=TimeUtils.from_epoch_ms(row[1]),
+                    end_time=TimeUtils.from_epoch_ms(row[2]),
                     status=row[3],
                     total_tests=row[4],
                     passed_tests=row[5],
@@ -254,46 +1043,52 @@ class StorageService:
                     exit_code=row[11]
                 )
                 
-                # 进一步过滤：只保留有实际测试进展的测试
-                has_progress = (test_run.total_tests > 0 or 
-                              test_run.passed_tests > 0 or 
-                              test_run.failed_tests > 0 or 
-                              test_run.skipped_tests > 0)
-                
-                if has_progress or (current_time - test_run.start_time).total_seconds() < 600:  # 10分钟内开始的
+                # 进一步过滤：只保留有实际测试进展或10分钟内开始的测试
+                if self._is_active_test(test_run, current_time):
                     active_tests.append(test_run)
             
             logger.debug(f"筛选后的活跃测试数量: {len(active_tests)}")
             return active_tests
     
     def save_test_run(self, test_run: TestRun):
-        """保存测试运行数据"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO test_runs 
-                (run_id, start_time, end_time, status, total_tests, passed_tests, failed_tests, skipped_tests, test_path, report_path, node_name, exit_code, execution_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                test_run.run_id,
-                test_run.start_time.isoformat(),
-                test_run.end_time.isoformat() if test_run.end_time else None,
-                test_run.status,
-                test_run.total_tests,
-                test_run.passed_tests,
-                test_run.failed_tests,
-                test_run.skipped_tests,
-                test_run.test_path,
-                test_run.report_path,
-                test_run.node_name,
-                test_run.exit_code,
-                test_run.execution_type
-            ))
-            conn.commit()
+        """保存测试运行数据（同时写入缓存）"""
+        row = (
+            test_run.run_id,
+            TimeUtils.to_epoch_ms(test_run.start_time),
+            TimeUtils.to_epoch_ms(test_run.end_time),
+            test_run.status,
+            test_run.total_tests,
+            test_run.passed_tests,
+            test_run.failed_tests,
+            test_run.skipped_tests,
+            test_run.test_path,
+            test_run.report_path,
+            test_run.node_name,
+            test_run.exit_code,
+            test_run.execution_type
+        )
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO test_runs 
+                    (run_id, start_time, end_time, status, total_tests, passed_tests, failed_tests, skipped_tests, test_path, report_path, node_name, exit_code, execution_type)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', row)
+                conn.commit()
+        except Exception:
+            self._test_run_cache.invalidate(test_run.run_id)
+            raise
+        self._test_run_cache.put(test_run.run_id, row)
     
     def get_test_run(self, run_id: str) -> Optional[TestRun]:
-        """获取指定测试运行数据"""
-        with sqlite3.connect(self.db_path) as conn:
+        """获取指定测试运行数据（优先从缓存读取，每次返回新的 TestRun 对象）"""
+        row = self._test_run_cache.get(run_id)
+        if row is not None:
+            return self._row_to_test_run(row)
+        
+        generation = self._test_run_cache.generation
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT run_id, start_time, end_time, status, total_tests, passed_tests, failed_tests, skipped_tests, test_path, report_path, node_name, exit_code, execution_type
@@ -303,46 +1098,155 @@ class StorageService:
             
             row = cursor.fetchone()
             if row:
-                return TestRun(
-                    run_id=row[0],
-                    start_time=datetime.fromisoformat(row[1]),
-                    end_time=datetime.fromisoformat(row[2]) if row[2] else None,
-                    status=row[3],
-                    total_tests=row[4],
-                    passed_tests=row[5],
-                    failed_tests=row[6],
-                    skipped_tests=row[7],
-                    test_path=row[8],
-                    report_path=row[9],
-                    node_name=row[10],
-                    exit_code=row[11],
-                    execution_type=row[12] if row[12] else "local"
-                )
+                self._test_run_cache.put(run_id, row, generation)
+                return self._row_to_test_run(row)
             return None
     
-    def save_test_result(self, result: TestResult):
-        """保存测试结果"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+    def get_test_run_cache_stats(self) -> Dict[str, int]:
+        """获取测试运行缓存的大小、命中、未命中和淘汰统计"""
+        return self._test_run_cache.get_stats()
+    
+    def increment_test_counters(self, run_id: str, passed: int = 0, failed: int = 0,
+                                skipped: int = 0) -> Optional[TestRun]:
+        """在单条 UPDATE 语句中原子地累加通过/失败/跳过计数，返回更新后的测试运行数据
+        
+        可一次提交多条结果的批量增量；本地和远程执行并发更新同一记录时不会丢失计数。
+        记录不存在时返回 None。
+        """
+        update_sql = f'''
+            UPDATE test_runs
+            SET passed_tests = passed_tests + ?,
+                failed_tests = failed_tests + ?,
+                skipped_tests = skipped_tests + ?,
+                total_tests = passed_tests + failed_tests + skipped_tests + ?
+            WHERE run_id = ?
+        '''
+        params = (passed, failed, skipped, passed + failed + skipped, run_id)
+        
+        with self._get_connection() as conn:
+            if _SUPPORTS_RETURNING:
+                row = conn.execute(f"{update_sql} RETURNING {_TEST_RUN_COLUMNS}", params).fetchone()
+            else:
+                # SQLite 3.35 之前不支持 RETURNING，在同一事务内回读更新后的行
+                if conn.execute(update_sql, params).rowcount == 0:
+                    return None
+                row = conn.execute(
+                    f"SELECT {_TEST_RUN_COLUMNS} FROM test_runs WHERE run_id = ?", (run_id,)
+                ).fetchone()
+        if not row:
+            return None
+        self._test_run_cache.put(run_id, row)
+        return self._row_to_test_run(row)
+    
+    @staticmethod
+    def _row_to_test_run(row) -> TestRun:
+        """将按 _TEST_RUN_COLUMNS 顺序查询的行转换为 TestRun（数据来自数据库，跳过校验）"""
+        return TestRun.model_construct(
+            run_id=row[0],
+            start_time=TimeUtils.from_epoch_ms(row[1]),
+            end_time=TimeUtils.from_epoch_ms(row[2]),
+            status=row[3],
+            total_tests=row[4],
+            passed_tests=row[5],
+            failed_tests=row[6],
+            skipped_tests=row[7],
+            test_path=row[8],
+            report_path=row[9],
+            node_name=row[10],
+            exit_code=row[11],
+            execution_type=row[12] if row[12] else "local"
+        )
+    
+    def save_test_results(self, results: List[TestResult]):
+        """在单个事务中批量保存测试用例结果"""
+        if not results:
+            return
+        with self._get_connection() as conn:
+            conn.executemany('''
                 INSERT INTO test_results 
                 (run_id, test_id, name, status, duration, message, traceback, timestamp)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                result.test_id,
-                result.test_id,
-                result.name,
-                result.status,
-                result.duration,
-                result.message,
-                result.traceback,
-                result.timestamp.isoformat()
-            ))
-            conn.commit()
+            ''', [
+                (
+                    result.run_id,
+                    result.test_id,
+                    result.name,
+                    result.status,
+                    result.duration,
+                    result.message,
+                    result.traceback,
+                    TimeUtils.to_epoch_ms(result.timestamp)
+                )
+                for result in results
+            ])
+    
+    def update_test_results(self, run_id: str, durations: Optional[Dict[str, float]] = None,
+                            messages: Optional[Dict[str, str]] = None):
+        """按 nodeid 批量更新指定测试运行中用例的耗时和失败信息"""
+        with self._get_connection() as conn:
+            if durations:
+                conn.executemany(
+                    'UPDATE test_results SET duration = ? WHERE run_id = ? AND test_id = ?',
+                    [(duration, run_id, test_id) for test_id, duration in durations.items()]
+                )
+            if messages:
+                conn.executemany(
+                    'UPDATE test_results SET message = ? WHERE run_id = ? AND test_id = ?',
+                    [(message, run_id, test_id) for test_id, message in messages.items()]
+                )
+    
+    @staticmethod
+    def _row_to_test_result(row) -> TestResult:
+        """将按 _TEST_RESULT_COLUMNS 顺序查询的行转换为 TestResult"""
+        return TestResult(
+            run_id=row[0],
+            test_id=row[1],
+            name=row[2],
+            status=row[3],
+            duration=row[4],
+            message=row[5],
+            traceback=row[6],
+            timestamp=TimeUtils.from_epoch_ms(row[7])
+        )
+    
+    def get_test_case_history(self, test_id: str, limit: int = 100, start_time: Optional[datetime] = None,
+                              end_time: Optional[datetime] = None) -> List[TestResult]:
+        """获取指定用例（nodeid）最近的执行结果和耗时，按时间倒序"""
+        conditions = ["test_id = ?"]
+        params: List[Any] = [test_id]
+        if start_time:
+            conditions.append("timestamp >= ?")
+            params.append(TimeUtils.to_epoch_ms(start_time))
+        if end_time:
+            conditions.append("timestamp <= ?")
+            params.append(TimeUtils.to_epoch_ms(end_time))
+        params.append(limit)
+        
+        with self._get_read_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT {_TEST_RESULT_COLUMNS}
+                FROM test_results
+                WHERE {' AND '.join(conditions)}
+                ORDER BY timestamp DESC
+                LIMIT ?
+            ''', params).fetchall()
+        return [self._row_to_test_result(row) for row in rows]
+    
+    def get_slowest_tests(self, run_id: str, limit: int = 10) -> List[TestResult]:
+        """获取指定测试运行中耗时最长的用例"""
+        with self._get_read_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT {_TEST_RESULT_COLUMNS}
+                FROM test_results
+                WHERE run_id = ?
+                ORDER BY duration DESC
+                LIMIT ?
+            ''', (run_id, limit)).fetchall()
+        return [self._row_to_test_result(row) for row in rows]
     
     def save_test_queue_item(self, item: TestQueueItem):
         """保存测试队列项"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO test_queue 
@@ -353,13 +1257,13 @@ class StorageService:
                 item.test_path,
                 item.priority,
                 item.status,
-                item.created_at.isoformat()
+                TimeUtils.to_epoch_ms(item.created_at)
             ))
             conn.commit()
     
     def update_test_queue_item(self, queue_id: str, status: str):
         """更新测试队列项状态"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE test_queue
@@ -370,7 +1274,7 @@ class StorageService:
     
     def get_test_queue(self) -> List[TestQueueItem]:
         """获取测试队列"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT queue_id, test_path, priority, status, created_at
@@ -385,50 +1289,231 @@ class StorageService:
                     test_path=row[1],
                     priority=row[2],
                     status=row[3],
-                    created_at=datetime.fromisoformat(row[4])
+                    created_at=TimeUtils.from_epoch_ms(row[4])
                 ) for row in rows
             ]
     
-    def save_test_log(self, log: TestLog):
-        """保存测试日志"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+    def save_test_logs(self, logs: List[TestLog]):
+        """在单个事务中批量保存测试日志"""
+        if not logs:
+            return
+        if settings.LOG_STORE == "blocks":
+            # 全文索引与日志块在同一事务中写入，保持同步
+            self.log_blocks.append(logs, self._index_test_logs)
+            return
+        with self._get_connection() as conn:
+            # 预先分配连续的日志ID，全文索引以同一ID作为 rowid
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            first_id = reserve_log_ids(conn, len(logs))
+            entries = list(enumerate(logs, first_id))
+            conn.executemany('''
                 INSERT INTO test_logs 
-                (run_id, timestamp, level, message)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                log.run_id,
-                log.timestamp.isoformat(),
-                log.level,
-                log.message
-            ))
-            conn.commit()
+                (id, run_id, timestamp, level, message)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(log_id, log.run_id, TimeUtils.to_epoch_ms(log.timestamp), log.level, log.message) for log_id, log in entries])
+            # 全文索引与日志在同一事务中写入，保持同步
+            self._index_test_logs(conn, entries)
     
-    def get_test_logs(self, run_id: str) -> List[TestLog]:
-        """获取指定测试运行的日志"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT run_id, timestamp, level, message
+    def close_test_logs(self, run_id: Optional[str] = None):
+        """测试运行（未指定时为全部）的日志已写完，将内存中未写满的日志块写入数据库"""
+        self.log_blocks.close_run(run_id)
+    
+    def _search_enabled(self) -> bool:
+        return settings.LOG_SEARCH_ENABLED and _FTS_TOKENIZER is not None
+    
+    def _index_test_logs(self, conn: sqlite3.Connection, entries: List[Tuple[int, TestLog]], force: bool = False):
+        """将 (日志ID, 日志) 写入全文索引，日志ID作为索引行的 rowid"""
+        # 迁移重建索引时不受 LOG_SEARCH_ENABLED 影响，与建表时的回填一致
+        if not force and not self._search_enabled():
+            return
+        conn.executemany(
+            'INSERT INTO test_logs_fts (rowid, message, run_id, level, timestamp) VALUES (?, ?, ?, ?, ?)',
+            [(log_id, log.message, log.run_id, log.level, TimeUtils.to_epoch_ms(log.timestamp)) for log_id, log in entries]
+        )
+    
+    @staticmethod
+    def _fts_phrase(text: str) -> str:
+        """将用户输入转换为 FTS5 短语查询（按字面匹配，不解析查询语法）"""
+        return '"' + text.replace('"', '""') + '"'
+    
+    def search_test_logs(self, query: str, run_id: Optional[str] = None, levels: Optional[List[str]] = None,
+                         start_time: Optional[datetime] = None, end_time: Optional[datetime] = None,
+                         limit: int = 50, offset: int = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """全文搜索测试日志，按相关度排序
+        
+        返回 (结果列表, 是否还有更多结果)。每条结果包含 run_id、timestamp、level、message
+        以及整行 HTML 转义后、命中部分用 <mark> 标记的 snippet。
+        trigram 分词无法匹配不足 3 个字符的关键字（如“失败”），此时改为按子串扫描，结果按时间倒序。
+        """
+        query = query.strip()
+        if not query:
+            return [], False
+        if not self._search_enabled():
+            raise RuntimeError("日志全文搜索不可用（未启用或当前 SQLite 不支持 FTS5）")
+        if _FTS_TOKENIZER == "trigram" and len(query) < 3:
+            return self._scan_test_logs(query, run_id, levels, start_time, end_time, limit, offset)
+        
+        match = f"message : {self._fts_phrase(query)}"
+        if run_id:
+            match += f" AND run_id : {self._fts_phrase(run_id)}"
+        conditions = ["test_logs_fts MATCH ?"]
+        params: List[Any] = [match]
+        if run_id:
+            # run_id 的短语匹配可能命中包含该字符串的其他ID，这里再精确过滤一次
+            conditions.append("run_id = ?")
+            params.append(run_id)
+        if levels:
+            conditions.append(f"level IN ({', '.join('?' * len(levels))})")
+            params.extend(levels)
+        if start_time:
+            conditions.append("timestamp >= ?")
+            params.append(TimeUtils.to_epoch_ms(start_time))
+        if end_time:
+            conditions.append("timestamp <= ?")
+            params.append(TimeUtils.to_epoch_ms(end_time))
+        params.extend([limit + 1, offset])
+        
+        with self._get_read_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT run_id, timestamp, level, message,
+                       highlight(test_logs_fts, 0, '{_SNIPPET_START}', '{_SNIPPET_END}')
+                FROM test_logs_fts
+                WHERE {' AND '.join(conditions)}
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+            ''', params).fetchall()
+        
+        results = [
+            {
+                "run_id": row[0],
+                "timestamp": TimeUtils.from_epoch_ms(row[1]),
+                "level": row[2],
+                "message": row[3],
+                "snippet": html.escape(row[4]).replace(_SNIPPET_START, '<mark>').replace(_SNIPPET_END, '</mark>')
+            }
+            for row in rows[:limit]
+        ]
+        return results, len(rows) > limit
+    
+    def _scan_test_logs(self, query: str, run_id: Optional[str], levels: Optional[List[str]],
+                        start_time: Optional[datetime], end_time: Optional[datetime],
+                        limit: int, offset: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """不经全文索引，在逐行日志和压缩块中按子串查找，按运行ID和时间范围缩小扫描范围"""
+        start_ms = TimeUtils.to_epoch_ms(start_time) if start_time else None
+        end_ms = TimeUtils.to_epoch_ms(end_time) if end_time else None
+        needed = offset + limit + 1
+        
+        conditions = ["instr(message, ?) > 0"]
+        params: List[Any] = [query]
+        if run_id:
+            conditions.append("run_id = ?")
+            params.append(run_id)
+        if levels:
+            conditions.append(f"level IN ({', '.join('?' * len(levels))})")
+            params.extend(levels)
+        if start_ms is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start_ms)
+        if end_ms is not None:
+            conditions.append("timestamp <= ?")
+            params.append(end_ms)
+        params.append(needed)
+        
+        with self._get_read_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT timestamp, run_id, level, message
                 FROM test_logs
-                WHERE run_id = ?
-                ORDER BY timestamp
-            ''', (run_id,))
-            
-            rows = cursor.fetchall()
-            return [
-                TestLog(
-                    run_id=row[0],
-                    timestamp=datetime.fromisoformat(row[1]),
-                    level=row[2],
-                    message=row[3]
-                ) for row in rows
-            ]
+                WHERE {' AND '.join(conditions)}
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            ''', params).fetchall()
+        rows.extend(self.log_blocks.search_logs(query, run_id, levels, start_ms, end_ms, needed))
+        rows.sort(key=lambda row: row[0], reverse=True)
+        rows = rows[offset:needed]
+        
+        marked = f"<mark>{html.escape(query)}</mark>"
+        results = [
+            {
+                "run_id": row[1],
+                "timestamp": TimeUtils.from_epoch_ms(row[0]),
+                "level": row[2],
+                "message": row[3],
+                "snippet": marked.join(html.escape(part) for part in row[3].split(query))
+            }
+            for row in rows[:limit]
+        ]
+        return results, len(rows) > limit
+    
+    def iter_test_logs(self, run_id: str, start_line: int = 0, count: Optional[int] = None,
+                       levels: Optional[List[str]] = None) -> Iterator[TestLogRecord]:
+        """按行号顺序流式读取指定测试运行的日志
+        
+        压缩块存储模式下按块顺序解压读取；该运行没有块数据时（如切换存储模式前写入的日志）
+        回退到逐行存储的 test_logs 表。
+        """
+        if settings.LOG_STORE == "blocks" and self.log_blocks.count_lines(run_id):
+            yield from self.log_blocks.iter_logs(run_id, start_line, count, levels)
+            return
+        
+        query = '''
+            SELECT run_id, timestamp, level, message
+            FROM test_logs
+            WHERE run_id = ?
+            ORDER BY timestamp, id
+            LIMIT ? OFFSET ?
+        '''
+        params: List[Any] = [run_id, -1 if count is None else count, start_line]
+        if levels:
+            query = f"SELECT * FROM ({query}) WHERE level IN ({', '.join('?' * len(levels))})"
+            params.extend(levels)
+        
+        cursor = self._get_read_connection().execute(query, params)
+        for row in self._iter_rows(cursor):
+            yield TestLogRecord(row[0], TimeUtils.from_epoch_ms(row[1]), row[2], row[3])
+    
+    def iter_test_logs_in_range(self, run_id: str, start_time: Optional[datetime] = None,
+                                end_time: Optional[datetime] = None) -> Iterator[TestLogRecord]:
+        """按时间顺序流式读取指定测试运行在时间范围内的日志
+        
+        逐行存储模式下沿 (run_id, timestamp) 索引按范围扫描并用 fetchmany 分批读取；
+        压缩块存储模式下按块顺序解压并过滤时间戳。
+        """
+        start_ms = TimeUtils.to_epoch_ms(start_time) if start_time else None
+        end_ms = TimeUtils.to_epoch_ms(end_time) if end_time else None
+        if settings.LOG_STORE == "blocks" and self.log_blocks.count_lines(run_id):
+            yield from self.log_blocks.iter_logs_in_range(run_id, start_ms, end_ms)
+            return
+        
+        conditions = ["run_id = ?"]
+        params: List[Any] = [run_id]
+        if start_ms is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start_ms)
+        if end_ms is not None:
+            conditions.append("timestamp <= ?")
+            params.append(end_ms)
+        cursor = self._get_read_connection().execute(f'''
+            SELECT run_id, timestamp, level, message
+            FROM test_logs
+            WHERE {' AND '.join(conditions)}
+            ORDER BY timestamp, id
+        ''', params)
+        for row in self._iter_rows(cursor):
+            yield TestLogRecord(row[0], TimeUtils.from_epoch_ms(row[1]), row[2], row[3])
+    
+    def count_test_logs(self, run_id: str) -> int:
+        """获取指定测试运行的日志行数"""
+        if settings.LOG_STORE == "blocks":
+            block_lines = self.log_blocks.count_lines(run_id)
+            if block_lines:
+                return block_lines
+        with self._get_read_connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM test_logs WHERE run_id = ?', (run_id,)).fetchone()[0]
     
     def get_all_test_runs(self, limit: int = 100) -> List[TestRun]:
         """获取所有测试运行记录"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT run_id, start_time, end_time, status, total_tests, passed_tests, failed_tests, skipped_tests, test_path, report_path, node_name, exit_code, execution_type
@@ -441,8 +1526,8 @@ class StorageService:
             return [
                 TestRun(
                     run_id=row[0],
-                    start_time=datetime.fromisoformat(row[1]),
-                    end_time=datetime.fromisoformat(row[2]) if row[2] else None,
+                    start_time=TimeUtils.from_epoch_ms(row[1]),
+                    end_time=TimeUtils.from_epoch_ms(row[2]),
                     status=row[3],
                     total_tests=row[4],
                     passed_tests=row[5],
@@ -459,21 +1544,21 @@ class StorageService:
     
     def get_test_runs_by_time_range(self, start_time: datetime, end_time: datetime) -> List[TestRun]:
         """根据时间范围获取测试运行记录"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT run_id, start_time, end_time, status, total_tests, passed_tests, failed_tests, skipped_tests, test_path, report_path, node_name, exit_code, execution_type
                 FROM test_runs
                 WHERE start_time BETWEEN ? AND ?
                 ORDER BY start_time ASC
-            ''', (start_time.isoformat(), end_time.isoformat()))
+            ''', (TimeUtils.to_epoch_ms(start_time), TimeUtils.to_epoch_ms(end_time)))
             
             rows = cursor.fetchall()
             return [
                 TestRun(
                     run_id=row[0],
-                    start_time=datetime.fromisoformat(row[1]),
-                    end_time=datetime.fromisoformat(row[2]) if row[2] else None,
+                    start_time=TimeUtils.from_epoch_ms(row[1]),
+                    end_time=TimeUtils.from_epoch_ms(row[2]),
                     status=row[3],
                     total_tests=row[4],
                     passed_tests=row[5],
@@ -488,18 +1573,125 @@ class StorageService:
                 for row in rows
             ]
     
+    def get_test_runs_page(self, page_size: int = 50, cursor: Optional[str] = None,
+                           status: Optional[str] = None, node_name: Optional[str] = None,
+                           execution_type: Optional[str] = None,
+                           start_time: Optional[datetime] = None, end_time: Optional[datetime] = None,
+                           ended_after: Optional[datetime] = None,
+                           descending: bool = True) -> Tuple[List[TestRun], Optional[str]]:
+        """按 (start_time, run_id) 键集分页获取测试运行记录
+        
+        返回 (当前页记录, 下一页游标)，没有更多数据时游标为 None。
+        每页通过索引定位到游标位置后顺序读取，耗时与翻页深度无关。
+        """
+        conditions = []
+        params: List[Any] = []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if node_name:
+            conditions.append("node_name = ?")
+            params.append(node_name)
+        if execution_type:
+            conditions.append("execution_type = ?")
+            params.append(execution_type)
+        if start_time:
+            conditions.append("start_time >= ?")
+            params.append(TimeUtils.to_epoch_ms(start_time))
+        if end_time:
+            conditions.append("start_time <= ?")
+            params.append(TimeUtils.to_epoch_ms(end_time))
+        if ended_after:
+            # end_time 包含在 (start_time, run_id, end_time) 索引中，过滤时无需回表
+            conditions.append("(end_time IS NULL OR end_time >= ?)")
+            params.append(TimeUtils.to_epoch_ms(ended_after))
+        if cursor:
+            conditions.append(f"(start_time, run_id) {'<' if descending else '>'} (?, ?)")
+            params.extend(self._decode_test_run_cursor(cursor))
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "DESC" if descending else "ASC"
+        # 多取一行用于判断是否还有下一页
+        params.append(page_size + 1)
+        
+        with self._get_read_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT {_TEST_RUN_COLUMNS}
+                FROM test_runs
+                {where}
+                ORDER BY start_time {order}, run_id {order}
+                LIMIT ?
+            ''', params).fetchall()
+        
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = self._encode_test_run_cursor(rows[-1][1], rows[-1][0])
+        return [self._row_to_test_run(row) for row in rows], next_cursor
+    
+    def get_test_run_trend(self, start_time: datetime, end_time: datetime, bucket_seconds: int,
+                           statuses: Tuple[str, ...] = ('completed', 'failed', 'stopped')) -> List[Dict[str, Any]]:
+        """按时间桶聚合测试运行统计（在 SQL 中 GROUP BY 完成，不加载单条记录）
+        
+        时间桶从 start_time 起按 bucket_seconds 划分，返回每个桶的运行次数、通过率、
+        失败用例数、失败运行数和平均耗时；没有运行记录的桶对应指标为 None。
+        只统计状态在 statuses 中且有用例的运行。
+        """
+        start_ms = TimeUtils.to_epoch_ms(start_time)
+        end_ms = TimeUtils.to_epoch_ms(end_time)
+        bucket_ms = int(bucket_seconds * 1000)
+        status_placeholders = ', '.join('?' * len(statuses))
+        
+        with self._get_snapshot_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT (start_time - ?) / ? AS bucket,
+                       COUNT(*),
+                       SUM(passed_tests),
+                       SUM(total_tests),
+                       SUM(failed_tests),
+                       SUM(status = 'failed'),
+                       AVG(end_time - start_time)
+                FROM test_runs
+                WHERE start_time >= ? AND start_time < ?
+                  AND status IN ({status_placeholders})
+                  AND total_tests > 0
+                GROUP BY bucket
+            ''', (start_ms, bucket_ms, start_ms, end_ms, *statuses)).fetchall()
+        
+        buckets = {row[0]: row for row in rows}
+        bucket_count = max(0, -(-(end_ms - start_ms) // bucket_ms))
+        trend = []
+        for index in range(bucket_count):
+            row = buckets.get(index)
+            trend.append({
+                "bucket_start": TimeUtils.from_epoch_ms(start_ms + index * bucket_ms),
+                "run_count": row[1] if row else 0,
+                "pass_rate": round(row[2] * 100.0 / row[3], 2) if row else None,
+                "passed_tests": row[2] if row else 0,
+                "total_tests": row[3] if row else 0,
+                "failed_tests": row[4] if row else 0,
+                "failed_runs": row[5] if row else 0,
+                "avg_duration": row[6] / 1000.0 if row and row[6] is not None else None
+            })
+        return trend
+    
     def delete_test_run(self, run_id: str) -> bool:
         """删除指定测试运行记录"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # 删除相关的测试日志
+                # 删除相关的测试日志（全文索引行按日志ID定位，需在日志之前删除）
+                self._delete_log_index(cursor, run_id)
                 cursor.execute('DELETE FROM test_logs WHERE run_id = ?', (run_id,))
+                cursor.execute('DELETE FROM test_log_blocks WHERE run_id = ?', (run_id,))
                 
                 # 删除相关的测试结果
                 cursor.execute('DELETE FROM test_results WHERE run_id = ?', (run_id,))
                 
+                # 删除相关的进程树资源数据
+                cursor.execute('DELETE FROM process_samples WHERE run_id = ?', (run_id,))
+                
                 # 删除测试运行记录
                 cursor.execute('DELETE FROM test_runs WHERE run_id = ?', (run_id,))
                 
@@ -508,31 +1700,65 @@ class StorageService:
         except Exception as e:
             logger.error(f"删除测试运行记录失败: {str(e)}")
             return False
+        finally:
+            # 在删除提交后失效缓存，避免并发读取把已删除的记录重新写回缓存
+            self._test_run_cache.invalidate(run_id)
     
     def delete_test_logs(self, run_id: str) -> bool:
         """删除指定测试运行的所有日志"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
+                self._delete_log_index(cursor, run_id)
                 cursor.execute('DELETE FROM test_logs WHERE run_id = ?', (run_id,))
+                cursor.execute('DELETE FROM test_log_blocks WHERE run_id = ?', (run_id,))
                 conn.commit()
                 return True
         except Exception as e:
             logger.error(f"删除测试日志失败: {str(e)}")
             return False
     
+    def _delete_log_index(self, cursor: sqlite3.Cursor, run_id: Optional[str] = None):
+        """删除全文索引中指定测试运行（未指定时为全部）的日志，须在删除日志行和日志块之前调用
+
+        同时丢弃内存中尚未写入的尾块。
+        """
+        tails = self.log_blocks.discard_run(run_id)
+        if _FTS_TOKENIZER is None:
+            return
+        if run_id is None:
+            cursor.execute('DELETE FROM test_logs_fts')
+            return
+        log_ids = cursor.execute('SELECT id FROM test_logs WHERE run_id = ?', (run_id,)).fetchall()
+        blocks = cursor.execute('SELECT first_rowid, line_count FROM test_log_blocks WHERE run_id = ?', (run_id,)).fetchall()
+        self._delete_index_rows(cursor, [log_id for log_id, in log_ids], blocks + tails)
+    
+    @staticmethod
+    def _delete_index_rows(cursor: sqlite3.Cursor, log_ids: List[int], blocks: List[Tuple[int, int]]):
+        """按 rowid 删除全文索引行：log_ids 为逐行存储的日志ID，blocks 为日志块的 (first_rowid, line_count)"""
+        cursor.executemany('DELETE FROM test_logs_fts WHERE rowid = ?', [(log_id,) for log_id in log_ids])
+        cursor.executemany(
+            'DELETE FROM test_logs_fts WHERE rowid BETWEEN ? AND ?',
+            [(first_rowid, first_rowid + line_count - 1) for first_rowid, line_count in blocks]
+        )
+    
     def delete_all_test_runs(self) -> bool:
         """删除所有测试运行记录、日志和结果"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
                 # 删除所有测试日志
                 cursor.execute('DELETE FROM test_logs')
+                cursor.execute('DELETE FROM test_log_blocks')
+                self._delete_log_index(cursor)
                 
                 # 删除所有测试结果
                 cursor.execute('DELETE FROM test_results')
                 
+                # 删除与测试运行关联的进程树资源数据
+                cursor.execute('DELETE FROM process_samples WHERE run_id IS NOT NULL')
+                
                 # 删除所有测试运行记录
                 cursor.execute('DELETE FROM test_runs')
                 
@@ -541,34 +1767,104 @@ class StorageService:
         except Exception as e:
             logger.error(f"删除所有测试运行记录失败: {str(e)}")
             return False
+        finally:
+            self._test_run_cache.invalidate()
     
-    def export_to_csv(self, table_name: str, file_path: str, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None):
-        """导出数据到CSV文件"""
-        import csv
+    def delete_expired_rows(self, table_name: str, time_column: str, cutoff_time: datetime,
+                            condition: str = "", params: tuple = (), key_columns: str = "rowid",
+                            batch_size: int = 5000, pause: float = 0.0) -> int:
+        """分批删除 time_column 早于 cutoff_time 的行，返回删除的总行数
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            query = f"SELECT * FROM {table_name}"
-            params = []
-            
-            if start_time and end_time:
-                query += " WHERE timestamp BETWEEN ? AND ?"
-                params.extend([start_time.isoformat(), end_time.isoformat()])
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            headers = [description[0] for description in cursor.description]
-            
-            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(headers)
-                writer.writerows(rows)
+        每批单独提交，避免长时间持有写锁阻塞采样和日志写入。
+        key_columns 为定位行的主键列（WITHOUT ROWID 表需传入主键列）。
+        """
+        where = f"{time_column} < ?"
+        if condition:
+            where += f" AND ({condition})"
+        query = f'''
+            DELETE FROM {table_name}
+            WHERE ({key_columns}) IN (
+                SELECT {key_columns} FROM {table_name} WHERE {where} LIMIT ?
+            )
+        '''
+        # 日志行和日志块需要同时删除对应的全文索引行
+        with_log_index = table_name in ('test_logs', 'test_log_blocks') and _FTS_TOKENIZER is not None
+        if with_log_index and table_name == 'test_log_blocks':
+            # 每个块对应最多 LOG_BLOCK_LINES 条索引行，按块内行数缩小批次，使每批删除的索引行数与 batch_size 相当
+            batch_size = max(1, batch_size // settings.LOG_BLOCK_LINES)
+        query_params = (TimeUtils.to_epoch_ms(cutoff_time),) + tuple(params) + (batch_size,)
+        
+        total_deleted = 0
+        while True:
+            with self._get_connection() as conn:
+                if with_log_index:
+                    deleted = self._delete_expired_logs(conn, table_name, where, query_params)
+                else:
+                    deleted = conn.execute(query, query_params).rowcount
+            total_deleted += deleted
+            if deleted < batch_size:
+                return total_deleted
+            if pause:
+                time.sleep(pause)
+    
+    def _delete_expired_logs(self, conn: sqlite3.Connection, table_name: str, where: str, params: tuple) -> int:
+        """删除一批过期日志行（或日志块），并在同一事务中按 rowid 删除对应的全文索引行，返回删除的行（块）数"""
+        if table_name == 'test_logs':
+            log_ids = [row[0] for row in conn.execute(f'SELECT id FROM test_logs WHERE {where} LIMIT ?', params)]
+            self._delete_index_rows(conn, log_ids, [])
+            conn.executemany('DELETE FROM test_logs WHERE id = ?', [(log_id,) for log_id in log_ids])
+            return len(log_ids)
+        
+        rows = conn.execute(
+            f'SELECT rowid, first_rowid, line_count FROM test_log_blocks WHERE {where} LIMIT ?', params
+        ).fetchall()
+        self._delete_index_rows(conn, [], [row[1:] for row in rows])
+        conn.executemany('DELETE FROM test_log_blocks WHERE rowid = ?', [(row[0],) for row in rows])
+        return len(rows)
+    
+    def get_database_size(self) -> Dict[str, int]:
+        """获取数据库页数、空闲页数和总大小（字节）"""
+        conn = self._get_connection()
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        freelist_count = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return {
+            "page_size": page_size,
+            "page_count": page_count,
+            "freelist_count": freelist_count,
+            "size_bytes": page_size * page_count
+        }
+    
+    def incremental_vacuum(self, pages: int = 0) -> int:
+        """回收空闲页（pages 为 0 时回收全部），返回回收的页数"""
+        conn = self._get_connection()
+        before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        # incremental_vacuum 每执行一步回收一页且不返回结果行，execute() 只会执行第一步，
+        # 需用 executescript 将语句执行到底
+        conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+        # 截断 WAL 文件，使回收的空间真正归还给文件系统
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+        after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return before - after
+    
+    def export_to_csv(self, table_name: str, file_path: str, start_time: Optional[datetime] = None,
+                      end_time: Optional[datetime] = None, compress: bool = False) -> int:
+        """流式导出数据表到CSV文件（compress 为 True 时输出 gzip），返回导出的行数"""
+        query = f"SELECT * FROM {table_name}"
+        params = []
+        
+        if start_time and end_time:
+            query += " WHERE timestamp BETWEEN ? AND ?"
+            params.extend([TimeUtils.to_epoch_ms(start_time), TimeUtils.to_epoch_ms(end_time)])
+        
+        cursor = self._get_read_connection().execute(query, params)
+        headers = [description[0] for description in cursor.description]
+        return ExportUtils.write_csv(file_path, headers, self._iter_rows(cursor), compress)
     
     def save_remote_machine(self, machine) -> bool:
         """保存远程机器配置"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO remote_machines 
@@ -596,7 +1892,7 @@ class StorageService:
     
     def get_remote_machine(self, machine_id: str):
         """获取指定远程机器配置"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT machine_id, name, host, port, platform, username, password, private_key_path, description, status, created_at, updated_at
@@ -627,7 +1923,7 @@ class StorageService:
         """获取所有远程机器配置"""
         from app.models import RemoteMachine
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT machine_id, name, host, port, platform, username, password, private_key_path, description, status, created_at, updated_at
@@ -656,7 +1952,7 @@ class StorageService:
     def delete_remote_machine(self, machine_id: str) -> bool:
         """删除远程机器配置"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM remote_machines WHERE machine_id = ?', (machine_id,))
                 conn.commit()
@@ -667,7 +1963,7 @@ class StorageService:
     
     def check_machine_exists(self, host: str, port: int, username: str) -> bool:
         """检查机器配置是否已存在"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT COUNT(*) FROM remote_machines
@@ -680,7 +1976,7 @@ class StorageService:
     def update_machine_status(self, machine_id: str, status: str) -> bool:
         """更新机器状态"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE remote_machines
@@ -693,5 +1989,15 @@ class StorageService:
             logger.error(f"更新机器状态失败: {str(e)}")
             return False
 
+def create_storage_service() -> StorageBackend:
+    """根据 settings.STORAGE_BACKEND 创建存储后端"""
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "sqlite":
+        return StorageService()
+    if backend == "memory":
+        from app.services.memory_storage import MemoryStorageService
+        return MemoryStorageService()
+    raise ValueError(f"不支持的存储后端: {settings.STORAGE_BACKEND}")
+
 # 创建全局存储服务实例
-storage_service = StorageService()
+storage_service = create_storage_service()
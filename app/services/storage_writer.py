@@ -0,0 +1,188 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from app.models import SystemData, ProcessSample, TestLog, TestResult
+from app.services.storage_service import storage_service
+from config.settings import settings
+
+def _setup_logger():
+    logger = logging.getLogger('RemoteTestMonitor.StorageWriter')
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+logger = _setup_logger()
+
+# 队列中的数据类型
+KIND_SYSTEM_DATA = "system_data"
+KIND_PROCESS_SAMPLE = "process_sample"
+KIND_TEST_LOG = "test_log"
+KIND_TEST_RESULT = "test_result"
+
+class _FlushRequest:
+    """刷新请求：写入线程提交完当前批次后通知调用方"""
+    def __init__(self):
+        self.done = threading.Event()
+
+_STOP = object()
+
+class StorageWriter:
+    """后台批量写入服务
+
+    监控采样、测试日志和用例结果先进入有界队列，由单个写入线程按批次（行数或时间阈值）
+    以 executemany 事务写入数据库，避免在采集/日志读取热路径上逐行提交。
+    """
+    def __init__(self, storage=None):
+        self._storage = storage or storage_service
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.STORAGE_WRITE_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "errors": 0,
+            "dropped": {KIND_SYSTEM_DATA: 0, KIND_PROCESS_SAMPLE: 0, KIND_TEST_LOG: 0, KIND_TEST_RESULT: 0}
+        }
+
+    def start(self):
+        """启动写入线程（重复调用无副作用）"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._writer_loop, name="StorageWriter", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """写入剩余数据并停止写入线程"""
+        with self._start_lock:
+            thread = self._thread
+            if thread and thread.is_alive():
+                try:
+                    self._queue.put(_STOP, timeout=timeout)
+                except queue.Full:
+                    logger.error("写入队列已满，无法发送停止信号")
+                    return
+                thread.join(timeout=timeout)
+                self._thread = None
+        try:
+            # 写入各测试运行未写满的日志块
+            self._storage.close_test_logs()
+        except Exception as e:
+            logger.error(f"写入日志尾块失败: {e}")
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """等待队列中已有的数据全部写入数据库"""
+        if not self._thread or not self._thread.is_alive():
+            return True
+        request = _FlushRequest()
+        try:
+            self._queue.put(request, timeout=timeout)
+        except queue.Full:
+            logger.warning("写入队列已满，刷新请求超时")
+            return False
+        return request.done.wait(timeout)
+
+    def enqueue_system_data(self, data: SystemData) -> bool:
+        """提交系统监控数据（队列满时直接丢弃，不阻塞采样线程）"""
+        return self._enqueue(KIND_SYSTEM_DATA, data, block=False)
+
+    def enqueue_process_sample(self, sample: ProcessSample) -> bool:
+        """提交被监控进程树的资源样本（队列满时直接丢弃，不阻塞采样线程）"""
+        return self._enqueue(KIND_PROCESS_SAMPLE, sample, block=False)
+
+    def enqueue_test_log(self, log: TestLog) -> bool:
+        """提交测试日志（队列满时短暂等待后丢弃）"""
+        return self._enqueue(KIND_TEST_LOG, log, block=True)
+
+    def enqueue_test_result(self, result: TestResult) -> bool:
+        """提交测试用例结果（队列满时短暂等待后丢弃）"""
+        return self._enqueue(KIND_TEST_RESULT, result, block=True)
+
+    def _enqueue(self, kind: str, item, block: bool) -> bool:
+        self.start()
+        try:
+            if block:
+                self._queue.put((kind, item), timeout=settings.STORAGE_WRITE_ENQUEUE_TIMEOUT)
+            else:
+                self._queue.put_nowait((kind, item))
+        except queue.Full:
+            with self._stats_lock:
+                self._stats["dropped"][kind] += 1
+                dropped = self._stats["dropped"][kind]
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"写入队列已满，已丢弃 {dropped} 条 {kind} 数据")
+            return False
+        with self._stats_lock:
+            self._stats["enqueued"] += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列深度、写入和丢弃统计"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["dropped"] = dict(self._stats["dropped"])
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        return stats
+
+    def _writer_loop(self):
+        """写入线程主循环：按行数或时间阈值批量提交"""
+        pending: Dict[str, List] = {KIND_SYSTEM_DATA: [], KIND_PROCESS_SAMPLE: [], KIND_TEST_LOG: [], KIND_TEST_RESULT: []}
+        pending_count = 0
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None:
+                # 到达时间阈值
+                self._write_batch(pending)
+                pending_count, deadline = 0, None
+            elif item is _STOP:
+                self._write_batch(pending)
+                break
+            elif isinstance(item, _FlushRequest):
+                self._write_batch(pending)
+                pending_count, deadline = 0, None
+                item.done.set()
+            else:
+                kind, data = item
+                pending[kind].append(data)
+                pending_count += 1
+                if deadline is None:
+                    deadline = time.monotonic() + settings.STORAGE_WRITE_FLUSH_INTERVAL
+                if pending_count >= settings.STORAGE_WRITE_BATCH_SIZE:
+                    self._write_batch(pending)
+                    pending_count, deadline = 0, None
+
+    def _write_batch(self, pending: Dict[str, List]):
+        """将待写入数据按类型批量写入数据库"""
+        for kind, writer in ((KIND_SYSTEM_DATA, self._storage.save_system_data_batch),
+                             (KIND_PROCESS_SAMPLE, self._storage.save_process_samples),
+                             (KIND_TEST_LOG, self._storage.save_test_logs),
+                             (KIND_TEST_RESULT, self._storage.save_test_results)):
+            rows = pending[kind]
+            if not rows:
+                continue
+            try:
+                writer(rows)
+                with self._stats_lock:
+                    self._stats["written"] += len(rows)
+                    self._stats["batches"] += 1
+            except Exception as e:
+                logger.error(f"批量写入 {kind} 失败（{len(rows)} 行）: {e}")
+                with self._stats_lock:
+                    self._stats["errors"] += 1
+            pending[kind] = []
+
+# 创建全局批量写入服务实例，进程退出前写入剩余数据
+storage_writer = StorageWriter()
+atexit.register(storage_writer.stop)
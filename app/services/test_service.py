@@ -3,11 +3,13 @@ import threading
 import time
 import uuid
 import logging
+import re
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 import os
-from app.models import TestRun, TestLog, TestQueueItem
+from app.models import TestRun, TestLog, TestQueueItem, TestResult, TestLogRecord
 from app.services.storage_service import storage_service
+from app.services.storage_writer import storage_writer
 from app.services.monitor_service import monitor_service
 from app.utils.process_utils import ProcessUtils
 from config.settings import settings
@@ -20,6 +22,28 @@ def _setup_logger():
 
 logger = _setup_logger()
 
+# pytest -v 输出中的用例结果：可选的日志文件时间前缀，普通格式为 "nodeid PASSED [ 50%]"，
+# xdist 格式为 "[gw0] [ 50%] PASSED nodeid"。参数化用例的 nodeid 可能含空格（如 "test_x[a b]"），
+# 因此 nodeid 取到结果、耗时等标记为止，而不是取到第一个空白
+_LOG_TIME_PREFIX = r'^(?:\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\]\s+)?'
+_OUTCOMES = r'PASSED|FAILED|SKIPPED|ERROR|XFAIL|XPASS'
+_NODEID = r'(?P<nodeid>\S+::.+?)'
+_RESULT_LINE = re.compile(_LOG_TIME_PREFIX + _NODEID + rf'\s+(?P<outcome>{_OUTCOMES})(?:\s+\(.*\))?(?:\s+\[\s*\d+%\])?\s*$')
+_XDIST_RESULT_LINE = re.compile(_LOG_TIME_PREFIX + rf'\[gw\d+\]\s+\[\s*\d+%\]\s+(?P<outcome>{_OUTCOMES})\s+' + _NODEID + r'\s*$')
+# 简短汇总中的失败信息："FAILED nodeid - AssertionError: ..."
+_SUMMARY_LINE = re.compile(_LOG_TIME_PREFIX + r'(?:FAILED|ERROR)\s+' + _NODEID + r'(?:\s+-\s+(?P<message>.*))?\s*$')
+# --durations 输出："0.51s call     tests/test_a.py::test_x"
+_DURATION_LINE = re.compile(_LOG_TIME_PREFIX + r'(?P<seconds>\d+(?:\.\d+)?)s\s+(?:setup|call|teardown)\s+' + _NODEID + r'\s*$')
+
+_OUTCOME_STATUS = {
+    "PASSED": "passed",
+    "FAILED": "failed",
+    "SKIPPED": "skipped",
+    "ERROR": "error",
+    "XFAIL": "xfailed",
+    "XPASS": "xpassed",
+}
+
 class TestService:
     def __init__(self):
         self._current_test_run: Optional[Dict[str, Any]] = None
@@ -28,6 +52,10 @@ class TestService:
         self._test_status_callbacks = []
         self._processing_queue = False
         self._queue_thread = None
+        # run_id -> 用例结果解析状态（--durations 耗时、失败信息）
+        self._result_trackers: Dict[str, Dict[str, Any]] = {}
+        # 日志读取线程、日志文件解析和远程执行线程会同时访问解析状态
+        self._result_trackers_lock = threading.Lock()
         
         # 初始化时清理卡住的测试
         self._cleanup_stuck_tests()
@@ -82,6 +110,7 @@ class TestService:
         def execute_remote():
             try:
                 remote_machine_service.execute_test(machine, test_path, run_id)
+                self._finish_test_results(run_id)
                 
                 test_run = storage_service.get_test_run(run_id)
                 if test_run:
@@ -107,6 +136,8 @@ class TestService:
                     test_run.end_time = datetime.now()
                     storage_service.save_test_run(test_run)
                     self._trigger_status_callbacks(test_run)
+            finally:
+                self._close_test_logs(run_id)
         
         thread = threading.Thread(target=execute_remote, daemon=True)
         thread.start()
@@ -138,7 +169,10 @@ class TestService:
             test_path,
             "-v",
             "--tb=short",
-            "--durations=10",
+            # 每个用例的各阶段各输出一行耗时（这些行也会存入测试日志），用于回填实测耗时
+            "--durations=0",
+            # 默认只输出 0.005 秒以上的耗时，设为 0 使每个用例都有实测耗时（需要 pytest 6.2+）
+            "--durations-min=0",
             f"--html={report_path}",
             "--self-contained-html"
         ]
@@ -158,7 +192,7 @@ class TestService:
             "log_file_path": log_file_path
         }
         
-        monitor_service.monitor_external_process(process.pid)
+        monitor_service.monitor_external_process(process.pid, run_id=run_id)
         
         log_thread = threading.Thread(
             target=self._read_test_logs, 
@@ -199,7 +233,7 @@ class TestService:
                         level=self._determine_log_level(line),
                         message=line
                     )
-                    storage_service.save_test_log(test_log)
+                    storage_writer.enqueue_test_log(test_log)
 
                     # 触发日志回调
                     self._trigger_log_callbacks(test_log)
@@ -212,6 +246,8 @@ class TestService:
                     self._parse_test_statistics(line, run_id)
             
             logger.info(f"日志读取完成，共读取 {line_count} 行日志")
+            self._finish_test_results(run_id)
+            self._close_test_logs(run_id)
             
             try:
                 log_file.close()
@@ -239,6 +275,8 @@ class TestService:
         if not line_stripped:
             return
         
+        self._record_test_result(line_stripped, run_id)
+        
         is_passed = False
         is_failed = False
         is_skipped = False
@@ -265,32 +303,85 @@ class TestService:
         
         logger.debug(f"[Parse] 匹配到测试结果行: {line_stripped[:80]}...")
         
-        test_run = storage_service.get_test_run(run_id)
+        # 在数据库中原子累加计数，直接使用返回的最新统计，无需再次读取
+        test_run = storage_service.increment_test_counters(
+            run_id,
+            passed=1 if is_passed else 0,
+            failed=1 if is_failed else 0,
+            skipped=1 if is_skipped else 0
+        )
         if not test_run:
             logger.debug(f"[Parse] 错误：找不到测试记录 {run_id}")
             return
         
-        old_passed = test_run.passed_tests
-        old_failed = test_run.failed_tests
-        old_skipped = test_run.skipped_tests
-        
-        if is_passed:
-            test_run.passed_tests += 1
-            logger.debug(f"[Parse] 检测到通过用例")
-        elif is_failed:
-            test_run.failed_tests += 1
-            logger.debug(f"[Parse] 检测到失败用例")
-        elif is_skipped:
-            test_run.skipped_tests += 1
-            logger.debug(f"[Parse] 检测到跳过用例")
-        
-        test_run.total_tests = test_run.passed_tests + test_run.failed_tests + test_run.skipped_tests
-        storage_service.save_test_run(test_run)
-        
-        logger.debug(f"[Parse] 统计更新: 通过 {old_passed}->{test_run.passed_tests}, 失败 {old_failed}->{test_run.failed_tests}, 跳过 {old_skipped}->{test_run.skipped_tests}")
+        logger.debug(f"[Parse] 统计更新: 通过 {test_run.passed_tests}, 失败 {test_run.failed_tests}, 跳过 {test_run.skipped_tests}")
         
         self._trigger_status_callbacks(test_run)
     
+    def _get_result_tracker(self, run_id: str) -> Dict[str, Any]:
+        """获取（必要时创建）指定运行的用例结果解析状态（调用方需持有 _result_trackers_lock）"""
+        tracker = self._result_trackers.get(run_id)
+        if tracker is None:
+            tracker = {
+                "durations": {},
+                "messages": {}
+            }
+            self._result_trackers[run_id] = tracker
+        return tracker
+    
+    def _record_test_result(self, line: str, run_id: str):
+        """从 pytest 输出行中提取用例结果并提交批量写入
+        
+        -v 输出不包含单个用例耗时（xdist 下各 worker 的结果交错，也无法按间隔估算），
+        耗时先留空，由 --durations 输出的实测耗时和简短汇总中的失败信息在运行结束时统一回填。
+        """
+        match = _RESULT_LINE.match(line) or _XDIST_RESULT_LINE.match(line)
+        if match:
+            now = datetime.now()
+            nodeid = match.group('nodeid')
+            storage_writer.enqueue_test_result(TestResult(
+                run_id=run_id,
+                test_id=nodeid,
+                name=nodeid.split('::')[-1],
+                status=_OUTCOME_STATUS[match.group('outcome')],
+                timestamp=now
+            ))
+            return
+        
+        match = _DURATION_LINE.match(line)
+        if match:
+            nodeid = match.group('nodeid')
+            with self._result_trackers_lock:
+                durations = self._get_result_tracker(run_id)["durations"]
+                durations[nodeid] = durations.get(nodeid, 0.0) + float(match.group('seconds'))
+            return
+        
+        match = _SUMMARY_LINE.match(line)
+        if match and match.group('message'):
+            with self._result_trackers_lock:
+                self._get_result_tracker(run_id)["messages"][match.group('nodeid')] = match.group('message')
+    
+    def _finish_test_results(self, run_id: str):
+        """运行结束后回填精确耗时和失败信息"""
+        with self._result_trackers_lock:
+            tracker = self._result_trackers.pop(run_id, None)
+        if not tracker or not (tracker["durations"] or tracker["messages"]):
+            return
+        # 先确保队列中的用例结果已写入，再按 nodeid 更新
+        storage_writer.flush()
+        try:
+            storage_service.update_test_results(run_id, tracker["durations"], tracker["messages"])
+        except Exception as e:
+            logger.error(f"回填用例耗时失败: {e}")
+    
+    def _close_test_logs(self, run_id: str):
+        """测试运行的日志已读取完毕，写入队列中的日志并将未写满的日志块写入数据库"""
+        storage_writer.flush()
+        try:
+            storage_service.close_test_logs(run_id)
+        except Exception as e:
+            logger.error(f"写入日志尾块失败: {e}")
+    
     def _parse_test_statistics(self, line: str, run_id: str):
         """解析测试统计信息"""
         import re
@@ -414,6 +505,7 @@ class TestService:
                         summary_parsed = True
             
             logger.debug(f"[ParseLog] 日志解析完成")
+            self._finish_test_results(run_id)
             
             test_run = storage_service.get_test_run(run_id)
             if test_run:
@@ -424,10 +516,9 @@ class TestService:
     def _cleanup_stuck_tests(self):
         """清理卡在running状态的测试记录"""
         logger.debug("检查卡在running状态的测试...")
-        all_tests = storage_service.get_all_test_runs()
         current_time = datetime.now()
         
-        for test_run in all_tests:
+        for test_run in storage_service.iter_test_runs(status='running'):
             # 检查是否是卡住的测试（running状态但统计为0，且开始时间超过30分钟）
             if (test_run.status == 'running' and 
                 test_run.total_tests == 0 and 
@@ -455,6 +546,7 @@ class TestService:
             storage_service.save_test_run(existing_test_run)
             
             self._trigger_status_callbacks(existing_test_run)
+            self._close_test_logs(run_id)
         else:
             logger.warning(f"[Status] 错误：找不到测试运行记录: run_id={run_id}")
     
@@ -559,16 +651,18 @@ class TestService:
         # 暂时返回空列表
         return []
     
-    def get_test_logs(self, run_id: str) -> List[TestLog]:
+    def get_test_logs(self, run_id: str) -> List[TestLogRecord]:
         """获取测试日志"""
         return storage_service.get_test_logs(run_id)
     
     def export_logs_to_file(self, run_id: str) -> str:
         """将测试日志导出到文件"""
         logger.debug(f"[DEBUG] 开始导出日志到文件: run_id={run_id}")
-        logs = self.get_test_logs(run_id)
-        logger.debug(f"[DEBUG] 获取到的日志数量: {len(logs) if logs else 0}")
-        if not logs:
+        # 先确保写入队列中的日志已经落库
+        storage_writer.flush()
+        line_count = storage_service.count_test_logs(run_id)
+        logger.debug(f"[DEBUG] 获取到的日志数量: {line_count}")
+        if not line_count:
             logger.warning(f"没有找到测试日志: run_id={run_id}")
             return None
         
@@ -581,7 +675,8 @@ class TestService:
         
         try:
             with open(log_file_path, 'w', encoding='utf-8') as f:
-                for log in logs:
+                # 流式读取日志，避免一次性加载整个运行的日志
+                for log in storage_service.iter_test_logs(run_id):
                     # 格式化日志行，与UI显示的格式一致
                     timestamp_str = log.timestamp.strftime('%Y-%m-%d %H:%M:%S') if hasattr(log.timestamp, 'strftime') else str(log.timestamp)
                     log_line = f"[{timestamp_str}] {log.message}\n"
@@ -1,7 +1,16 @@
 from .platform_utils import PlatformUtils
-from .process_utils import ProcessUtils
+from .process_utils import ProcessUtils, ProcessTreeTracker
+from .time_utils import TimeUtils
+from .export_utils import ExportUtils
+from .procfs_collector import ProcfsSystemCollector, ProcfsProcessTreeTracker, procfs_enabled
 
 __all__ = [
     "PlatformUtils",
-    "ProcessUtils"
+    "ProcessUtils",
+    "ProcessTreeTracker",
+    "TimeUtils",
+    "ExportUtils",
+    "ProcfsSystemCollector",
+    "ProcfsProcessTreeTracker",
+    "procfs_enabled"
 ]
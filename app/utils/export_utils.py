@@ -0,0 +1,179 @@
+import csv
+import gzip
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, IO, List, Optional, Sequence, Tuple
+
+# 列式导出文件（.cols）格式：
+#   8 字节魔数 + 4 字节小端 JSON 头长度 + UTF-8 JSON 头，之后每列一段连续的小端定长数组，
+#   每段起始偏移按 64 字节对齐。JSON 头记录行数、每列的 dtype（NumPy 类型字符串）/偏移/字节数
+#   以及字典编码列的取值表，可直接用 numpy.memmap 按偏移映射每一列。
+COLUMNS_MAGIC = b'RTMCOLS1'
+_COLUMNS_PREFIX = struct.Struct('<8sI')
+_COLUMNS_ALIGN = 64
+
+# array 类型码 -> NumPy dtype；整数列的空值写为 -1，浮点列的空值写为 NaN
+_COLUMN_DTYPES = {'q': '<i8', 'i': '<i4', 'd': '<f8'}
+
+class ExportUtils:
+    """流式导出工具：按批写出，内存占用只与批大小有关，与导出行数无关"""
+
+    # 每批写出的行数
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def iter_batches(rows: Iterable[Any], size: int = BATCH_SIZE) -> Iterator[List[Any]]:
+        """将行迭代器切分为最多 size 行的列表"""
+        iterator = iter(rows)
+        while True:
+            batch = list(islice(iterator, size))
+            if not batch:
+                return
+            yield batch
+
+    @staticmethod
+    def open_text(file_path: str, compress: bool = False) -> IO[str]:
+        """以 UTF-8 文本方式打开导出文件，compress 为 True 时写出 gzip 压缩流"""
+        if compress:
+            return gzip.open(file_path, 'wt', encoding='utf-8', newline='')
+        return open(file_path, 'w', encoding='utf-8', newline='')
+
+    @staticmethod
+    def write_csv(file_path: str, headers: List[str], rows: Iterable[Iterable[Any]], compress: bool = False) -> int:
+        """写出 CSV 文件（rows 可以是生成器），返回写出的数据行数"""
+        count = 0
+        with ExportUtils.open_text(file_path, compress) as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            for batch in ExportUtils.iter_batches(rows):
+                writer.writerows(batch)
+                count += len(batch)
+        return count
+
+    @staticmethod
+    def write_ndjson(file_path: str, records: Iterable[Dict[str, Any]], compress: bool = False) -> int:
+        """写出 NDJSON 文件（每行一个 JSON 对象，records 可以是生成器），返回写出的记录数"""
+        count = 0
+        with ExportUtils.open_text(file_path, compress) as f:
+            for batch in ExportUtils.iter_batches(records):
+                f.write(''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in batch))
+                count += len(batch)
+        return count
+
+    @staticmethod
+    def write_columns(file_path: str, columns: Sequence[Tuple[str, str]], batches: Iterable[List[tuple]],
+                      dictionary_columns: Sequence[str] = (), metadata: Optional[Dict[str, Any]] = None) -> int:
+        """按批写出列式二进制文件，返回写出的行数
+
+        columns 为 (列名, array 类型码) 列表，与 batches 中行元组的字段一一对应；
+        dictionary_columns 中的列按首次出现顺序编码为 int32 字典码（空值为 -1）。
+        总行数事先未知，每列先追加写入同目录下的临时文件，结束后再按对齐偏移拼接。
+        """
+        dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in dictionary_columns}
+        typecodes = [('i' if name in dictionaries else typecode) for name, typecode in columns]
+        swap = sys.byteorder != 'little'
+        rows = 0
+
+        temp_dir = tempfile.mkdtemp(prefix='.cols_', dir=os.path.dirname(os.path.abspath(file_path)))
+        try:
+            column_paths = [os.path.join(temp_dir, str(index)) for index in range(len(columns))]
+            column_files = [open(path, 'wb') for path in column_paths]
+            try:
+                for batch in batches:
+                    if not batch:
+                        continue
+                    for index, values in enumerate(zip(*batch)):
+                        name, typecode = columns[index][0], typecodes[index]
+                        if name in dictionaries:
+                            codes = dictionaries[name]
+                            values = [-1 if value is None else codes.setdefault(value, len(codes)) for value in values]
+                        elif None in values:
+                            null = float('nan') if typecode == 'd' else -1
+                            values = [null if value is None else value for value in values]
+                        data = array(typecode, values)
+                        if swap:
+                            data.byteswap()
+                        data.tofile(column_files[index])
+                    rows += len(batch)
+            finally:
+                for f in column_files:
+                    f.close()
+
+            header = {
+                "rows": rows,
+                "columns": [
+                    {"name": name, "dtype": _COLUMN_DTYPES[typecode], "offset": 0,
+                     "nbytes": os.path.getsize(path)}
+                    for (name, _), typecode, path in zip(columns, typecodes, column_paths)
+                ],
+                "dictionaries": {name: list(codes) for name, codes in dictionaries.items()},
+                "metadata": metadata or {}
+            }
+            # 偏移写在头里，头的长度又决定偏移，反复计算直到头长度不再变化
+            header_bytes = b''
+            while True:
+                offset = _COLUMNS_PREFIX.size + len(header_bytes)
+                for column in header["columns"]:
+                    offset = -(-offset // _COLUMNS_ALIGN) * _COLUMNS_ALIGN
+                    column["offset"] = offset
+                    offset += column["nbytes"]
+                encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+                if len(encoded) == len(header_bytes):
+                    break
+                header_bytes = encoded
+
+            with open(file_path, 'wb') as out:
+                out.write(_COLUMNS_PREFIX.pack(COLUMNS_MAGIC, len(header_bytes)))
+                out.write(header_bytes)
+                for column, path in zip(header["columns"], column_paths):
+                    out.write(b'\0' * (column["offset"] - out.tell()))
+                    with open(path, 'rb') as f:
+                        shutil.copyfileobj(f, out, 1024 * 1024)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return rows
+
+    @staticmethod
+    def read_columns_header(file_path: str) -> Dict[str, Any]:
+        """读取列式二进制文件的 JSON 头"""
+        with open(file_path, 'rb') as f:
+            magic, length = _COLUMNS_PREFIX.unpack(f.read(_COLUMNS_PREFIX.size))
+            if magic != COLUMNS_MAGIC:
+                raise ValueError(f"不是列式导出文件: {file_path}")
+            return json.loads(f.read(length).decode('utf-8'))
+
+    @staticmethod
+    def read_columns(file_path: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """读取列式二进制文件，返回 (JSON 头, 列名 -> 数组)
+
+        安装了 NumPy 时每列为只读 numpy.memmap，不解析、不复制；否则退化为 array.array。
+        """
+        header = ExportUtils.read_columns_header(file_path)
+        try:
+            import numpy as np
+            return header, {
+                column["name"]: np.memmap(file_path, dtype=column["dtype"], mode='r',
+                                          offset=column["offset"], shape=(header["rows"],))
+                if header["rows"] else np.empty(0, dtype=column["dtype"])
+                for column in header["columns"]
+            }
+        except ImportError:
+            pass
+
+        typecodes = {dtype: typecode for typecode, dtype in _COLUMN_DTYPES.items()}
+        arrays = {}
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for column in header["columns"]:
+                data = array(typecodes[column["dtype"]])
+                data.frombytes(view[column["offset"]:column["offset"] + column["nbytes"]])
+                if sys.byteorder != 'little':
+                    data.byteswap()
+                arrays[column["name"]] = data
+        return header, arrays
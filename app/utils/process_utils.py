@@ -1,6 +1,7 @@
 import psutil
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.models import ProcessData
+from app.utils.procfs_collector import ProcfsProcessTreeTracker, procfs_enabled
 
 class ProcessUtils:
     @staticmethod
@@ -95,6 +96,13 @@ class ProcessUtils:
                 "total_memory": 0.0
             }
     
+    @staticmethod
+    def create_tree_tracker(pid: int):
+        """创建进程树资源跟踪器：Linux 上使用 /proc 快速路径，其他平台或配置为 psutil 时使用 psutil"""
+        if procfs_enabled():
+            return ProcfsProcessTreeTracker(pid)
+        return ProcessTreeTracker(pid)
+    
     @staticmethod
     def kill_process(pid: int, recursive: bool = True) -> bool:
         """终止进程"""
@@ -120,3 +128,54 @@ class ProcessUtils:
             return psutil.pid_exists(pid)
         except:
             return False
+
+class ProcessTreeTracker:
+    """进程树资源跟踪器
+    
+    在两次采样之间保留各进程的 psutil.Process 句柄，CPU 使用率取 cpu_percent(interval=None)
+    相对上次采样的增量，每个进程的读取放在 oneshot() 中，整个采样过程不会 sleep。
+    子进程按 (pid, 创建时间) 增量加入和移除，新出现的子进程在首次采样时 CPU 计为 0。
+    """
+    def __init__(self, pid: int):
+        self.pid = pid
+        self._root: Optional[psutil.Process] = None
+        self._children: Dict[int, psutil.Process] = {}
+    
+    def sample(self) -> Optional[Dict[str, Any]]:
+        """采样进程及其所有子进程的总资源使用情况，主进程已不存在或无权访问时返回 None"""
+        try:
+            if self._root is None:
+                self._root = psutil.Process(self.pid)
+            root = self._root
+            with root.oneshot():
+                name = root.name()
+                total_cpu = root.cpu_percent(interval=None)
+                total_memory = root.memory_percent()
+            current_children = root.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            self._root = None
+            self._children = {}
+            return None
+        
+        # 增量更新子进程句柄：已知进程沿用旧句柄保留 CPU 计数基准，pid 被复用的按新进程处理
+        children: Dict[int, psutil.Process] = {}
+        for child in current_children:
+            known = self._children.get(child.pid)
+            children[child.pid] = known if known is not None and known == child else child
+        self._children = children
+        
+        for child in list(children.values()):
+            try:
+                with child.oneshot():
+                    total_cpu += child.cpu_percent(interval=None)
+                    total_memory += child.memory_percent()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                children.pop(child.pid, None)
+        
+        return {
+            "pid": self.pid,
+            "name": name,
+            "total_cpu": total_cpu,
+            "total_memory": total_memory,
+            "process_count": 1 + len(children)
+        }
@@ -0,0 +1,304 @@
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from config.settings import settings
+
+# /proc 文件读取缓冲区的初始大小（字节），内容超出时自动翻倍
+_INITIAL_BUFFER_SIZE = 4096
+
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def procfs_available() -> bool:
+    """当前平台是否支持 /proc 快速采集（仅 Linux，且需要 os.preadv）"""
+    return sys.platform.startswith('linux') and hasattr(os, 'preadv') and os.path.exists('/proc/stat')
+
+def procfs_enabled() -> bool:
+    """按 MONITOR_COLLECTOR 配置判断是否使用 /proc 快速采集"""
+    collector = settings.MONITOR_COLLECTOR
+    if collector == "psutil":
+        return False
+    if collector not in ("auto", "procfs"):
+        raise ValueError(f"不支持的采集后端: {collector}")
+    return procfs_available()
+
+class ProcFile:
+    """预先打开的 /proc 文件
+
+    文件描述符在多次读取之间复用，每次以 os.preadv 从偏移 0 读入预分配的缓冲区，
+    不再重复 open/close。进程退出后读取其 /proc/<pid> 下的文件会抛出 ProcessLookupError。
+    """
+    __slots__ = ("path", "_fd", "_buffer")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = -1
+        self._fd = os.open(path, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+        self._buffer = bytearray(_INITIAL_BUFFER_SIZE)
+
+    def read(self) -> bytes:
+        """读取文件的完整内容"""
+        while True:
+            size = os.preadv(self._fd, [self._buffer], 0)
+            if size < len(self._buffer):
+                return bytes(memoryview(self._buffer)[:size])
+            self._buffer = bytearray(len(self._buffer) * 2)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __del__(self):
+        try:
+            self.close()
+        except OSError:
+            pass
+
+def _read_memory_total(meminfo: bytes) -> int:
+    """从 /proc/meminfo 内容中读取物理内存总量（字节）"""
+    for line in meminfo.split(b'\n'):
+        if line.startswith(b'MemTotal:'):
+            return int(line.split()[1]) * 1024
+    raise ValueError("/proc/meminfo 中缺少 MemTotal")
+
+class ProcfsSystemCollector:
+    """基于 /proc 的系统级资源采集器（仅 Linux）
+
+    读取 /proc/stat、/proc/meminfo 和 /proc/net/dev，磁盘使用率取 os.statvfs，
+    计算方式与 psutil 的 cpu_percent(interval=0)、virtual_memory、disk_usage 和 net_io_counters 一致。
+    """
+    def __init__(self, disk_path: str = '/'):
+        self._disk_path = disk_path
+        self._stat = ProcFile('/proc/stat')
+        self._meminfo = ProcFile('/proc/meminfo')
+        self._net_dev = ProcFile('/proc/net/dev')
+        # 采样可能同时来自监控线程和界面线程，读取缓冲区和 CPU 基准需要加锁
+        self._lock = threading.Lock()
+        self._last_cpu = self._read_cpu_times()
+
+    def _read_cpu_times(self):
+        """返回 (忙碌时间, 总时间)，单位为时钟周期"""
+        fields = self._stat.read().split(b'\n', 1)[0].split()
+        # user nice system idle iowait irq softirq steal（guest 已计入 user/nice，不重复累加）
+        values = [int(value) for value in fields[1:9]]
+        total = sum(values)
+        return total - values[3] - values[4], total
+
+    def cpu_percent(self) -> float:
+        """自上次调用以来的系统 CPU 使用率"""
+        busy, total = self._read_cpu_times()
+        last_busy, last_total = self._last_cpu
+        self._last_cpu = (busy, total)
+        if total <= last_total:
+            return 0.0
+        return round(min(100.0, max(0.0, (busy - last_busy) / (total - last_total) * 100)), 1)
+
+    def memory_percent(self) -> float:
+        """物理内存使用率（以 MemAvailable 计算可用内存）"""
+        total = available = None
+        for line in self._meminfo.read().split(b'\n'):
+            if line.startswith(b'MemTotal:'):
+                total = int(line.split()[1])
+            elif line.startswith(b'MemAvailable:'):
+                available = int(line.split()[1])
+            if total is not None and available is not None:
+                break
+        if not total or available is None:
+            return 0.0
+        return round((total - available) / total * 100, 1)
+
+    def disk_percent(self) -> float:
+        """磁盘使用率（与 psutil.disk_usage 相同，不计入保留块）"""
+        stat = os.statvfs(self._disk_path)
+        used = (stat.f_blocks - stat.f_bfree) * stat.f_frsize
+        total_user = used + stat.f_bavail * stat.f_frsize
+        return round(used / total_user * 100, 1) if total_user else 0.0
+
+    def network_counters(self):
+        """所有网络接口的 (发送字节数, 接收字节数)"""
+        sent = recv = 0
+        for line in self._net_dev.read().split(b'\n')[2:]:
+            _, sep, data = line.partition(b':')
+            if not sep:
+                continue
+            fields = data.split()
+            recv += int(fields[0])
+            sent += int(fields[8])
+        return sent, recv
+
+    def sample(self) -> Dict[str, Any]:
+        """采集一次系统级资源，字段与 SystemData 对应"""
+        with self._lock:
+            network_sent, network_recv = self.network_counters()
+            return {
+                "cpu_percent": self.cpu_percent(),
+                "memory_percent": self.memory_percent(),
+                "disk_percent": self.disk_percent(),
+                "network_sent": network_sent,
+                "network_recv": network_recv
+            }
+
+    def close(self):
+        for proc_file in (self._stat, self._meminfo, self._net_dev):
+            proc_file.close()
+
+class _ProcEntry:
+    """进程树中单个进程的 stat 句柄、按线程的 children 句柄以及上次采样的 CPU 时间"""
+    __slots__ = ("pid", "stat_file", "children_files", "start_time", "cpu_ticks", "sampled_at")
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.stat_file = ProcFile(f'/proc/{pid}/stat')
+        self.children_files: Dict[str, ProcFile] = {}
+        self.start_time: Optional[int] = None
+        self.cpu_ticks = 0
+        self.sampled_at = 0.0
+
+    def close(self):
+        self.stat_file.close()
+        for children_file in self.children_files.values():
+            children_file.close()
+        self.children_files = {}
+
+def _parse_stat(data: bytes):
+    """解析 /proc/<pid>/stat，返回 (进程名, 状态, 父进程ID, CPU 时钟周期, 启动时间, 常驻内存页数)"""
+    # 进程名可能包含空格和括号，以最后一个右括号为界
+    name_end = data.rindex(b')')
+    name = data[data.index(b'(') + 1:name_end].decode('utf-8', 'replace')
+    fields = data[name_end + 2:].split()
+    return name, fields[0], int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[19]), int(fields[21])
+
+def _children_files_supported() -> bool:
+    """内核是否提供 /proc/<pid>/task/<tid>/children（CONFIG_PROC_CHILDREN）"""
+    pid = os.getpid()
+    return os.path.exists(f'/proc/{pid}/task/{pid}/children')
+
+class ProcfsProcessTreeTracker:
+    """基于 /proc 的进程树资源跟踪器（仅 Linux），接口与 ProcessTreeTracker 一致
+
+    每个进程的 /proc/<pid>/stat 和各线程的 children 文件在采样之间保持打开，以 pread 读取；
+    子进程沿 children 文件增量发现（内核不支持时退化为扫描 /proc 建立父子关系）。
+    CPU 使用率取相对上次采样的 CPU 时间增量，新出现的子进程在首次采样时计为 0。
+    """
+    def __init__(self, pid: int):
+        self.pid = pid
+        self._entries: Dict[int, _ProcEntry] = {}
+        self._root_start_time: Optional[int] = None
+        with open('/proc/meminfo', 'rb') as meminfo:
+            self._memory_total = _read_memory_total(meminfo.read())
+        self._use_children_files = _children_files_supported()
+
+    def _read_entry(self, pid: int):
+        """读取进程的 stat，返回 (句柄, 解析结果)；进程已不存在时返回 (None, None)
+
+        pid 被新进程复用时旧句柄读取失败，会重新打开一次。
+        """
+        entry = self._entries.get(pid)
+        for _ in range(2):
+            try:
+                if entry is None:
+                    entry = _ProcEntry(pid)
+                return entry, _parse_stat(entry.stat_file.read())
+            except (OSError, ValueError, IndexError):
+                if entry is not None:
+                    entry.close()
+                    self._entries.pop(pid, None)
+                entry = None
+        return None, None
+
+    def _children_of(self, entry: _ProcEntry) -> List[int]:
+        """读取进程所有线程的 children 文件，得到直接子进程ID"""
+        try:
+            tids = os.listdir(f'/proc/{entry.pid}/task')
+        except OSError:
+            return []
+        children = []
+        files = {}
+        for tid in tids:
+            children_file = entry.children_files.pop(tid, None)
+            try:
+                if children_file is None:
+                    children_file = ProcFile(f'/proc/{entry.pid}/task/{tid}/children')
+                children.extend(int(child) for child in children_file.read().split())
+                files[tid] = children_file
+            except OSError:
+                # 线程已退出
+                if children_file is not None:
+                    children_file.close()
+        # 已退出线程的句柄在这里关闭
+        for children_file in entry.children_files.values():
+            children_file.close()
+        entry.children_files = files
+        return children
+
+    @staticmethod
+    def _scan_parent_map() -> Dict[int, List[int]]:
+        """扫描 /proc 建立 父进程ID -> 子进程ID列表 的映射（不支持 children 文件时使用）"""
+        parent_map: Dict[int, List[int]] = {}
+        for name in os.listdir('/proc'):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f'/proc/{name}/stat', 'rb') as stat_file:
+                    ppid = _parse_stat(stat_file.read())[2]
+            except (OSError, ValueError, IndexError):
+                continue
+            parent_map.setdefault(ppid, []).append(int(name))
+        return parent_map
+
+    def sample(self) -> Optional[Dict[str, Any]]:
+        """采样进程及其所有子进程的总资源使用情况，主进程已不存在时返回 None"""
+        now = time.monotonic()
+        root, stat = self._read_entry(self.pid)
+        # 主进程已退出、成为僵尸进程或 pid 已被其他进程复用
+        if root is None or stat[1] == b'Z' or self._root_start_time not in (None, stat[4]):
+            self.close()
+            return None
+        self._root_start_time = stat[4]
+
+        parent_map = None if self._use_children_files else self._scan_parent_map()
+        entries: Dict[int, _ProcEntry] = {}
+        total_cpu = 0.0
+        total_rss = 0
+        pending = [(root, stat)]
+        while pending:
+            entry, (name, state, _, cpu_ticks, start_time, rss) = pending.pop()
+            entries[entry.pid] = entry
+            if entry.start_time == start_time and now > entry.sampled_at:
+                total_cpu += (cpu_ticks - entry.cpu_ticks) / _CLOCK_TICKS / (now - entry.sampled_at) * 100
+            entry.start_time, entry.cpu_ticks, entry.sampled_at = start_time, cpu_ticks, now
+            total_rss += rss
+
+            child_pids = parent_map.get(entry.pid, []) if parent_map is not None else self._children_of(entry)
+            for child_pid in child_pids:
+                if child_pid in entries:
+                    continue
+                child, child_stat = self._read_entry(child_pid)
+                if child is None or child_stat[1] == b'Z':
+                    continue
+                # 先登记，避免同一子进程被重复加入
+                entries[child_pid] = child
+                pending.append((child, child_stat))
+
+        # 关闭已退出子进程的句柄
+        for pid, entry in self._entries.items():
+            if entries.get(pid) is not entry:
+                entry.close()
+        self._entries = entries
+
+        return {
+            "pid": self.pid,
+            "name": stat[0],
+            "total_cpu": total_cpu,
+            "total_memory": total_rss * _PAGE_SIZE / self._memory_total * 100,
+            "process_count": len(entries)
+        }
+
+    def close(self):
+        """关闭所有进程句柄"""
+        for entry in self._entries.values():
+            entry.close()
+        self._entries = {}
@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Optional
+
+class TimeUtils:
+    @staticmethod
+    def to_epoch_ms(value: Optional[datetime]) -> Optional[int]:
+        """将 datetime 转换为整数毫秒时间戳（无时区的 datetime 按本地时间处理）"""
+        if value is None:
+            return None
+        return int(round(value.timestamp() * 1000))
+
+    @staticmethod
+    def from_epoch_ms(value: Optional[int]) -> Optional[datetime]:
+        """将整数毫秒时间戳转换为本地时间的 datetime"""
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value / 1000)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""监控采集路径基准测试（仅 Linux）
+
+对比 psutil 与 /proc 快速路径（预先打开的文件描述符 + os.preadv）采集系统级资源和
+进程树资源的每秒采样次数，并打印两种方式的采样结果供核对。
+
+用法（在项目根目录执行）:
+    python benchmarks/bench_collectors.py --children 32 --seconds 2
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil  # noqa: E402
+
+from app.utils.process_utils import ProcessTreeTracker  # noqa: E402
+from app.utils.procfs_collector import ProcfsProcessTreeTracker, ProcfsSystemCollector, procfs_available  # noqa: E402
+
+# 子进程树：一个父进程启动若干空闲子进程
+_TREE_SCRIPT = '''
+import subprocess, sys, time
+children = [subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(3600)']) for _ in range({count})]
+time.sleep(3600)
+'''
+
+
+def _psutil_system_sample():
+    """与 MonitorService 的 psutil 路径相同的系统级采样"""
+    memory = psutil.virtual_memory()
+    net_io = psutil.net_io_counters()
+    return {
+        "cpu_percent": psutil.cpu_percent(interval=0),
+        "memory_percent": memory.percent,
+        "disk_percent": psutil.disk_usage('/').percent,
+        "network_sent": net_io.bytes_sent,
+        "network_recv": net_io.bytes_recv
+    }
+
+
+def _measure(sample, seconds: float):
+    """返回 (每秒采样次数, 单次采样平均耗时毫秒, 最后一次采样结果)"""
+    result = sample()
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        result = sample()
+        count += 1
+    elapsed = time.perf_counter() - start
+    return count / elapsed, elapsed / count * 1000, result
+
+
+def _wait_for_tree(pid: int, count: int, timeout: float = 30.0):
+    """等待子进程全部启动"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if len(psutil.Process(pid).children(recursive=True)) >= count:
+            return
+        time.sleep(0.1)
+    raise RuntimeError("子进程启动超时")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='监控采集路径基准测试')
+    parser.add_argument('--children', type=int, default=32, help='被监控进程树的子进程数量')
+    parser.add_argument('--seconds', type=float, default=2.0, help='每种采集方式的运行时间（秒）')
+    args = parser.parse_args()
+
+    if not procfs_available():
+        print('当前平台不支持 /proc 快速采集')
+        return
+
+    tree = subprocess.Popen([sys.executable, '-c', _TREE_SCRIPT.format(count=args.children)])
+    try:
+        _wait_for_tree(tree.pid, args.children)
+        system_collector = ProcfsSystemCollector()
+        cases = [
+            ('系统资源   psutil ', _psutil_system_sample),
+            ('系统资源   /proc  ', system_collector.sample),
+            ('进程树     psutil ', ProcessTreeTracker(tree.pid).sample),
+            ('进程树     /proc  ', ProcfsProcessTreeTracker(tree.pid).sample),
+        ]
+        print(f'子进程数: {args.children}')
+        for name, sample in cases:
+            rate, latency, result = _measure(sample, args.seconds)
+            print(f'{name}: {rate:10.0f} 次/秒, {latency:8.3f} 毫秒/次  {result}')
+        system_collector.close()
+    finally:
+        for child in psutil.Process(tree.pid).children(recursive=True):
+            child.kill()
+        tree.kill()
+        tree.wait()
+
+
+if __name__ == '__main__':
+    main()
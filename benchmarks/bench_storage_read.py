@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""存储服务读取路径基准测试
+
+对比 get_system_data / get_test_logs 返回轻量行对象（__slots__，不做校验）与
+逐行构造 pydantic 模型两种方式的每秒对象数和单个对象的内存占用。
+
+用法（在项目根目录执行）:
+    python benchmarks/bench_storage_read.py --rows 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 在导入服务模块前将全局数据库指向临时目录，避免污染 db/monitor.db
+_TEMP_DIR = tempfile.mkdtemp(prefix='monitor_bench_')
+os.environ.setdefault('DB_PATH', os.path.join(_TEMP_DIR, 'global.db'))
+
+from app.models import SystemData, TestLog  # noqa: E402
+from app.services.storage_service import StorageService  # noqa: E402
+
+
+def _fill(service: StorageService, rows: int, start: datetime):
+    service.save_system_data_batch([
+        SystemData(
+            timestamp=start + timedelta(seconds=i),
+            cpu_percent=i % 100,
+            memory_percent=50.0,
+            disk_percent=70.0,
+            network_sent=i * 1024,
+            network_recv=i * 2048
+        )
+        for i in range(rows)
+    ])
+    service.save_test_logs([
+        TestLog(
+            run_id='bench-run',
+            timestamp=start + timedelta(milliseconds=i),
+            level='INFO',
+            message=f'tests/test_bench.py::test_case_{i} PASSED [{i % 100:3d}%]'
+        )
+        for i in range(rows)
+    ])
+
+
+def _measure(read):
+    """返回 (对象数, 每秒对象数, 每个对象占用的字节数)"""
+    start = time.perf_counter()
+    objects = read()
+    elapsed = time.perf_counter() - start
+
+    del objects
+    tracemalloc.start()
+    objects = read()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(objects), len(objects) / elapsed, size / max(len(objects), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='存储服务读取路径基准测试')
+    parser.add_argument('--rows', type=int, default=50000, help='系统数据和日志各写入的行数')
+    args = parser.parse_args()
+
+    service = StorageService(os.path.join(_TEMP_DIR, 'read.db'))
+    start = datetime.now() - timedelta(seconds=args.rows)
+    _fill(service, args.rows, start)
+    end = start + timedelta(seconds=args.rows)
+
+    cases = [
+        ('get_system_data 行对象 ', lambda: service.get_system_data(start, end)),
+        ('get_system_data pydantic', lambda: [row.to_model() for row in service.get_system_data(start, end)]),
+        ('get_test_logs   行对象 ', lambda: service.get_test_logs('bench-run')),
+        ('get_test_logs   pydantic', lambda: [row.to_model() for row in service.get_test_logs('bench-run')]),
+    ]
+    print(f'行数: {args.rows}')
+    for name, read in cases:
+        count, rate, per_object = _measure(read)
+        print(f'{name}: {count:8d} 个, {rate:10.0f} 个/秒, {per_object:6.0f} 字节/个')
+    service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -17,9 +17,15 @@ class Settings(BaseSettings):
     APP_PASSWORD: str = "admin123"  # 使用APP_前缀避免与系统环境变量冲突
 
     # 系统监控配置
-    MONITOR_INTERVAL: int = 5  # 默认监控频率（秒）
-    MAX_MONITOR_INTERVAL: int = 60  # 最大监控频率（秒）
-    MIN_MONITOR_INTERVAL: int = 5  # 最小监控频率（秒）
+    MONITOR_INTERVAL: float = 5  # 默认监控频率（秒）
+    MAX_MONITOR_INTERVAL: float = 60  # 最大监控频率（秒）
+    MIN_MONITOR_INTERVAL: float = 0.1  # 最小监控频率（秒）
+    MONITOR_PERSIST_INTERVAL: float = 5.0  # 采样快于该间隔时，窗口内的样本汇总（使用率取峰值）为一条后再落库和通知回调
+    MONITOR_COLLECTOR: str = "auto"  # 采集后端：auto（Linux 使用 /proc 快速路径，其他平台使用 psutil）、procfs 或 psutil
+    MONITOR_HIGHRES_BUFFER_SIZE: int = 3000  # 内存中保留的高频样本数量（0.1 秒间隔约 5 分钟）
+    MONITOR_CALLBACK_QUEUE_SIZE: int = 16  # 回调分发缓冲区容量（样本数），回调积压超出后按溢出策略处理
+    MONITOR_CALLBACK_OVERFLOW: str = "drop_oldest"  # 默认溢出策略：drop_oldest（丢弃最旧）或 latest（只投递最新）
+    MONITOR_CALLBACK_WORKERS: int = 4  # 执行回调的线程数（与订阅者和样本数量无关）
 
     # 告警配置
     CPU_ALERT_THRESHOLD: float = 80.0  # CPU 使用率告警阈值（%）
@@ -27,8 +33,47 @@ class Settings(BaseSettings):
     DISK_ALERT_THRESHOLD: float = 80.0  # 磁盘使用率告警阈值（%）
 
     # 数据库配置
+    STORAGE_BACKEND: str = "sqlite"  # 存储后端：sqlite（持久化）或 memory（纯内存，进程退出即丢失）
     DB_PATH: str = os.path.join("db", "monitor.db")
+    DB_BUSY_TIMEOUT: float = 30.0  # 等待数据库锁的超时时间（秒）
+    DB_CACHE_SIZE_KB: int = 16384  # 每个连接的页缓存大小（KB）
+    DB_CACHED_STATEMENTS: int = 256  # 每个连接缓存的预编译语句数量
+    DB_MIGRATION_BATCH_SIZE: int = 10000  # 数据迁移每批处理的行数
+    TEST_RUN_CACHE_SIZE: int = 256  # 测试运行记录 LRU 缓存容量（0 表示不缓存）
+    DB_SNAPSHOT_INTERVAL: int = 0  # 只读快照刷新间隔（秒，0 表示不生成快照），趋势等聚合查询在快照上执行
+    DB_SNAPSHOT_PATH: str = ""  # 快照文件名前缀，留空时为 <DB_PATH 去掉扩展名>.snapshot
 
+    # 后台导出配置
+    EXPORT_MAX_WORKERS: int = 2  # 同时执行的导出任务数，其余任务排队
+    EXPORT_JOB_HISTORY: int = 50  # 保留的已结束导出任务数量
+
+    # 批量写入队列配置
+    STORAGE_WRITE_QUEUE_SIZE: int = 10000  # 写入队列最大长度，超出后丢弃
+    STORAGE_WRITE_BATCH_SIZE: int = 500  # 攒满该行数后立即批量提交
+    STORAGE_WRITE_FLUSH_INTERVAL: float = 1.0  # 最长攒批时间（秒）
+    STORAGE_WRITE_ENQUEUE_TIMEOUT: float = 0.5  # 测试日志入队的最长等待时间（秒）
+
+    # 数据保留配置（天，0 表示永久保留）
+    RETENTION_ENABLED: bool = True
+    RETENTION_SYSTEM_DATA_DAYS: int = 7  # 原始系统监控样本
+    RETENTION_ROLLUP_1M_DAYS: int = 30  # 1分钟汇总
+    RETENTION_ROLLUP_1H_DAYS: int = 365  # 1小时汇总
+    RETENTION_ROLLUP_1D_DAYS: int = 0  # 1天汇总
+    RETENTION_TEST_LOG_INFO_DAYS: int = 30  # INFO 及其他级别的测试日志
+    RETENTION_TEST_LOG_WARNING_DAYS: int = 90  # WARNING 级别的测试日志
+    RETENTION_TEST_LOG_ERROR_DAYS: int = 0  # ERROR 级别的测试日志
+    RETENTION_TEST_QUEUE_DAYS: int = 30  # 测试队列记录
+    RETENTION_CHECK_INTERVAL: int = 3600  # 清理任务执行间隔（秒）
+    RETENTION_BATCH_SIZE: int = 5000  # 每批删除的行数
+    RETENTION_BATCH_PAUSE: float = 0.05  # 批次之间的暂停时间（秒），让出写锁
+
+    # 测试日志存储配置
+    LOG_STORE: str = "rows"  # 日志存储方式：rows（每行一条记录）或 blocks（压缩块）
+    LOG_BLOCK_LINES: int = 1000  # 每个压缩块最多包含的日志行数
+    LOG_BLOCK_MAX_BYTES: int = 256 * 1024  # 每个压缩块解压后的最大字节数
+    LOG_BLOCK_COMPRESSION_LEVEL: int = 6  # zlib 压缩级别（1-9）
+    LOG_SEARCH_ENABLED: bool = False  # 写入日志时同步更新 FTS5 全文索引（默认关闭，开启后写入日志需额外维护索引）
+    
     # 远程连接端口配置
     SSH_PORT: int = 22  # Linux SSH 默认端口
     WINRM_HTTP_PORT: int = 5985  # Windows WinRM HTTP 默认端口
@@ -38,6 +83,7 @@ class Settings(BaseSettings):
     TEST_REPORTS_PATH: str = os.path.join("reports")
     TEMP_PATH: str = os.path.join("reports", "temp")
     PYTEST_ARGS: list = ["-v", "--html=report.html"]
+    REPORT_PAGE_SIZE: int = 50  # 测试报告列表每页加载的记录数
 
     # 日志配置
     LOG_LEVEL: str = "DEBUG"
@@ -2,7 +2,7 @@
 import sys
 import argparse
 from app.main import RemoteTestMonitorApp
-from app.services import monitor_service
+from app.services import monitor_service, retention_service
 
 
 def main():
@@ -16,6 +16,7 @@ def main():
         # 仅启动监控服务
         print("启动监控服务...")
         monitor_service.start_monitoring()
+        retention_service.start()
         print("监控服务已启动，按 Ctrl+C 停止")
         try:
             # 保持进程运行
@@ -24,6 +25,7 @@ def main():
         except KeyboardInterrupt:
             print("\n监控服务已停止")
             monitor_service.stop_monitoring()
+            retention_service.stop()
             sys.exit(0)
     else:
         # 启动完整应用
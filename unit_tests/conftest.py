@@ -0,0 +1,55 @@
+"""unit_tests 公共夹具
+
+导入 app.services 时会按 DB_PATH 创建全局服务，这里在导入前将其指向临时目录，以免改动项目数据库。
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+import psutil
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DB_PATH', os.path.join(tempfile.mkdtemp(), 'monitor.db'))
+
+from app.services.storage_service import StorageService  # noqa: E402
+from config.settings import settings  # noqa: E402
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """临时数据库上的 StorageService（日志逐行存储）"""
+    monkeypatch.setattr(settings, 'LOG_STORE', 'rows')
+    service = StorageService(str(tmp_path / 'monitor.db'))
+    yield service
+    service.close()
+
+
+# 主进程启动两个睡眠子进程，等子进程都启动完毕后输出 ready，然后一直等待
+_CHILD_SCRIPT = "import time; print('ready', flush=True); time.sleep(60)"
+_TREE_SCRIPT = (
+    "import subprocess, sys, time\n"
+    f"children = [subprocess.Popen([sys.executable, '-c', {_CHILD_SCRIPT!r}], stdout=subprocess.PIPE) for _ in range(2)]\n"
+    "for child in children:\n"
+    "    child.stdout.readline()\n"
+    "print('ready', flush=True)\n"
+    "time.sleep(60)\n"
+)
+
+
+@pytest.fixture
+def process_tree():
+    """主进程加两个睡眠子进程组成的进程树，返回 (主进程 Popen, 子进程 psutil.Process 列表)"""
+    root = subprocess.Popen([sys.executable, '-c', _TREE_SCRIPT], stdout=subprocess.PIPE, text=True)
+    assert root.stdout.readline().strip() == 'ready'
+    children = psutil.Process(root.pid).children(recursive=True)
+    yield root, children
+    for process in children:
+        try:
+            process.kill()
+        except psutil.NoSuchProcess:
+            pass
+    root.kill()
+    root.wait()
+    root.stdout.close()
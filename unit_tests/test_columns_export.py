@@ -0,0 +1,99 @@
+"""列式二进制导出（.cols）的写出与读取"""
+import math
+import struct
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import SystemData
+from app.services.export_service import JOB_DONE, ExportService
+from app.services.memory_storage import MemoryStorageService
+from app.utils import ExportUtils
+
+COLUMNS = (("ts", "q"), ("value", "d"), ("count", "q"), ("name", "i"))
+
+
+@pytest.fixture(params=['numpy', 'array'])
+def reader(request, monkeypatch):
+    """分别使用 numpy.memmap 和 array.array 读取"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setitem(sys.modules, 'numpy', None)
+    return ExportUtils.read_columns
+
+
+def test_round_trip(tmp_path, reader):
+    path = str(tmp_path / 'data.cols')
+    batches = [
+        [(1, 0.5, 10, 'a'), (2, None, None, 'b')],
+        [],
+        [(3, 2.5, 30, None), (4, 3.5, 40, 'a')],
+    ]
+    rows = ExportUtils.write_columns(path, COLUMNS, iter(batches), dictionary_columns=("name",), metadata={"source": "test"})
+    assert rows == 4
+
+    header, columns = reader(path)
+    assert header["rows"] == 4 and header["metadata"] == {"source": "test"}
+    assert header["dictionaries"] == {"name": ["a", "b"]}
+    assert [column["dtype"] for column in header["columns"]] == ['<i8', '<f8', '<i8', '<i4']
+    # 每列起始偏移按 64 字节对齐
+    assert all(column["offset"] % 64 == 0 for column in header["columns"])
+
+    assert list(columns["ts"]) == [1, 2, 3, 4]
+    values = list(columns["value"])
+    assert values[0] == 0.5 and math.isnan(values[1]) and values[2:] == [2.5, 3.5]
+    # 整数列空值为 -1，字典编码列空值也为 -1
+    assert list(columns["count"]) == [10, -1, 30, 40]
+    assert list(columns["name"]) == [0, 1, -1, 0]
+
+
+def test_columns_are_little_endian(tmp_path):
+    path = str(tmp_path / 'data.cols')
+    ExportUtils.write_columns(path, (("ts", "q"),), [[(1,), (258,)]])
+    column = ExportUtils.read_columns_header(path)["columns"][0]
+    with open(path, 'rb') as f:
+        f.seek(column["offset"])
+        assert struct.unpack('<2q', f.read(column["nbytes"])) == (1, 258)
+
+
+def test_empty_export(tmp_path, reader):
+    path = str(tmp_path / 'empty.cols')
+    assert ExportUtils.write_columns(path, COLUMNS, iter([]), dictionary_columns=("name",)) == 0
+    header, columns = reader(path)
+    assert header["rows"] == 0
+    assert all(len(values) == 0 for values in columns.values())
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_bytes(b'timestamp,cpu\n' * 4)
+    with pytest.raises(ValueError):
+        ExportUtils.read_columns_header(str(path))
+
+
+def test_export_job_writes_system_data(tmp_path):
+    start = datetime(2026, 6, 1, 12)
+    storage = MemoryStorageService()
+    storage.save_system_data_batch([
+        SystemData(timestamp=start + timedelta(seconds=i), cpu_percent=float(i), memory_percent=1.0, disk_percent=1.0,
+                   network_sent=i, network_recv=0, node_name=node)
+        for node in ('node-b', 'node-a') for i in range(3)
+    ])
+    service = ExportService(storage=storage, export_dir=str(tmp_path))
+    job = service.submit({"data_type": '系统监控数据', "format": 'COLS', "start_time": start,
+                          "end_time": start + timedelta(minutes=1)})
+    try:
+        service._executor.shutdown(wait=True)
+    finally:
+        service.shutdown()
+    assert job.state == JOB_DONE and job.rows_written == 6
+
+    header, columns = ExportUtils.read_columns(str(tmp_path / job.filename))
+    assert header["metadata"]["sort"] == ["node_name", "timestamp_ms"]
+    # 按节点名排序导出，节点名按首次出现顺序字典编码
+    assert header["dictionaries"]["node_name"] == ['node-a', 'node-b']
+    assert list(columns["node_name"]) == [0, 0, 0, 1, 1, 1]
+    assert list(columns["cpu_percent"]) == [0.0, 1.0, 2.0] * 2
+    assert list(columns["process_id"]) == [-1] * 6
@@ -0,0 +1,109 @@
+"""流式导出：CSV / NDJSON 写出、gzip 压缩和后台导出任务"""
+import csv
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import SystemData, TestLog, TestLogRecord
+from app.services.export_service import JOB_CANCELLED, JOB_DONE, ExportJob, ExportService
+from app.services.memory_storage import MemoryStorageService
+from app.utils import ExportUtils
+
+START = datetime(2026, 6, 1, 12)
+
+
+def _rows(count):
+    for i in range(count):
+        yield [i, f'消息 {i}', None]
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_write_csv_from_generator(tmp_path, compress):
+    path = str(tmp_path / 'out.csv')
+    # 行数超过一个批次，验证按批写出不丢行
+    assert ExportUtils.write_csv(path, ['id', 'message', 'empty'], _rows(2500), compress) == 2500
+    opener = gzip.open if compress else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['id', 'message', 'empty']
+    assert rows[1] == ['0', '消息 0', ''] and rows[-1] == ['2499', '消息 2499', ''] and len(rows) == 2501
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_write_ndjson(tmp_path, compress):
+    path = str(tmp_path / 'out.ndjson')
+    records = ({"id": i, "time": START + timedelta(seconds=i)} for i in range(3))
+    assert ExportUtils.write_ndjson(path, records, compress) == 3
+    opener = gzip.open if compress else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    # 无法直接序列化的值按 str 写出
+    assert lines[1] == {"id": 1, "time": str(START + timedelta(seconds=1))}
+
+
+@pytest.fixture
+def exporter(tmp_path):
+    storage = MemoryStorageService()
+    service = ExportService(storage=storage, export_dir=str(tmp_path / 'export'), max_workers=1)
+    yield service
+    service.shutdown()
+
+
+def _wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished, job.to_dict()
+
+
+def test_export_test_logs_ndjson_gzip(exporter):
+    exporter._storage.save_test_logs([
+        TestLog(run_id='run', timestamp=START + timedelta(seconds=i), level='INFO', message=f'line {i}')
+        for i in range(5)
+    ])
+    job = exporter.submit({"data_type": '测试日志', "format": 'NDJSON', "compress": True, "run_id": 'run'})
+    _wait(job)
+    assert job.state == JOB_DONE and job.rows_written == 5 and job.filename.endswith('.ndjson.gz')
+    with gzip.open(os.path.join(exporter.export_dir, job.filename), 'rt', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['消息'] for record in records] == [f'line {i}' for i in range(5)]
+    # 完成后临时文件已改名
+    assert os.listdir(exporter.export_dir) == [job.filename]
+
+
+def test_export_system_data_csv(exporter):
+    exporter._storage.save_system_data_batch([
+        SystemData(timestamp=START + timedelta(seconds=i), cpu_percent=float(i), memory_percent=1.0,
+                   disk_percent=1.0, network_sent=2048, network_recv=0)
+        for i in range(3)
+    ])
+    job = exporter.submit({"data_type": '系统监控数据', "format": 'CSV', "compress": False,
+                           "start_time": START, "end_time": START + timedelta(minutes=1)})
+    _wait(job)
+    assert job.state == JOB_DONE and job.progress == 1.0
+    with open(os.path.join(exporter.export_dir, job.filename), encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert [row[1] for row in rows[1:]] == ['0.0', '1.0', '2.0']
+    assert rows[1][4] == '2.0'
+
+
+def test_cancelled_export_removes_partial_file(exporter, monkeypatch):
+    job = ExportJob({"data_type": '测试日志', "format": 'CSV', "run_id": 'run'}, 'logs.csv')
+    records = [TestLogRecord('run', START + timedelta(seconds=i), 'INFO', f'line {i}') for i in range(3)]
+
+    def iter_logs(run_id, start_time=None, end_time=None):
+        yield records[0]
+        # 写出第一行后取消
+        exporter.cancel(job.job_id)
+        yield from records[1:]
+
+    monkeypatch.setattr(exporter._storage, 'iter_test_logs_in_range', iter_logs)
+    with exporter._lock:
+        exporter._jobs[job.job_id] = job
+    exporter._run(job)
+    assert job.state == JOB_CANCELLED and job.rows_written == 1
+    assert not os.listdir(exporter.export_dir)
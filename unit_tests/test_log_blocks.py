@@ -0,0 +1,97 @@
+"""压缩块日志存储：编解码、内存尾块与写入失败回滚"""
+import struct
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import TestLog
+from app.services.log_block_store import LOG_LEVELS
+from config.settings import settings
+
+START = datetime(2026, 6, 1, 12)
+
+
+@pytest.fixture
+def block_storage(storage, monkeypatch):
+    """日志按块存储的 StorageService，每块 10 行"""
+    monkeypatch.setattr(settings, 'LOG_STORE', 'blocks')
+    monkeypatch.setattr(settings, 'LOG_BLOCK_LINES', 10)
+    return storage
+
+
+def _logs(run_id, start, count):
+    return [
+        TestLog(run_id=run_id, timestamp=START + timedelta(seconds=i), level=LOG_LEVELS[i % len(LOG_LEVELS)],
+                message=f'第 {i} 行 line {i}')
+        for i in range(start, start + count)
+    ]
+
+
+def _stored_blocks(storage, run_id):
+    conn = storage._get_connection()
+    return conn.execute(
+        'SELECT block_no, first_line, line_count, offsets FROM test_log_blocks WHERE run_id = ? ORDER BY block_no',
+        (run_id,)
+    ).fetchall()
+
+
+def test_round_trip(block_storage):
+    logs = _logs('run', 0, 25)
+    block_storage.save_test_logs(logs)
+    block_storage.close_test_logs('run')
+
+    records = list(block_storage.iter_test_logs('run'))
+    assert [(r.timestamp, r.level, r.message) for r in records] == [(l.timestamp, l.level, l.message) for l in logs]
+    assert [r.message for r in block_storage.iter_test_logs('run', start_line=8, count=4)] == [l.message for l in logs[8:12]]
+    assert [r.level for r in block_storage.iter_test_logs('run', levels=['ERROR'])] == ['ERROR'] * 5
+
+    blocks = _stored_blocks(block_storage, 'run')
+    assert [(block_no, first_line, line_count) for block_no, first_line, line_count, _ in blocks] == [(0, 0, 10), (1, 10, 10), (2, 20, 5)]
+    # 行偏移固定按小端 uint32 保存
+    offsets = struct.unpack(f'<{blocks[0][2]}I', blocks[0][3])
+    assert offsets[0] == 0 and list(offsets) == sorted(offsets)
+
+
+def test_open_tail_stays_in_memory(block_storage):
+    block_storage.save_test_logs(_logs('run', 0, 13))
+    # 只有写满的块写入数据库，尾块的 3 行在内存中
+    assert [row[:3] for row in _stored_blocks(block_storage, 'run')] == [(0, 0, 10)]
+    assert block_storage.count_test_logs('run') == 13
+    assert [r.message for r in block_storage.iter_test_logs('run', start_line=9)] == [f'第 {i} 行 line {i}' for i in range(9, 13)]
+    assert [item[3] for item in block_storage.log_blocks.search_logs('line 12')] == ['第 12 行 line 12']
+
+    block_storage.save_test_logs(_logs('run', 13, 2))
+    block_storage.close_test_logs('run')
+    assert [row[:3] for row in _stored_blocks(block_storage, 'run')] == [(0, 0, 10), (1, 10, 5)]
+
+    # 运行结束后迟到的日志另起一块，行号继续递增
+    block_storage.save_test_logs(_logs('run', 15, 1))
+    block_storage.close_test_logs()
+    assert [row[:3] for row in _stored_blocks(block_storage, 'run')] == [(0, 0, 10), (1, 10, 5), (2, 15, 1)]
+    assert [r.message for r in block_storage.iter_test_logs('run')] == [f'第 {i} 行 line {i}' for i in range(16)]
+
+
+def test_failed_write_restores_tail(block_storage):
+    block_storage.save_test_logs(_logs('run', 0, 8))
+
+    def fail(conn, entries):
+        raise RuntimeError('index failed')
+
+    block_storage._index_test_logs = fail
+    with pytest.raises(RuntimeError):
+        block_storage.save_test_logs(_logs('run', 8, 5))
+    del block_storage._index_test_logs
+
+    assert block_storage.count_test_logs('run') == 8
+    assert _stored_blocks(block_storage, 'run') == []
+    block_storage.save_test_logs(_logs('run', 8, 5))
+    block_storage.close_test_logs()
+    assert [r.message for r in block_storage.iter_test_logs('run')] == [f'第 {i} 行 line {i}' for i in range(13)]
+
+
+def test_delete_discards_tail(block_storage):
+    block_storage.save_test_logs(_logs('run', 0, 12))
+    assert block_storage.delete_test_logs('run')
+    assert block_storage.count_test_logs('run') == 0
+    block_storage.close_test_logs()
+    assert _stored_blocks(block_storage, 'run') == []
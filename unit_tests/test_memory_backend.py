@@ -0,0 +1,71 @@
+"""内存后端与 SQLite 后端的查询语义一致性"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import SystemData, TestLog, TestRun
+from app.services.memory_storage import MemoryStorageService
+from app.services.storage_service import _FTS_TOKENIZER
+from config.settings import settings
+
+START = datetime(2026, 6, 1, 12)
+
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def backend(request, monkeypatch):
+    monkeypatch.setattr(settings, 'LOG_SEARCH_ENABLED', True)
+    if request.param == 'memory':
+        return MemoryStorageService()
+    if _FTS_TOKENIZER != 'trigram':
+        pytest.skip("当前 SQLite 不支持 trigram 分词")
+    return request.getfixturevalue('storage')
+
+
+def _run(run_id, minutes, status='completed'):
+    return TestRun(run_id=run_id, start_time=START + timedelta(minutes=minutes), status=status, test_path='tests')
+
+
+def test_returned_models_are_copies(backend):
+    backend.save_test_run(_run('run', 0))
+    test_run = backend.get_test_run('run')
+    test_run.status = 'failed'
+    assert backend.get_test_run('run').status == 'completed'
+
+
+def test_test_runs_page_order(backend):
+    for run_id, minutes in (('b', 1), ('a', 1), ('c', 0), ('d', 2)):
+        backend.save_test_run(_run(run_id, minutes))
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = backend.get_test_runs_page(page_size=3, cursor=cursor)
+        pages.append([test_run.run_id for test_run in page])
+        if cursor is None:
+            break
+    assert pages == [['d', 'b', 'a'], ['c']]
+
+
+def test_system_data_range(backend):
+    backend.save_system_data_batch([
+        SystemData(timestamp=START + timedelta(seconds=i), cpu_percent=i, memory_percent=1.0, disk_percent=1.0,
+                   network_sent=0, network_recv=0)
+        for i in range(5)
+    ])
+    records = backend.get_system_data(START + timedelta(seconds=1), START + timedelta(seconds=3))
+    assert [record.cpu_percent for record in records] == [1, 2, 3]
+
+
+def test_log_search_semantics(backend):
+    backend.save_test_logs([
+        TestLog(run_id='run', timestamp=START + timedelta(seconds=i), level='INFO', message=message)
+        for i, message in enumerate(['ab one', 'AB Error two', 'ab error three', 'none'])
+    ])
+    # 不足 3 个字符的关键字区分大小写，按时间倒序
+    results, has_more = backend.search_test_logs('ab')
+    assert [item['message'] for item in results] == ['ab error three', 'ab one'] and not has_more
+    assert results[0]['snippet'] == '<mark>ab</mark> error three'
+    # 3 个字符及以上不区分大小写
+    results, _ = backend.search_test_logs('ERROR')
+    assert sorted(item['message'] for item in results) == ['AB Error two', 'ab error three']
+    results, has_more = backend.search_test_logs('ab', limit=1, offset=1)
+    assert [item['message'] for item in results] == ['ab one'] and not has_more
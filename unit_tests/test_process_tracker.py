@@ -0,0 +1,43 @@
+"""进程树跟踪器：采样不阻塞、进程句柄跨采样复用、主进程退出后重置"""
+import time
+
+from app.utils.process_utils import ProcessTreeTracker
+
+
+def test_sample_does_not_block_and_counts_tree(process_tree):
+    root, _ = process_tree
+    tracker = ProcessTreeTracker(root.pid)
+
+    started = time.monotonic()
+    sample = tracker.sample()
+    # 旧实现对每个进程 cpu_percent(interval=0.1)，三个进程至少 0.3 秒
+    assert time.monotonic() - started < 0.1
+    assert sample['pid'] == root.pid
+    assert sample['process_count'] == 3
+    assert sample['total_memory'] > 0
+
+
+def test_child_handles_are_reused_between_samples(process_tree):
+    root, children = process_tree
+    tracker = ProcessTreeTracker(root.pid)
+    tracker.sample()
+    root_handle = tracker._root
+    handles = dict(tracker._children)
+    assert set(handles) == {child.pid for child in children}
+
+    assert tracker.sample()['process_count'] == 3
+    # 复用同一批句柄，cpu_percent 才有上次采样的基准
+    assert tracker._root is root_handle
+    assert all(tracker._children[pid] is handle for pid, handle in handles.items())
+
+
+def test_returns_none_and_resets_after_root_exits(process_tree):
+    root, _ = process_tree
+    tracker = ProcessTreeTracker(root.pid)
+    assert tracker.sample() is not None
+
+    root.kill()
+    root.wait()
+    assert tracker.sample() is None
+    assert tracker._root is None
+    assert tracker._children == {}
@@ -0,0 +1,76 @@
+"""/proc 采集后端：结果与 psutil 一致，MONITOR_COLLECTOR 选择后端"""
+import psutil
+import pytest
+
+from app.utils.procfs_collector import (
+    ProcfsProcessTreeTracker, ProcfsSystemCollector, procfs_available
+)
+from app.utils.process_utils import ProcessTreeTracker, ProcessUtils
+from config.settings import settings
+
+pytestmark = pytest.mark.skipif(not procfs_available(), reason='需要 Linux /proc')
+
+
+@pytest.fixture
+def collector():
+    collector = ProcfsSystemCollector()
+    yield collector
+    collector.close()
+
+
+def test_process_tree_matches_psutil(process_tree):
+    root, _ = process_tree
+    procfs_tracker = ProcfsProcessTreeTracker(root.pid)
+    psutil_tracker = ProcessTreeTracker(root.pid)
+    try:
+        procfs_sample = procfs_tracker.sample()
+        psutil_sample = psutil_tracker.sample()
+    finally:
+        procfs_tracker.close()
+
+    assert procfs_sample['pid'] == psutil_sample['pid'] == root.pid
+    assert procfs_sample['name'] == psutil_sample['name']
+    assert procfs_sample['process_count'] == psutil_sample['process_count'] == 3
+    # 睡眠进程的常驻内存几乎不变，两次读取之间只允许少量偏差
+    assert procfs_sample['total_memory'] == pytest.approx(psutil_sample['total_memory'], rel=0.05)
+    assert procfs_sample['total_cpu'] == 0.0
+
+
+def test_process_tree_returns_none_after_root_exits(process_tree):
+    root, _ = process_tree
+    tracker = ProcfsProcessTreeTracker(root.pid)
+    assert tracker.sample() is not None
+    assert tracker._entries
+
+    root.kill()
+    root.wait()
+    assert tracker.sample() is None
+    assert tracker._entries == {}
+
+
+def test_system_sample_matches_psutil(collector):
+    sample = collector.sample()
+
+    assert sample['memory_percent'] == pytest.approx(psutil.virtual_memory().percent, abs=2.0)
+    assert sample['disk_percent'] == pytest.approx(psutil.disk_usage('/').percent, abs=0.5)
+    assert 0.0 <= sample['cpu_percent'] <= 100.0
+    # 计数器单调递增：先采的 /proc 结果不会超过随后读取的 psutil 结果
+    counters = psutil.net_io_counters()
+    assert sample['network_sent'] <= counters.bytes_sent
+    assert sample['network_recv'] <= counters.bytes_recv
+
+
+@pytest.mark.parametrize('collector_name, expected', [
+    ('auto', ProcfsProcessTreeTracker),
+    ('procfs', ProcfsProcessTreeTracker),
+    ('psutil', ProcessTreeTracker),
+])
+def test_create_tree_tracker_follows_setting(monkeypatch, collector_name, expected):
+    monkeypatch.setattr(settings, 'MONITOR_COLLECTOR', collector_name)
+    assert type(ProcessUtils.create_tree_tracker(1)) is expected
+
+
+def test_unknown_collector_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, 'MONITOR_COLLECTOR', 'bogus')
+    with pytest.raises(ValueError):
+        ProcessUtils.create_tree_tracker(1)
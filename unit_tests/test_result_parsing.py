@@ -0,0 +1,53 @@
+"""pytest 输出中用例结果、耗时和失败信息的解析"""
+import threading
+
+import pytest
+
+from app.services.remote_machine_service import pytest_duration_args
+# 以别名导入，避免 pytest 把 TestService 当作测试类收集
+from app.services.test_service import TestService as _TestService, _DURATION_LINE, _RESULT_LINE, _SUMMARY_LINE, _XDIST_RESULT_LINE
+
+
+@pytest.mark.parametrize('pattern, line, expected', [
+    (_RESULT_LINE, 'tests/test_a.py::test_x[a b] PASSED                 [ 50%]', ('tests/test_a.py::test_x[a b]', 'PASSED')),
+    (_RESULT_LINE, '[2026-06-01 12:00:00] tests/test_a.py::C::test_y FAILED [100%]', ('tests/test_a.py::C::test_y', 'FAILED')),
+    (_RESULT_LINE, 'tests/test_a.py::test_z XFAIL (flaky)   [ 10%]', ('tests/test_a.py::test_z', 'XFAIL')),
+    (_XDIST_RESULT_LINE, '[gw1] [ 50%] PASSED tests/test_a.py::test_x[a b]', ('tests/test_a.py::test_x[a b]', 'PASSED')),
+])
+def test_result_line(pattern, line, expected):
+    match = pattern.match(line)
+    assert (match.group('nodeid'), match.group('outcome')) == expected
+
+
+def test_summary_and_duration_lines():
+    match = _SUMMARY_LINE.match('FAILED tests/test_a.py::test_x[a b] - AssertionError: 1 - 2')
+    assert (match.group('nodeid'), match.group('message')) == ('tests/test_a.py::test_x[a b]', 'AssertionError: 1 - 2')
+    match = _DURATION_LINE.match('0.51s call     tests/test_a.py::test_x[a b]')
+    assert (match.group('seconds'), match.group('nodeid')) == ('0.51', 'tests/test_a.py::test_x[a b]')
+    assert _RESULT_LINE.match('collected 3 items') is None
+
+
+def test_durations_accumulate_per_nodeid():
+    # 不执行 __init__，避免清理数据库中的测试运行
+    service = _TestService.__new__(_TestService)
+    service._result_trackers = {}
+    service._result_trackers_lock = threading.Lock()
+    for line in ('0.50s call     tests/test_a.py::test_x[a b]',
+                 '0.25s setup    tests/test_a.py::test_x[a b]',
+                 'FAILED tests/test_a.py::test_x[a b] - AssertionError'):
+        service._record_test_result(line, 'run')
+    assert service._result_trackers['run'] == {
+        "durations": {'tests/test_a.py::test_x[a b]': 0.75},
+        "messages": {'tests/test_a.py::test_x[a b]': 'AssertionError'}
+    }
+
+
+@pytest.mark.parametrize('output, args', [
+    ('pytest 7.4.0', '--durations=0 --durations-min=0'),
+    ('pytest 6.2.0', '--durations=0 --durations-min=0'),
+    ('pytest 6.1.2', '--durations=0'),
+    ('This is pytest version 5.4.3, imported from /usr/lib/python3/site-packages/pytest.py', '--durations=0'),
+    ('/usr/bin/python: No module named pytest', '--durations=0'),
+])
+def test_remote_duration_args(output, args):
+    assert pytest_duration_args(output) == args
@@ -0,0 +1,81 @@
+"""数据保留：分批删除过期数据，并同步删除日志的全文索引行"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import SystemData, TestLog
+from app.services.retention_service import RetentionService
+from app.services.storage_service import _FTS_TOKENIZER
+from config.settings import settings
+
+NOW = datetime(2026, 6, 1, 12, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def retention_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'RETENTION_BATCH_PAUSE', 0.0)
+    monkeypatch.setattr(settings, 'RETENTION_TEST_LOG_INFO_DAYS', 30)
+    monkeypatch.setattr(settings, 'RETENTION_TEST_LOG_WARNING_DAYS', 90)
+    monkeypatch.setattr(settings, 'RETENTION_TEST_LOG_ERROR_DAYS', 0)
+
+
+def _system_data(timestamp):
+    return SystemData(timestamp=timestamp, cpu_percent=1.0, memory_percent=2.0, disk_percent=3.0,
+                      network_sent=0, network_recv=0)
+
+
+def _count(storage, table):
+    return storage._get_connection().execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+
+def test_delete_expired_rows_in_batches(storage):
+    old = NOW - timedelta(days=10)
+    storage.save_system_data_batch([_system_data(old + timedelta(seconds=i)) for i in range(25)])
+    storage.save_system_data_batch([_system_data(NOW + timedelta(seconds=i)) for i in range(5)])
+
+    deleted = storage.delete_expired_rows('system_data', 'timestamp', NOW - timedelta(days=1), batch_size=7)
+
+    assert deleted == 25
+    assert _count(storage, 'system_data') == 5
+
+
+def test_log_retention_by_level(storage):
+    old = NOW - timedelta(days=60)
+    storage.save_test_logs([
+        TestLog(run_id='run-1', timestamp=old, level=level, message=level)
+        for level in ('INFO', 'WARNING', 'ERROR')
+    ])
+
+    report = RetentionService(storage=storage).run_once(now=NOW)
+
+    # INFO 超过 30 天被删除，WARNING 保留 90 天，ERROR 永久保留
+    assert report['deleted']['test_logs_info'] == 1
+    remaining = [log.level for log in storage.iter_test_logs('run-1')]
+    assert remaining == ['WARNING', 'ERROR']
+
+
+@pytest.mark.skipif(_FTS_TOKENIZER is None, reason="当前 SQLite 不支持 FTS5")
+@pytest.mark.parametrize('log_store', ['rows', 'blocks'])
+def test_log_retention_removes_index_rows(storage, monkeypatch, log_store):
+    monkeypatch.setattr(settings, 'LOG_STORE', log_store)
+    monkeypatch.setattr(settings, 'LOG_SEARCH_ENABLED', True)
+    monkeypatch.setattr(settings, 'LOG_BLOCK_LINES', 10)
+    monkeypatch.setattr(settings, 'RETENTION_BATCH_SIZE', 20)
+    old = NOW - timedelta(days=60)
+    storage.save_test_logs([
+        TestLog(run_id=f'old-{run}', timestamp=old + timedelta(seconds=i), level='INFO', message=f'old line {i % 3}')
+        for run in range(2) for i in range(45)
+    ])
+    storage.save_test_logs([
+        TestLog(run_id='new', timestamp=NOW + timedelta(seconds=i), level='INFO', message=f'new line {i % 3}')
+        for i in range(15)
+    ])
+    # 测试运行结束后未写满的日志块才会写入数据库
+    storage.close_test_logs()
+
+    RetentionService(storage=storage).run_once(now=NOW)
+
+    assert _count(storage, 'test_logs_fts') == 15
+    results, _ = storage.search_test_logs('line', limit=100)
+    assert {item['run_id'] for item in results} == {'new'}
+    assert sorted(item['message'] for item in results) == sorted(f'new line {i % 3}' for i in range(15))
@@ -0,0 +1,57 @@
+"""系统数据多粒度汇总：写入时增量更新，按时间桶读取"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import SystemData
+from app.services.memory_storage import MemoryStorageService
+from config.settings import settings
+
+START = datetime(2026, 6, 1, 12)
+
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def backend(request):
+    if request.param == 'memory':
+        return MemoryStorageService()
+    return request.getfixturevalue('storage')
+
+
+def _sample(seconds, cpu, sent, node_name='localhost'):
+    return SystemData(timestamp=START + timedelta(seconds=seconds), cpu_percent=cpu, memory_percent=50.0,
+                      disk_percent=10.0, network_sent=sent, network_recv=0, node_name=node_name)
+
+
+def test_minute_and_hour_buckets(backend):
+    # 乱序写入，桶内 last 取时间戳最新的样本
+    backend.save_system_data_batch([_sample(40, 30.0, 200), _sample(10, 10.0, 100)])
+    backend.save_system_data_batch([_sample(65, 50.0, 300), _sample(20, 99.0, 0, node_name='remote')])
+
+    minutes = backend.get_system_data_rollup('1m', START + timedelta(seconds=30), START + timedelta(minutes=5))
+    assert [(rollup.timestamp, rollup.sample_count) for rollup in minutes] == [
+        (START, 2), (START + timedelta(minutes=1), 1)]
+    first = minutes[0]
+    assert (first.cpu_percent_min, first.cpu_percent_max, first.cpu_percent_avg, first.cpu_percent_last) == (10.0, 30.0, 20.0, 30.0)
+    assert first.network_sent_last == 200
+
+    hours = backend.get_system_data_rollup('1h', START, START + timedelta(hours=1))
+    assert len(hours) == 1
+    assert (hours[0].sample_count, hours[0].cpu_percent_avg, hours[0].cpu_percent_max) == (3, 30.0, 50.0)
+    assert backend.get_system_data_rollup('1h', START, START + timedelta(hours=1), node_name='remote')[0].cpu_percent_max == 99.0
+
+
+def test_records_at_resolution(backend):
+    backend.save_system_data_batch([_sample(10, 10.0, 100), _sample(40, 30.0, 200), _sample(65, 50.0, 300)])
+    records = backend.get_system_data_at_resolution('1m', START, START + timedelta(minutes=2))
+    # 使用率取桶内平均值，网络累计计数取桶内最新值
+    assert [(record.timestamp, record.cpu_percent, record.network_sent) for record in records] == [
+        (START, 20.0, 200), (START + timedelta(minutes=1), 50.0, 300)]
+    assert len(backend.get_system_data_at_resolution('raw', START, START + timedelta(minutes=2))) == 3
+
+
+def test_choose_resolution(backend, monkeypatch):
+    monkeypatch.setattr(settings, 'MONITOR_INTERVAL', 5)
+    monkeypatch.setattr(settings, 'MONITOR_PERSIST_INTERVAL', 5.0)
+    assert backend.choose_resolution(START, START + timedelta(minutes=30), 500) == 'raw'
+    assert backend.choose_resolution(START, START + timedelta(days=1), 500) == '1h'
+    assert backend.choose_resolution(START, START + timedelta(days=3650), 500) == '1d'
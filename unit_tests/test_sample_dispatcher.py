@@ -0,0 +1,101 @@
+"""监控样本分发：订阅者独立投递和积压溢出策略"""
+import threading
+import time
+
+import pytest
+
+from app.services.sample_dispatcher import OVERFLOW_DROP_OLDEST, OVERFLOW_LATEST, SampleDispatcher
+
+
+class _BlockingSubscriber:
+    """第一次回调阻塞到 release 为止，用于制造积压"""
+    def __init__(self):
+        self.received = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, sample):
+        self.received.append(sample)
+        self.entered.set()
+        self.release.wait(5)
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, '等待超时'
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = SampleDispatcher(capacity=3, default_policy=OVERFLOW_DROP_OLDEST, workers=2)
+    yield dispatcher
+    dispatcher.stop()
+
+
+@pytest.mark.parametrize('policy, expected, dropped', [
+    (OVERFLOW_DROP_OLDEST, [1, 8, 9, 10], 6),
+    (OVERFLOW_LATEST, [1, 10], 8),
+])
+def test_overflow_policy(dispatcher, policy, expected, dropped):
+    subscriber = _BlockingSubscriber()
+    dispatcher.subscribe(subscriber, policy)
+    dispatcher.publish(1)
+    assert subscriber.entered.wait(5)
+    # 回调阻塞期间发布的样本超出缓冲区容量
+    for sample in range(2, 11):
+        dispatcher.publish(sample)
+    subscriber.release.set()
+
+    _wait_until(lambda: dispatcher.get_stats()["subscribers"][0]["delivered"] == len(expected))
+    assert subscriber.received == expected
+    stats = dispatcher.get_stats()
+    assert stats["published"] == 10 and stats["buffered"] == 3
+    assert (stats["subscribers"][0]["dropped"], stats["subscribers"][0]["pending"]) == (dropped, 0)
+
+
+def test_slow_subscriber_does_not_block_others(dispatcher):
+    slow = _BlockingSubscriber()
+    fast = []
+    dispatcher.subscribe(slow)
+    dispatcher.subscribe(fast.append)
+    for sample in range(1, 6):
+        dispatcher.publish(sample)
+        _wait_until(lambda: len(fast) == sample)
+    assert fast == [1, 2, 3, 4, 5]
+    assert slow.received == [1]
+    slow.release.set()
+
+
+def test_failing_callback_keeps_receiving(dispatcher):
+    received = []
+
+    def callback(sample):
+        received.append(sample)
+        if sample == 1:
+            raise RuntimeError('callback failed')
+
+    dispatcher.subscribe(callback)
+    dispatcher.publish(1)
+    _wait_until(lambda: received == [1])
+    dispatcher.publish(2)
+    _wait_until(lambda: received == [1, 2])
+    assert dispatcher.get_stats()["subscribers"][0]["errors"] == 1
+
+
+def test_subscribers_only_receive_later_samples(dispatcher):
+    dispatcher.publish(1)
+    received = []
+    dispatcher.subscribe(received.append)
+    dispatcher.subscribe(received.append)
+    dispatcher.publish(2)
+    _wait_until(lambda: received == [2])
+    assert len(dispatcher.get_stats()["subscribers"]) == 1
+
+
+def test_rejects_unknown_policy(dispatcher):
+    with pytest.raises(ValueError):
+        dispatcher.subscribe(lambda sample: None, 'block')
+    with pytest.raises(ValueError):
+        SampleDispatcher(capacity=3, default_policy='block')
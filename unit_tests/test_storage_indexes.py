@@ -0,0 +1,91 @@
+"""存储层查询计划检查：常用查询应沿索引 SEARCH，而不是全表 SCAN
+
+与 tests/ 下供监控平台执行的示例用例分开存放，在项目根目录执行:
+    python -m pytest unit_tests
+"""
+from datetime import datetime, timedelta
+
+
+def _query_plans(storage, call):
+    """执行 call 并返回其中每条 SELECT / DELETE 语句的查询计划（各步骤以换行连接）"""
+    statements = []
+    connections = [storage._get_connection(), storage._get_read_connection()]
+    for conn in connections:
+        conn.set_trace_callback(statements.append)
+    try:
+        result = call()
+        if result is not None and not isinstance(result, (list, tuple, bool)):
+            list(result)
+    finally:
+        for conn in connections:
+            conn.set_trace_callback(None)
+
+    plans = []
+    for statement in statements:
+        if not statement.lstrip().upper().startswith(('SELECT', 'DELETE')):
+            continue
+        rows = connections[0].execute(f'EXPLAIN QUERY PLAN {statement}').fetchall()
+        plans.append('\n'.join(row[3] for row in rows))
+    assert plans, '没有捕获到查询语句'
+    return plans
+
+
+def _assert_search(plans, table, index):
+    """断言某条语句沿指定索引（含覆盖索引）检索该表"""
+    expected = (f'SEARCH {table} USING INDEX {index} ', f'SEARCH {table} USING COVERING INDEX {index} ')
+    assert any(item in plan for plan in plans for item in expected), '\n\n'.join(plans)
+
+
+def test_system_data_by_node_and_time(storage):
+    end_time = datetime.now()
+    plans = _query_plans(storage, lambda: storage.get_system_data(end_time - timedelta(hours=1), end_time))
+    _assert_search(plans, 'system_data', 'idx_system_data_node_time')
+
+
+def test_running_tests_by_status(storage):
+    plans = _query_plans(storage, storage.get_running_tests)
+    _assert_search(plans, 'test_runs', 'idx_test_runs_status_start')
+
+
+def test_test_runs_by_time_range(storage):
+    end_time = datetime.now()
+    plans = _query_plans(storage, lambda: storage.get_test_runs_by_time_range(end_time - timedelta(days=1), end_time))
+    _assert_search(plans, 'test_runs', 'idx_test_runs_start_run_end')
+
+
+def test_delete_test_run_by_run_id(storage):
+    plans = _query_plans(storage, lambda: storage.delete_test_run('run-1'))
+    _assert_search(plans, 'test_logs', 'idx_test_logs_run_time')
+    # test_results 按 run_id 前缀的 (run_id, duration) 索引删除
+    _assert_search(plans, 'test_results', 'idx_test_results_run_duration')
+
+
+def test_test_runs_page_by_start_time(storage):
+    plans = _query_plans(storage, lambda: storage.get_test_runs_page(
+        cursor=storage._encode_test_run_cursor(0, 'run-1'), start_time=datetime.now() - timedelta(days=1)))
+    _assert_search(plans, 'test_runs', 'idx_test_runs_start_run_end')
+
+
+def test_test_logs_by_run_and_time(storage):
+    end_time = datetime.now()
+    plans = _query_plans(storage, lambda: storage.iter_test_logs_in_range('run-1', end_time - timedelta(hours=1), end_time))
+    _assert_search(plans, 'test_logs', 'idx_test_logs_run_time')
+
+
+def test_test_runs_ended_after(storage):
+    # ended_after 的 end_time 过滤由 (start_time, run_id, end_time) 索引覆盖
+    end_time = datetime.now()
+    plans = _query_plans(storage, lambda: storage.get_test_runs_page(
+        start_time=end_time - timedelta(days=1), ended_after=end_time - timedelta(hours=1)))
+    _assert_search(plans, 'test_runs', 'idx_test_runs_start_run_end')
+
+
+def test_slowest_tests_by_run(storage):
+    # v8 以 (run_id, duration) 索引取代了单列的 run_id 索引
+    plans = _query_plans(storage, lambda: storage.get_slowest_tests('run-1'))
+    _assert_search(plans, 'test_results', 'idx_test_results_run_duration')
+
+
+def test_test_case_history_by_test_and_time(storage):
+    plans = _query_plans(storage, lambda: storage.get_test_case_history('tests/test_a.py::test_x'))
+    _assert_search(plans, 'test_results', 'idx_test_results_test_time')
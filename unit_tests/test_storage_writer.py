@@ -0,0 +1,116 @@
+"""后台批量写入：按批次提交、刷新、写入失败和队列满时的处理"""
+import time
+from datetime import datetime
+
+import pytest
+
+from app.models import SystemData, TestLog
+from app.services.storage_writer import KIND_SYSTEM_DATA, KIND_TEST_LOG, StorageWriter
+from config.settings import settings
+
+
+class _RecordingStorage:
+    """记录每次批量写入的存储，fail 中的类型写入时抛出异常"""
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.batches = []
+        self.closed = []
+
+    def _save(self, kind, rows):
+        if kind in self.fail:
+            raise RuntimeError(f'{kind} failed')
+        self.batches.append((kind, len(rows)))
+
+    def save_system_data_batch(self, rows):
+        self._save(KIND_SYSTEM_DATA, rows)
+
+    def save_process_samples(self, rows):
+        self._save('process_sample', rows)
+
+    def save_test_logs(self, rows):
+        self._save(KIND_TEST_LOG, rows)
+
+    def save_test_results(self, rows):
+        self._save('test_result', rows)
+
+    def close_test_logs(self, run_id=None):
+        self.closed.append(run_id)
+
+
+def _system_data():
+    return SystemData(timestamp=datetime.now(), cpu_percent=1.0, memory_percent=1.0, disk_percent=1.0,
+                      network_sent=0, network_recv=0)
+
+
+def _log():
+    return TestLog(run_id='run', timestamp=datetime.now(), level='INFO', message='line')
+
+
+@pytest.fixture
+def writer_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'STORAGE_WRITE_BATCH_SIZE', 3)
+    monkeypatch.setattr(settings, 'STORAGE_WRITE_FLUSH_INTERVAL', 60.0)
+
+
+def test_batch_written_when_size_reached(writer_settings):
+    storage = _RecordingStorage()
+    writer = StorageWriter(storage)
+    try:
+        for _ in range(3):
+            assert writer.enqueue_system_data(_system_data())
+        deadline = time.monotonic() + 5
+        while not storage.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert storage.batches == [(KIND_SYSTEM_DATA, 3)]
+    finally:
+        writer.stop()
+
+
+def test_flush_and_stop_write_pending_rows(writer_settings):
+    storage = _RecordingStorage()
+    writer = StorageWriter(storage)
+    writer.enqueue_system_data(_system_data())
+    writer.enqueue_test_log(_log())
+    assert writer.flush()
+    assert sorted(storage.batches) == [(KIND_SYSTEM_DATA, 1), (KIND_TEST_LOG, 1)]
+
+    writer.enqueue_test_log(_log())
+    writer.stop()
+    assert storage.batches[-1] == (KIND_TEST_LOG, 1)
+    # 停止时写入各测试运行未写满的日志块
+    assert storage.closed == [None]
+    stats = writer.get_stats()
+    assert (stats["written"], stats["batches"], stats["errors"]) == (3, 3, 0)
+
+
+def test_failed_batch_does_not_stop_writer(writer_settings):
+    storage = _RecordingStorage(fail={KIND_TEST_LOG})
+    writer = StorageWriter(storage)
+    try:
+        writer.enqueue_test_log(_log())
+        writer.enqueue_system_data(_system_data())
+        assert writer.flush()
+        assert storage.batches == [(KIND_SYSTEM_DATA, 1)]
+
+        # 失败的批次被丢弃，写入线程继续处理后续数据
+        storage.fail.clear()
+        writer.enqueue_test_log(_log())
+        assert writer.flush()
+        assert storage.batches == [(KIND_SYSTEM_DATA, 1), (KIND_TEST_LOG, 1)]
+        assert writer.get_stats()["errors"] == 1
+    finally:
+        writer.stop()
+
+
+def test_full_queue_drops_samples(monkeypatch):
+    monkeypatch.setattr(settings, 'STORAGE_WRITE_QUEUE_SIZE', 1)
+    monkeypatch.setattr(settings, 'STORAGE_WRITE_ENQUEUE_TIMEOUT', 0.01)
+    writer = StorageWriter(_RecordingStorage())
+    # 不启动写入线程，使队列保持满
+    writer.start = lambda: None
+    assert writer.enqueue_system_data(_system_data())
+    assert not writer.enqueue_system_data(_system_data())
+    assert not writer.enqueue_test_log(_log())
+    stats = writer.get_stats()
+    assert stats["dropped"][KIND_SYSTEM_DATA] == 1 and stats["dropped"][KIND_TEST_LOG] == 1
+    assert (stats["queue_depth"], stats["queue_capacity"]) == (1, 1)
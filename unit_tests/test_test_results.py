@@ -0,0 +1,34 @@
+"""用例结果的耗时回填与查询"""
+from datetime import datetime, timedelta
+
+from app.models import TestResult
+
+START = datetime(2026, 6, 1, 12)
+
+
+def _result(run_id, test_id, minutes=0, status='passed'):
+    return TestResult(run_id=run_id, test_id=test_id, name=test_id.split('::')[-1], status=status,
+                      timestamp=START + timedelta(minutes=minutes))
+
+
+def test_durations_backfilled_by_nodeid(storage):
+    storage.save_test_results([_result('run', 't.py::test_a'), _result('run', 't.py::test_b[a b]'),
+                               _result('run', 't.py::test_c', status='failed')])
+    assert [result.duration for result in storage.get_slowest_tests('run')] == [None, None, None]
+
+    storage.update_test_results('run', {'t.py::test_a': 0.5, 't.py::test_b[a b]': 1.25},
+                                {'t.py::test_c': 'AssertionError'})
+    slowest = storage.get_slowest_tests('run')
+    # 未取得实测耗时的用例保持为空，排在最后
+    assert [(result.test_id, result.duration) for result in slowest] == [
+        ('t.py::test_b[a b]', 1.25), ('t.py::test_a', 0.5), ('t.py::test_c', None)]
+    assert slowest[2].message == 'AssertionError'
+
+
+def test_test_case_history_newest_first(storage):
+    storage.save_test_results([_result(f'run-{i}', 't.py::test_a', minutes=i) for i in range(3)])
+    storage.save_test_results([_result('run-0', 't.py::test_b')])
+    history = storage.get_test_case_history('t.py::test_a', limit=2)
+    assert [result.run_id for result in history] == ['run-2', 'run-1']
+    history = storage.get_test_case_history('t.py::test_a', start_time=START, end_time=START + timedelta(minutes=1))
+    assert [result.run_id for result in history] == ['run-1', 'run-0']
@@ -0,0 +1,58 @@
+"""测试运行记录的 LRU 缓存：容量淘汰和基于 generation 的回填保护"""
+from datetime import datetime
+
+from app.models import TestRun
+from app.services.storage_service import _LRUCache
+
+
+def test_lru_eviction_and_stats():
+    cache = _LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    # 'b' 最久未使用，被淘汰
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.get_stats() == {"size": 2, "capacity": 2, "hits": 3, "misses": 1, "evictions": 1}
+
+
+def test_read_through_fill_skipped_after_write():
+    cache = _LRUCache(4)
+    generation = cache.generation
+    # 读穿透查询数据库期间发生写入，旧数据不能回填
+    cache.put('run', 'new')
+    cache.put('run', 'old', generation)
+    assert cache.get('run') == 'new'
+
+
+def test_read_through_fill_skipped_after_invalidate():
+    cache = _LRUCache(4)
+    generation = cache.generation
+    cache.invalidate('run')
+    cache.put('run', 'old', generation)
+    assert cache.get('run') is None
+
+    generation = cache.generation
+    cache.put('run', 'current', generation)
+    assert cache.get('run') == 'current'
+
+
+def test_zero_capacity_disables_cache():
+    cache = _LRUCache(0)
+    cache.put('run', 'value')
+    assert cache.get('run') is None
+
+
+def test_storage_cache_follows_writes_and_deletes(storage):
+    storage.save_test_run(TestRun(run_id='run', start_time=datetime(2026, 6, 1, 12), status='running', test_path='tests'))
+    first = storage.get_test_run('run')
+    first.status = 'failed'
+    # 每次返回新的对象，修改返回值不影响缓存
+    assert storage.get_test_run('run').status == 'running'
+
+    assert storage.increment_test_counters('run', passed=2).passed_tests == 2
+    assert storage.get_test_run('run').passed_tests == 2
+    assert storage.delete_test_run('run')
+    assert storage.get_test_run('run') is None
+    assert storage.get_test_run_cache_stats()["hits"] >= 2
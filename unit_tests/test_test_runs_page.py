@@ -0,0 +1,51 @@
+"""测试运行记录的键集分页"""
+from datetime import datetime, timedelta
+
+from app.models import TestRun
+
+START = datetime(2026, 6, 1, 12)
+
+
+def _save_runs(storage):
+    # 同一开始时间的运行按 run_id 排序
+    for run_id, minutes, status in (('b', 1, 'completed'), ('a', 1, 'failed'), ('c', 0, 'completed'),
+                                    ('d', 2, 'completed'), ('e', 3, 'running')):
+        storage.save_test_run(TestRun(run_id=run_id, start_time=START + timedelta(minutes=minutes),
+                                      status=status, test_path='tests'))
+
+
+def _all_pages(storage, **filters):
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = storage.get_test_runs_page(page_size=2, cursor=cursor, **filters)
+        pages.append([test_run.run_id for test_run in page])
+        if cursor is None:
+            return pages
+
+
+def test_pages_descending_by_start_time_and_run_id(storage):
+    _save_runs(storage)
+    assert _all_pages(storage) == [['e', 'd'], ['b', 'a'], ['c']]
+
+
+def test_pages_ascending(storage):
+    _save_runs(storage)
+    assert _all_pages(storage, descending=False) == [['c', 'a'], ['b', 'd'], ['e']]
+    assert [test_run.run_id for test_run in storage.iter_test_runs(page_size=2)] == ['c', 'a', 'b', 'd', 'e']
+
+
+def test_pages_with_filters(storage):
+    _save_runs(storage)
+    assert _all_pages(storage, status='completed') == [['d', 'b'], ['c']]
+    assert _all_pages(storage, start_time=START + timedelta(minutes=1), end_time=START + timedelta(minutes=2)) == [['d', 'b'], ['a']]
+
+
+def test_page_not_affected_by_inserts_before_cursor(storage):
+    _save_runs(storage)
+    page, cursor = storage.get_test_runs_page(page_size=2)
+    assert [test_run.run_id for test_run in page] == ['e', 'd']
+    # 游标之前新增的运行不会让后续页重复或跳过记录
+    storage.save_test_run(TestRun(run_id='f', start_time=START + timedelta(minutes=4), status='running', test_path='tests'))
+    page, _ = storage.get_test_runs_page(page_size=2, cursor=cursor)
+    assert [test_run.run_id for test_run in page] == ['b', 'a']